@@ -15,8 +15,9 @@ This package defines modeling techniques and solvers for representing
 optimization problems with adversarial behavior.  PAO currently supports
 bilevel programming.
 
-Importing pao initializes the Pyomo environment and then registers
-the pao plugins.  We assume that a user will never import symbols from
+Importing pao declares the pao solvers, which are imported when they
+are first created.  The Pyomo environment and its plugins are also
+imported when they are first needed.  We assume that a user will never import symbols from
 pao directly:
 
     $ from pao import *
@@ -33,7 +34,6 @@ __doc__ = __doc__ % __version__
 
 __all__ = ('__version__')
 
-import pyomo.environ
 import pao.mpr
 import pao.pyomo
 #import pao.duality.plugins
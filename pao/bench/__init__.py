@@ -0,0 +1,6 @@
+#
+# pao.bench
+#
+# A benchmark harness for PAO solvers.
+#
+from .runner import find_examples, generated_example, run_example, run_benchmarks, import_time, write_results, load_results, compare, main
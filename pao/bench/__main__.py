@@ -0,0 +1,4 @@
+import sys
+from pao.bench.runner import main
+
+sys.exit(main())
@@ -0,0 +1,370 @@
+#
+# A benchmark harness that executes PAO solvers on the example
+# problems in pao.mpr.examples and pao.pyomo.examples.
+#
+import sys
+import json
+import time
+import platform
+import importlib
+import pkgutil
+import statistics
+import subprocess
+import functools
+from munch import Munch
+
+import pao
+import pao.common
+from pao.common import PhaseTimer
+
+
+#
+# The solvers that are executed for each type of example, if the user
+# does not specify the solvers.
+#
+default_solvers = {
+    'mpr': ['pao.mpr.FA', 'pao.mpr.PCCG', 'pao.mpr.REG', 'pao.mpr.MIBS'],
+    'pyomo': ['pao.pyomo.FA', 'pao.pyomo.PCCG', 'pao.pyomo.REG', 'pao.pyomo.MIBS'],
+    }
+
+
+def find_examples(kinds=('mpr', 'pyomo')):
+    """
+    Returns a dictionary that maps example names to the module that
+    defines the example.
+
+    Example names have the form ``<kind>.<module>``, where ``kind`` is
+    either ``mpr`` or ``pyomo``.
+    """
+    ans = {}
+    for kind in kinds:
+        package = importlib.import_module('pao.%s.examples' % kind)
+        for info in pkgutil.iter_modules(package.__path__):
+            module = importlib.import_module('pao.%s.examples.%s' % (kind, info.name))
+            if hasattr(module, 'create'):
+                ans['%s.%s' % (kind, info.name)] = module
+    return ans
+
+
+def generated_example(name):
+    """
+    Returns an object with a ``create()`` method that generates a problem
+    with a generator in :mod:`pao.mpr.generators`.
+
+    The name has the form ``gen.<generator>:<arg>=<value>,...`` (e.g.
+    ``gen.knapsack_interdiction:n=100,seed=1``).  Values are parsed as
+    JSON, and other values are treated as strings.
+    """
+    import pao.mpr.generators
+    assert (name.startswith('gen.')), "Generated examples must begin with 'gen.': %s" % name
+    generator, _, args = name[4:].partition(':')
+    assert (hasattr(pao.mpr.generators, generator)), "Unknown problem generator: %s" % generator
+    kwds = {}
+    for arg in args.split(','):
+        if arg == '':
+            continue
+        key, _, value = arg.partition('=')
+        try:
+            kwds[key] = json.loads(value)
+        except ValueError:
+            kwds[key] = value
+    return Munch(create=functools.partial(getattr(pao.mpr.generators, generator), **kwds))
+
+
+def _statistics(values):
+    return dict(min=min(values),
+                median=statistics.median(values),
+                mean=statistics.mean(values),
+                max=max(values))
+
+
+def _termination_condition(results):
+    tc = results.solver.get('termination_condition', None)
+    return None if tc is None else getattr(tc, 'name', str(tc))
+
+
+def run_example(name, module, solver, repeat=1, memory=False, solver_options=None):
+    """
+    Execute a solver on an example several times, and summarize the
+    time (and optionally the peak memory) spent in each phase.
+
+    The ``build`` phase is the construction of the example model,
+    the ``total`` phase is the execution of the solver, and the
+    remaining phases are the phases recorded by the solver.  The
+    phases of the multilevel solver used by a Pyomo solver are
+    prefixed with ``lmp.``.
+
+    Returns
+    -------
+    dict
+        A summary of the execution of the solver.
+    """
+    solver_options = dict(solver_options or {})
+    record = dict(example=name, solver=solver, repeat=repeat, skipped=None, error=None)
+    summaries = []
+    for i in range(repeat):
+        with PhaseTimer(memory=memory) as timer:
+            try:
+                with timer.phase('build'):
+                    model = module.create()
+                opt = pao.common.Solver(solver, **solver_options)
+                with timer.phase('total'):
+                    results = opt.solve(model, profile_memory=memory)
+            except AssertionError as err:
+                #
+                # PAO solvers use assertions to reject models that they
+                # cannot solve.
+                #
+                record['skipped'] = str(err)
+                return record
+            except Exception as err:
+                record['error'] = "%s: %s" % (type(err).__name__, str(err))
+                return record
+            summary = timer.summary()
+        for prefix, phases in (('', results.solver.get('phases', None)), ('lmp.', results.solver.get('lmp_phases', None))):
+            for key, value in (phases or {}).items():
+                summary[prefix+key] = value
+        summaries.append(summary)
+
+    record['termination_condition'] = _termination_condition(results)
+    record['objective'] = results.solver.get('best_feasible_objective', None)
+    phases = {}
+    for key, agg in PhaseTimer.aggregate(summaries).items():
+        phase = _statistics([summary[key].time for summary in summaries if key in summary])
+        phase['calls'] = agg.calls
+        if agg.get('peak_memory', None) is not None:
+            phase['peak_memory'] = agg.peak_memory
+        phases[key] = phase
+    record['phases'] = phases
+    if memory:
+        record['peak_memory'] = max(phase.get('peak_memory', 0) for phase in phases.values())
+    return record
+
+
+def run_benchmarks(examples=None, solvers=None, repeat=3, memory=False, solver_options=None, time_limit=None, output=None):
+    """
+    Execute solvers on the PAO examples.
+
+    Parameters
+    ----------
+    examples: list
+        A list of example names (e.g. ``mpr.bard511``).  If this is None,
+        then all examples are executed.  Names that begin with ``gen.``
+        specify problems that are generated (see :func:`generated_example`).
+    solvers: list
+        A list of solver names.  If this is None, then the solvers in
+        ``default_solvers`` are executed.  Solvers are only applied to
+        examples of the same type (``mpr`` or ``pyomo``).
+    repeat: int
+        The number of times each solver is executed on each example.
+    memory: bool
+        If True, then the peak memory allocated in each phase is recorded.
+    solver_options: dict
+        A dictionary that maps solver names to a dictionary of solver
+        options.
+    time_limit: float
+        The time limit for each solver execution (in seconds).  This is
+        ignored for solvers whose options specify a time limit.
+    output: stream
+        If this is not None, then progress is printed to this stream.
+
+    Returns
+    -------
+    dict
+        The benchmark results.
+    """
+    assert (repeat >= 1), "The number of repeats must be positive"
+    all_examples = find_examples()
+    if examples is None:
+        examples = sorted(all_examples.keys())
+    solver_options = solver_options or {}
+
+    records = []
+    for name in examples:
+        if name.startswith('gen.'):
+            example = generated_example(name)
+            kind = 'mpr'
+        else:
+            assert (name in all_examples), "Unknown example: %s" % name
+            example = all_examples[name]
+            kind = name.split('.')[0]
+        for solver in (default_solvers[kind] if solvers is None else solvers):
+            if not solver.startswith('pao.%s.' % kind):
+                continue
+            options = dict(solver_options.get(solver, {}))
+            if time_limit is not None:
+                options.setdefault('time_limit', time_limit)
+            record = run_example(name, example, solver, repeat=repeat, memory=memory,
+                                 solver_options=options)
+            records.append(record)
+            if output is not None:
+                if record['skipped'] is not None:
+                    output.write("%-30s %-16s SKIPPED %s\n" % (name, solver, record['skipped']))
+                elif record['error'] is not None:
+                    output.write("%-30s %-16s ERROR %s\n" % (name, solver, record['error']))
+                else:
+                    output.write("%-30s %-16s %-16s %10.4f\n" % (name, solver, record['termination_condition'], record['phases']['total']['median']))
+                output.flush()
+    return dict(pao_version=pao.__version__,
+                python_version=platform.python_version(),
+                platform=platform.platform(),
+                date=time.strftime("%Y-%m-%d %H:%M:%S"),
+                repeat=repeat,
+                results=records)
+
+
+def import_time(module='pao', repeat=5):
+    """
+    Measure the time needed to import a module in a new Python process.
+
+    Returns
+    -------
+    dict
+        The statistics of the import time (in seconds) over the repeated
+        measurements.
+    """
+    script = "import time; start=time.perf_counter(); import %s; print(time.perf_counter()-start)" % module
+    times = []
+    for i in range(repeat):
+        output = subprocess.check_output([sys.executable, '-c', script], stderr=subprocess.DEVNULL)
+        times.append(float(output.decode().strip().split()[-1]))
+    return _statistics(times)
+
+
+def write_results(results, filename):
+    """
+    Write benchmark results to a JSON file.
+    """
+    with open(filename, 'w') as OUTPUT:
+        json.dump(results, OUTPUT, indent=2, default=str)
+
+
+def load_results(filename):
+    """
+    Load benchmark results from a JSON file.
+    """
+    with open(filename, 'r') as INPUT:
+        return json.load(INPUT)
+
+
+def compare(baseline, current, threshold=0.2, min_time=0.01, statistic='median'):
+    """
+    Compare benchmark results with baseline results.
+
+    A phase is a regression if its time increased by more than the
+    relative ``threshold``, and by more than ``min_time`` seconds.  The
+    absolute limit ignores noise in phases that are very fast.  The peak
+    memory of each phase is compared with the same relative threshold.
+    The import time of pao is compared if it was measured.
+
+    Returns
+    -------
+    list
+        A list of dictionaries that describe the regressions.
+    """
+    base = {(r['example'], r['solver']):r for r in baseline['results']}
+    regressions = []
+    if 'import_time' in baseline and 'import_time' in current:
+        base_value = baseline['import_time'][statistic]
+        value = current['import_time'][statistic]
+        if value > base_value*(1+threshold) and value - base_value > min_time:
+            regressions.append(dict(example=None, solver=None, phase='import', metric='time',
+                                    baseline=base_value, current=value))
+    for record in current['results']:
+        key = (record['example'], record['solver'])
+        base_record = base.get(key, None)
+        if base_record is None or base_record.get('error', None) is not None or base_record.get('skipped', None) is not None:
+            continue
+        if record.get('error', None) is not None or record.get('skipped', None) is not None:
+            regressions.append(dict(example=key[0], solver=key[1], phase=None, metric='error',
+                                    baseline=None, current=record['error'] or record['skipped']))
+            continue
+        for phase, value in sorted(record['phases'].items()):
+            base_value = base_record['phases'].get(phase, None)
+            if base_value is None:
+                continue
+            if value[statistic] > base_value[statistic]*(1+threshold) and value[statistic] - base_value[statistic] > min_time:
+                regressions.append(dict(example=key[0], solver=key[1], phase=phase, metric='time',
+                                        baseline=base_value[statistic], current=value[statistic]))
+            if 'peak_memory' in value and base_value.get('peak_memory', None) and value['peak_memory'] > base_value['peak_memory']*(1+threshold):
+                regressions.append(dict(example=key[0], solver=key[1], phase=phase, metric='peak_memory',
+                                        baseline=base_value['peak_memory'], current=value['peak_memory']))
+    return regressions
+
+
+def _parse_option(text, solver_options):
+    # SOLVER:NAME=VALUE
+    try:
+        solver, option = text.split(':', 1)
+        name, value = option.split('=', 1)
+    except ValueError:
+        raise RuntimeError("Bad solver option '%s'.  Expected SOLVER:NAME=VALUE" % text)
+    try:
+        value = json.loads(value)
+    except ValueError:
+        pass
+    solver_options.setdefault(solver, {})[name] = value
+
+
+def main(args=None):
+    """
+    The command-line interface for the benchmark harness:
+
+        python -m pao.bench [options]
+
+    Returns 1 if a regression is detected, and 0 otherwise.
+    """
+    import argparse
+    parser = argparse.ArgumentParser(prog='python -m pao.bench',
+                                     description='Execute PAO solvers on the PAO examples, and compare with baseline results.')
+    parser.add_argument('-e', '--example', action='append', dest='examples', default=None,
+                        help='The name of an example (e.g. mpr.bard511), or a generated problem (e.g. gen.knapsack_interdiction:n=100,seed=1).  Default is all examples.')
+    parser.add_argument('-s', '--solver', action='append', dest='solvers', default=None,
+                        help='The name of a solver (e.g. pao.mpr.FA).')
+    parser.add_argument('-o', '--option', action='append', dest='options', default=[],
+                        help='A solver option with the format SOLVER:NAME=VALUE (e.g. pao.mpr.FA:mip_solver=cbc).')
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+                        help='The number of times each solver is executed.  Default is 3.')
+    parser.add_argument('-t', '--time-limit', type=float, default=None,
+                        help='The time limit for each solver execution (in seconds).')
+    parser.add_argument('-m', '--memory', action='store_true', default=False,
+                        help='Record the peak memory of each phase.')
+    parser.add_argument('--output', default=None,
+                        help='The JSON file where results are written.')
+    parser.add_argument('--baseline', default=None,
+                        help='A JSON file with baseline results.')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='The relative increase that is reported as a regression.  Default is 0.2.')
+    parser.add_argument('--min-time', type=float, default=0.01,
+                        help='The minimum increase in time (seconds) that is reported as a regression.  Default is 0.01.')
+    parser.add_argument('--import-time', action='store_true', default=False,
+                        help='Measure the time needed to import pao.')
+    parser.add_argument('--list', action='store_true', default=False,
+                        help='List the examples and exit.')
+    args = parser.parse_args(args)
+
+    if args.list:
+        for name in sorted(find_examples()):
+            print(name)
+        return 0
+
+    solver_options = {}
+    for text in args.options:
+        _parse_option(text, solver_options)
+
+    results = run_benchmarks(examples=args.examples, solvers=args.solvers, repeat=args.repeat,
+                             memory=args.memory, solver_options=solver_options, time_limit=args.time_limit,
+                             output=sys.stdout)
+    if args.import_time:
+        results['import_time'] = import_time(repeat=args.repeat)
+        print("Import time: %.4f" % results['import_time']['median'])
+    if args.output:
+        write_results(results, args.output)
+
+    if args.baseline:
+        regressions = compare(load_results(args.baseline), results, threshold=args.threshold, min_time=args.min_time)
+        for r in regressions:
+            print("REGRESSION: %s %s %s %s: %s -> %s" % (r['example'], r['solver'], r['phase'], r['metric'], r['baseline'], r['current']))
+        if len(regressions) > 0:
+            return 1
+    return 0
@@ -0,0 +1,110 @@
+import os
+import sys
+import copy
+import subprocess
+import shutil
+import tempfile
+import pyutilib.th as unittest
+
+import pao.bench
+
+
+options = {'pao.mpr.FA': {'mip_solver': 'scipy-highs'}}
+
+
+class Test_bench(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_find_examples(self):
+        examples = pao.bench.find_examples()
+        self.assertTrue('mpr.bard511' in examples)
+        self.assertTrue('pyomo.bard511' in examples)
+        # Examples that are not imported by the examples package
+        self.assertTrue('mpr.moore' in examples)
+
+    def test_run(self):
+        results = pao.bench.run_benchmarks(examples=['mpr.bard511', 'mpr.anadalingam'], solvers=['pao.mpr.FA', 'pao.pyomo.FA'],
+                                           repeat=2, memory=True, solver_options=options)
+        self.assertEqual(len(results['results']), 2)
+        record, skipped = results['results']
+        self.assertEqual(record['example'], 'mpr.bard511')
+        self.assertEqual(record['error'], None)
+        self.assertEqual(record['termination_condition'], 'optimal')
+        self.assertAlmostEqual(record['objective'], -12)
+        for phase in ('build', 'total', 'convert_to_standard_form', 'solve'):
+            self.assertEqual(record['phases'][phase]['calls'], 2)
+            self.assertTrue(record['phases'][phase]['min'] <= record['phases'][phase]['median'] <= record['phases'][phase]['max'])
+            self.assertTrue(record['phases'][phase]['peak_memory'] > 0)
+        # FA cannot solve trilevel problems
+        self.assertEqual(skipped['example'], 'mpr.anadalingam')
+        self.assertEqual(skipped['skipped'], 'Can only solve bilevel problems')
+
+        fname = os.path.join(self.tmpdir, 'results.json')
+        pao.bench.write_results(results, fname)
+        self.assertEqual(pao.bench.load_results(fname)['results'][0]['phases'], record['phases'])
+
+    def test_generated(self):
+        results = pao.bench.run_benchmarks(examples=['gen.random_bilevel_lp:nxU=5,nxL=5,nL=6,density=0.5,seed=1'],
+                                           solvers=['pao.mpr.FA'], repeat=1, solver_options=options)
+        record = results['results'][0]
+        self.assertEqual(record['error'], None)
+        self.assertEqual(record['termination_condition'], 'optimal')
+
+    def test_import_time(self):
+        stats = pao.bench.import_time(repeat=1)
+        self.assertTrue(stats['median'] > 0)
+
+        baseline = dict(results=[], import_time=dict(median=0.1))
+        current = dict(results=[], import_time=dict(median=0.2))
+        regressions = pao.bench.compare(baseline, current)
+        self.assertEqual(regressions[0]['phase'], 'import')
+        self.assertEqual(pao.bench.compare(current, baseline), [])
+
+    def test_lazy_imports(self):
+        # Solvers, examples and Pyomo plugins are not imported with pao
+        script = "import sys, pao; print(' '.join(m for m in ('scipy.optimize', 'scipy.sparse.csgraph', 'pao.mpr.solvers.fa', 'pao.mpr.examples.bard511', 'pao.pyomo.solvers.mpr_solvers', 'pyomo.environ', 'pyomo.gdp', 'pyomo.mpec', 'pao.pyomo.plugins.lcp') if m in sys.modules))"
+        output = subprocess.check_output([sys.executable, '-c', script], stderr=subprocess.DEVNULL)
+        self.assertEqual(output.decode().strip(), '')
+
+        script = "import sys, pao; from pao.mpr import examples; examples.bard511; pao.Solver('pao.mpr.FA'); print(' '.join(m for m in ('pao.mpr.solvers.fa', 'pao.mpr.examples.bard511') if m in sys.modules))"
+        output = subprocess.check_output([sys.executable, '-c', script], stderr=subprocess.DEVNULL)
+        self.assertEqual(output.decode().strip(), 'pao.mpr.solvers.fa pao.mpr.examples.bard511')
+
+    def test_compare(self):
+        baseline = pao.bench.run_benchmarks(examples=['mpr.bard511'], solvers=['pao.mpr.FA'], repeat=1, solver_options=options)
+        self.assertEqual(pao.bench.compare(baseline, baseline), [])
+
+        current = copy.deepcopy(baseline)
+        current['results'][0]['phases']['solve']['median'] += 1
+        regressions = pao.bench.compare(baseline, current, threshold=0.2)
+        self.assertEqual(len(regressions), 1)
+        self.assertEqual(regressions[0]['phase'], 'solve')
+        self.assertEqual(regressions[0]['metric'], 'time')
+        # The increase is less than the minimum time
+        self.assertEqual(pao.bench.compare(baseline, current, min_time=2), [])
+
+        current = copy.deepcopy(baseline)
+        current['results'][0]['error'] = 'RuntimeError: error'
+        regressions = pao.bench.compare(baseline, current)
+        self.assertEqual(regressions[0]['metric'], 'error')
+
+    def test_main(self):
+        fname = os.path.join(self.tmpdir, 'results.json')
+        args = ['-e', 'mpr.bard511', '-s', 'pao.mpr.FA', '-o', 'pao.mpr.FA:mip_solver=scipy-highs', '-r', '1']
+        self.assertEqual(pao.bench.main(args+['--output', fname]), 0)
+        self.assertTrue(os.path.exists(fname))
+        # Compare with a baseline that is much faster
+        baseline = pao.bench.load_results(fname)
+        for phase in baseline['results'][0]['phases'].values():
+            phase['median'] = 0
+        pao.bench.write_results(baseline, fname)
+        self.assertEqual(pao.bench.main(args+['--baseline', fname, '--min-time', '0']), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
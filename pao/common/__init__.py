@@ -1,2 +1,5 @@
 from .solver import TerminationCondition, SolverAPI, Results, Solver
-from .shellcmd import run_shellcmd
+from .shellcmd import run_shellcmd, run_shellcmd_async
+from .timing import PhaseTimer
+from .solver_pool import SolverAvailabilityCache, SolverHandlePool, solver_availability, solver_pool
+from .worker_pool import WorkerPool
@@ -1,7 +1,9 @@
 
 import sys
+import time
 import subprocess
 import io
+import asyncio
 
 from pyutilib.misc import Bunch
 from pyutilib.subprocess import run_command
@@ -10,9 +12,66 @@ from pyutilib.subprocess import run_command
 
 def run_shellcmd(cmd, *, env=None, tee=False, time_limit=None):
     ostr = io.StringIO()
+    start_time = time.time()
     rc, log = run_command(cmd, tee=tee, env=env, timelimit=time_limit,
             stdout=ostr,
             stderr=ostr)
+    #
+    # The command is killed with return code -1 when the time limit expires
+    #
+    timed_out = time_limit is not None and rc == -1 and time.time() - start_time >= time_limit
 
-    return Bunch(rc=rc, log=ostr.getvalue())
+    return Bunch(rc=rc, log=ostr.getvalue(), timed_out=timed_out)
 
+
+
+def _kill(proc):
+    try:
+        proc.kill()
+    except ProcessLookupError:
+        pass
+
+
+async def run_shellcmd_async(cmd, *, env=None, tee=False, time_limit=None, log_callback=None):
+    """
+    Execute a command asynchronously, with the same return value as
+    run_shellcmd().
+
+    The command is executed with asyncio.create_subprocess_exec, and each
+    line of its output is passed to log_callback (without the trailing
+    newline) as it is read.  If the time limit expires, then the command
+    is killed with return code -1.  If the task awaiting this coroutine
+    is cancelled, then the command is killed before the cancellation is
+    propagated.
+    """
+    start_time = time.time()
+    proc = await asyncio.create_subprocess_exec(*cmd, env=env,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT)
+    lines = []
+
+    async def communicate():
+        while True:
+            line = await proc.stdout.readline()
+            if not line:
+                break
+            line = line.decode(errors='replace')
+            lines.append(line)
+            if tee:
+                sys.stdout.write(line)
+            if log_callback is not None:
+                log_callback(line.rstrip('\n'))
+        return await proc.wait()
+
+    timed_out = False
+    try:
+        rc = await asyncio.wait_for(communicate(), time_limit)
+    except asyncio.TimeoutError:
+        timed_out = True
+        rc = -1
+    finally:
+        if proc.returncode is None:
+            _kill(proc)
+            await proc.wait()
+
+    return Bunch(rc=rc, log="".join(lines), timed_out=timed_out)
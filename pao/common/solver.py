@@ -6,22 +6,28 @@ import copy
 import six
 import abc
 import enum
+import asyncio
+import functools
 import textwrap
+import importlib
 import logging
 
 from pyutilib.misc import Options
 
+import pyomo.opt
 import pyomo.opt.parallel.manager
-import pyomo.environ as pe
+import pyomo.core
 using_ScalarBlock = False
 try:
-    getattr(pe, "ScalarBlock")
+    getattr(pyomo.core, "ScalarBlock")
     using_ScalarBlock = True
 except:
     pass
 from pyomo.common.config import ConfigValue, ConfigBlock, add_docstring_list
 from pyomo.neos.kestrel import kestrelAMPL
 
+from .solver_pool import solver_availability
+
 __all__ = ['TerminationCondition', 'SolverAPI', 'Results', 'Solver']
 
 
@@ -75,6 +81,9 @@ class TerminationCondition(enum.Enum):
     licensingProblems = 13
     """The solver exited due to licensing problems"""
 
+    feasible = 14
+    """The solver exited with a feasible solution that is not proven to be optimal"""
+
 
 class SolverAPI(abc.ABC):
     """
@@ -175,6 +184,33 @@ class SolverAPI(abc.ABC):
 
     __solve_doc__ = solve.__doc__
 
+    async def solve_async(self, model, **options):
+        """
+        Executes the solver asynchronously and loads the solution into the model.
+
+        This method returns an awaitable, so many solves can be
+        executed concurrently on one event loop.  The default behavior
+        is to execute solve() in the default executor of the event loop,
+        and a solve that has started is not interrupted if the awaiting
+        task is cancelled.  This method can be overloaded in a subclass
+        that executes an external process, which is killed when the task
+        is cancelled.
+
+        Parameters
+        ----------
+        model
+            The model that is being optimized.
+        options
+            Keyword options that are used to configure the solver.
+
+        Returns
+        -------
+        Results
+            A summary of the optimization results.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.solve, model, **options))
+
     @staticmethod
     def _generate_solve_docstring(cls):
         """
@@ -267,7 +303,11 @@ class PyomoSolver(SolverAPI):
         self.name = name
         level = _logger.getEffectiveLevel()
         _logger.setLevel(logging.ERROR)
-        self.solver = pe.SolverFactory(name)
+        #
+        # Pyomo registers its solver plugins when pyomo.environ is imported
+        #
+        import pyomo.environ
+        self.solver = pyomo.opt.SolverFactory(name)
         _logger.setLevel(level)
         self.solver_options = self._update_config(options, validate_options=False)
         self.solver.options.update(self.solver_options)
@@ -277,10 +317,10 @@ class PyomoSolver(SolverAPI):
     def available(self):
         if self.config['executable'] is not None:
             self.solver.set_executable(self.config['executable'])
-        return self.solver.available(exception_flag=False)
+        return solver_availability.available(self.name, self.solver)
 
     def solve(self, model, **options):
-        assert (isinstance(model, pe.Model) or (using_ScalarBlock and isinstance(model, pe.ScalarBlock)) or (not using_ScalarBlock and isinstance(model, pe.SimpleBlock))), "The Pyomo solver '%s' cannot solve a model of type %s" % (self.name, str(type(model)))
+        assert (isinstance(model, pyomo.core.Model) or (using_ScalarBlock and isinstance(model, pyomo.core.ScalarBlock)) or (not using_ScalarBlock and isinstance(model, pyomo.core.SimpleBlock))), "The Pyomo solver '%s' cannot solve a model of type %s" % (self.name, str(type(model)))
         tmp_config = self.config()
         tmp_options = self._update_config(options, config=tmp_config, validate_options=False)
         if tmp_config['executable'] is not None:
@@ -318,11 +358,12 @@ class NEOSSolver(SolverAPI):
         return self.neos_available
 
     def solve(self, model, **options):
-        assert (isinstance(model, pe.Model) or isinstance(model, pe.SimpleBlock)), "The Pyomo solver '%s' cannot solve a model of type %s" % (self.name, str(type(model)))
+        assert (isinstance(model, pyomo.core.Model) or isinstance(model, pyomo.core.SimpleBlock)), "The Pyomo solver '%s' cannot solve a model of type %s" % (self.name, str(type(model)))
         if self.config['email'] is not None:
             os.environ['NEOS_EMAIL'] = self.config['email']
         assert ('NEOS_EMAIL' in os.environ), "The NEOS solver requires an email.  Please specify the NEOS_EMAIL environment variable."
-        solver_manager = pe.SolverManagerFactory('neos')
+        import pyomo.environ
+        solver_manager = pyomo.opt.SolverManagerFactory('neos')
         try:
             tmp_config = self.config()
             tmp_options = copy.copy(self.solver_options)
@@ -470,6 +511,7 @@ class SolverFactory(object):
 
     _registry = {}
     _doc = {}
+    _modules = {}
 
     def register(self, cls=None, *, name=None, doc=None):
         """
@@ -501,6 +543,44 @@ class SolverFactory(object):
             return decorator
         return decorator(cls)
 
+    def unregister(self, name):
+        """
+        Remove a solver from the registry.
+
+        Parameters
+        ----------
+        name: str
+            The name of a registered solver
+        """
+        SolverFactory._registry.pop(name, None)
+        SolverFactory._doc.pop(name, None)
+
+    def declare(self, name, module):
+        """
+        Declare a solver that is registered when a module is imported.
+
+        The module is imported when the solver is first created, which
+        avoids importing all solvers when PAO is imported.
+
+        Parameters
+        ----------
+        name: str
+            Unique name of the solver
+        module: str
+            The name of the module that registers the solver
+        """
+        if name not in SolverFactory._registry:
+            SolverFactory._modules[name] = module
+            SolverFactory._doc.setdefault(name, None)
+
+    def _load(self, name):
+        #
+        # Import the module that registers a declared solver
+        #
+        if name not in SolverFactory._registry and name in SolverFactory._modules:
+            importlib.import_module(SolverFactory._modules[name])
+            assert (name in SolverFactory._registry), "Module '%s' did not register solver '%s'" % (SolverFactory._modules[name], name)
+
     def __iter__(self):
         """
         Yields
@@ -534,6 +614,7 @@ class SolverFactory(object):
         str
             A short description of the specified solver
         """
+        self._load(name)
         assert (name in SolverFactory._registry), "Unknown solver '%s' specified" % name
         return SolverFactory._doc[name]
 
@@ -558,6 +639,7 @@ class SolverFactory(object):
         #
         # Create a solver registered in PAO
         #
+        self._load(name)
         if name in SolverFactory._registry:
             solver = SolverFactory._registry[name]()
             solver._update_config(options)
@@ -0,0 +1,193 @@
+#
+# A process-wide cache of solver availability, and a pool of reusable
+# Pyomo solver handles.
+#
+import time
+import threading
+import contextlib
+from pyutilib.misc import Options
+
+import pyomo.opt
+from pyomo.common.collections import Bunch
+
+__all__ = ['SolverAvailabilityCache', 'SolverHandlePool', 'solver_availability', 'solver_pool']
+
+
+def _executable(solver):
+    #
+    # The path of the solver executable, or None if the solver does
+    # not use an executable
+    #
+    try:
+        return solver.executable()
+    except Exception:
+        return None
+
+
+class SolverAvailabilityCache(object):
+    """
+    A cache of the availability and version of Pyomo solvers.
+
+    Entries are keyed by the solver name and the path of its executable,
+    so changing the executable of a solver creates a new entry.  Entries
+    expire after ``ttl`` seconds, and they can be removed with the
+    :meth:`invalidate` method.  If ``ttl`` is None, then entries do not
+    expire.
+
+    >>> import pyomo.environ as pe
+    >>> cache = SolverAvailabilityCache(ttl=60)
+    >>> opt = pe.SolverFactory('glpk')
+    >>> available = cache.available('glpk', opt)
+    """
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, name, solver):
+        key = (name, _executable(solver))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if entry is not None and (self.ttl is None or now - entry.time < self.ttl):
+                return entry
+            entry = self._entries[key] = Options(time=now, available=None, version=None)
+            return entry
+
+    def available(self, name, solver):
+        """
+        Returns True if the solver is available.
+
+        Parameters
+        ----------
+        name: str
+            The solver name
+        solver
+            A Pyomo solver object, which is used if the cache does not
+            contain a valid entry
+        """
+        entry = self._entry(name, solver)
+        if entry.available is None:
+            entry.available = bool(solver.available(exception_flag=False))
+        return entry.available
+
+    def version(self, name, solver):
+        """
+        Returns the solver version, or None if the solver is not
+        available.  The arguments are the same as :meth:`available`.
+        """
+        entry = self._entry(name, solver)
+        if entry.version is None and self.available(name, solver):
+            entry.version = solver.version()
+        return entry.version
+
+    def invalidate(self, name=None):
+        """
+        Remove the cache entries for the named solver, or all entries
+        if name is None.
+        """
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == name]:
+                    del self._entries[key]
+
+
+class SolverHandlePool(object):
+    """
+    A pool of Pyomo solver objects, which are reused across solves.
+
+    Creating a Pyomo solver object involves a plugin lookup and a search
+    for the solver executable.  A handle is created by :meth:`acquire`
+    if no idle handle is available for the solver, and it is returned
+    to the pool by :meth:`release`.  The solver options are cleared when
+    a handle is released, and at most ``maxsize`` idle handles are kept
+    for each solver.  A handle is only used by one caller at a time.
+
+    >>> pool = SolverHandlePool()
+    >>> with pool.handle('glpk') as opt:
+    ...     pass
+    """
+
+    def __init__(self, maxsize=8):
+        self.maxsize = maxsize
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, name, executable=None):
+        """
+        Returns a Pyomo solver object for the named solver.
+
+        Parameters
+        ----------
+        name: str
+            The solver name
+        executable: str
+            The path to the solver executable.  If this is None, then
+            Pyomo searches for the executable.
+        """
+        key = (name, executable)
+        with self._lock:
+            idle = self._idle.get(key, None)
+            if idle:
+                opt = idle.pop()
+                opt._pao_pool_key = key
+                return opt
+        #
+        # Pyomo registers its solver plugins when pyomo.environ is imported
+        #
+        import pyomo.environ
+        opt = pyomo.opt.SolverFactory(name)
+        if executable is not None:
+            opt.set_executable(executable)
+        opt._pao_pool_key = key
+        return opt
+
+    def release(self, opt):
+        """
+        Return a solver object to the pool.  Objects that were not
+        acquired from a pool are ignored, and objects that are not
+        released are garbage collected as usual.
+        """
+        key = getattr(opt, '_pao_pool_key', None)
+        if key is None:
+            return
+        del opt._pao_pool_key
+        opt.options = Bunch()
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.maxsize:
+                idle.append(opt)
+
+    @contextlib.contextmanager
+    def handle(self, name, executable=None):
+        """
+        A context manager that acquires a solver object and releases
+        it when the context exits.
+        """
+        opt = self.acquire(name, executable=executable)
+        try:
+            yield opt
+        finally:
+            self.release(opt)
+
+    def clear(self):
+        """
+        Remove the idle solver objects from the pool.
+        """
+        with self._lock:
+            self._idle.clear()
+
+
+solver_availability = SolverAvailabilityCache()
+"""
+solver_availability is the global :class:`SolverAvailabilityCache`.
+"""
+
+solver_pool = SolverHandlePool()
+"""
+solver_pool is the global :class:`SolverHandlePool`, which is used by
+the PAO solvers to create MIP and NLP solvers.
+"""
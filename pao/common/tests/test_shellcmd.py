@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+import asyncio
+import pyutilib.th as unittest
+
+from pao.common import run_shellcmd, run_shellcmd_async
+
+
+def python_cmd(code):
+    return [sys.executable, '-c', code]
+
+
+class Test_run_shellcmd_async(unittest.TestCase):
+
+    def test_log(self):
+        lines = []
+        ans = asyncio.run(run_shellcmd_async(python_cmd("print('a'); print('b')"), log_callback=lines.append))
+        self.assertEqual(ans.rc, 0)
+        self.assertFalse(ans.timed_out)
+        self.assertEqual(lines, ['a', 'b'])
+        self.assertEqual(ans.log, run_shellcmd(python_cmd("print('a'); print('b')")).log)
+
+    def test_rc(self):
+        ans = asyncio.run(run_shellcmd_async(python_cmd("import sys; sys.exit(3)")))
+        self.assertEqual(ans.rc, 3)
+
+    def test_time_limit(self):
+        ans = asyncio.run(run_shellcmd_async(python_cmd("import time; time.sleep(30)"), time_limit=0.5))
+        self.assertEqual(ans.rc, -1)
+        self.assertTrue(ans.timed_out)
+
+    def test_cancel(self):
+        # The child process is killed when the task is cancelled
+        pids = []
+        async def main():
+            task = asyncio.ensure_future(run_shellcmd_async(
+                        python_cmd("import os, time; print(os.getpid(), flush=True); time.sleep(30)"),
+                        log_callback=pids.append))
+            while len(pids) == 0:
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+        start = time.time()
+        asyncio.run(main())
+        self.assertTrue(time.time() - start < 10)
+        with self.assertRaises(ProcessLookupError):
+            os.kill(int(pids[0]), 0)
+
+    def test_concurrent(self):
+        async def main():
+            return await asyncio.gather(*[run_shellcmd_async(python_cmd("import time; time.sleep(0.5); print(%d)" % i)) for i in range(4)])
+        start = time.time()
+        ans = asyncio.run(main())
+        self.assertEqual([a.log.strip() for a in ans], ['0', '1', '2', '3'])
+        self.assertTrue(time.time() - start < 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
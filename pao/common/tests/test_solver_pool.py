@@ -0,0 +1,96 @@
+import time
+import pyutilib.th as unittest
+import pyomo.opt
+
+from pao.common import SolverAvailabilityCache, SolverHandlePool
+
+
+solvers = pyomo.opt.check_available_solvers('cbc')
+
+
+class FakeSolver(object):
+
+    def __init__(self, executable='/bin/fake'):
+        self.path = executable
+        self.available_calls = 0
+        self.version_calls = 0
+
+    def executable(self):
+        return self.path
+
+    def available(self, exception_flag=True):
+        self.available_calls += 1
+        return True
+
+    def version(self):
+        self.version_calls += 1
+        return (1, 2, 3)
+
+
+class Test_SolverAvailabilityCache(unittest.TestCase):
+
+    def test_cached(self):
+        cache = SolverAvailabilityCache()
+        opt = FakeSolver()
+        for i in range(3):
+            self.assertTrue(cache.available('fake', opt))
+            self.assertEqual(cache.version('fake', opt), (1, 2, 3))
+        self.assertEqual(opt.available_calls, 1)
+        self.assertEqual(opt.version_calls, 1)
+        # A different executable has a different entry
+        other = FakeSolver('/bin/other')
+        self.assertTrue(cache.available('fake', other))
+        self.assertEqual(other.available_calls, 1)
+
+    def test_ttl(self):
+        cache = SolverAvailabilityCache(ttl=0.01)
+        opt = FakeSolver()
+        cache.available('fake', opt)
+        time.sleep(0.02)
+        cache.available('fake', opt)
+        self.assertEqual(opt.available_calls, 2)
+
+    def test_invalidate(self):
+        cache = SolverAvailabilityCache(ttl=None)
+        opt = FakeSolver()
+        cache.available('fake', opt)
+        cache.available('other', opt)
+        cache.invalidate('fake')
+        cache.available('fake', opt)
+        cache.available('other', opt)
+        self.assertEqual(opt.available_calls, 3)
+        cache.invalidate()
+        cache.available('other', opt)
+        self.assertEqual(opt.available_calls, 4)
+
+
+class Test_SolverHandlePool(unittest.TestCase):
+
+    @unittest.skipIf('cbc' not in solvers, "CBC solver is not available")
+    def test_reuse(self):
+        pool = SolverHandlePool(maxsize=1)
+        opt1 = pool.acquire('cbc')
+        opt2 = pool.acquire('cbc')
+        self.assertIsNot(opt1, opt2)
+        opt1.options['seconds'] = 10
+        pool.release(opt1)
+        pool.release(opt2)
+        # Only one idle handle is kept, and its options are cleared
+        with pool.handle('cbc') as opt:
+            self.assertIs(opt, opt1)
+            self.assertEqual(len(opt.options), 0)
+        # Releasing a handle twice has no effect
+        pool.release(opt1)
+        self.assertIs(pool.acquire('cbc'), opt1)
+        self.assertIsNot(pool.acquire('cbc'), opt1)
+        pool.clear()
+
+    def test_foreign(self):
+        pool = SolverHandlePool()
+        opt = FakeSolver()
+        pool.release(opt)
+        self.assertEqual(pool._idle, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
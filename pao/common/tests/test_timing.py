@@ -0,0 +1,73 @@
+import time
+import tracemalloc
+import pyutilib.th as unittest
+
+from pao.common import PhaseTimer
+
+
+class Test_PhaseTimer(unittest.TestCase):
+
+    def test_phases(self):
+        timer = PhaseTimer()
+        with timer.phase('a'):
+            time.sleep(0.01)
+        for i in range(3):
+            with timer.phase('b'):
+                pass
+        summary = timer.summary()
+        self.assertEqual(sorted(summary.keys()), ['a', 'b'])
+        self.assertEqual(summary['a'].calls, 1)
+        self.assertEqual(summary['b'].calls, 3)
+        self.assertTrue(summary['a'].time >= 0.01)
+        self.assertEqual(summary['a'].get('peak_memory', None), None)
+
+    def test_exception(self):
+        timer = PhaseTimer()
+        try:
+            with timer.phase('a'):
+                raise RuntimeError("error")
+        except RuntimeError:
+            pass
+        self.assertEqual(timer.summary()['a'].calls, 1)
+
+    def test_memory(self):
+        timer = PhaseTimer(memory=True)
+        with timer.phase('outer'):
+            with timer.phase('inner'):
+                x = [0]*100000
+            del x
+            y = [0]*10
+        summary = timer.summary()
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertTrue(summary['inner'].peak_memory >= 800000)
+        # The outer phase includes the peak of the nested phase
+        self.assertTrue(summary['outer'].peak_memory >= summary['inner'].peak_memory)
+
+    def test_context(self):
+        try:
+            with PhaseTimer(memory=True) as timer:
+                with timer.phase('a'):
+                    raise RuntimeError("error")
+        except RuntimeError:
+            pass
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertEqual(timer.summary()['a'].calls, 1)
+
+    def test_aggregate(self):
+        summaries = []
+        for i in range(1,3):
+            timer = PhaseTimer()
+            for j in range(i):
+                with timer.phase('a'):
+                    pass
+            summaries.append(timer.summary())
+        summaries[1]['a'].time = 2*summaries[0]['a'].time + 1
+        agg = PhaseTimer.aggregate(summaries)
+        self.assertEqual(agg['a'].runs, 2)
+        self.assertEqual(agg['a'].calls, 3)
+        self.assertEqual(agg['a'].max_time, summaries[1]['a'].time)
+        self.assertAlmostEqual(agg['a'].mean_time, (summaries[0]['a'].time + summaries[1]['a'].time)/2)
+
+
+if __name__ == "__main__":
+    unittest.main()
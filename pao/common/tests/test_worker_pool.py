@@ -0,0 +1,98 @@
+import os
+import math
+import time
+import pickle
+import multiprocessing
+import pyutilib.th as unittest
+from pyomo.common.config import ConfigValue
+
+import pao.common
+from pao.common import WorkerPool, SolverAPI, Solver
+from pao.common.worker_pool import _send, _recv
+from pao.mpr import examples, generators
+
+
+@Solver.register(name='test.worker_pool', doc='A solver used to test WorkerPool')
+class WorkerPoolTestSolver(SolverAPI):
+
+    config = SolverAPI.config()
+    config.declare('time_limit', ConfigValue(default=None))
+    config.declare('action', ConfigValue(default='crash'))
+
+    def solve(self, model, **options):
+        self._update_config(options)
+        if self.config.action == 'crash':
+            os._exit(3)
+        elif self.config.action == 'sleep':
+            time.sleep(30)
+        raise RuntimeError("Unknown action")
+
+
+class Test_WorkerPool(unittest.TestCase):
+
+    def test_pickle(self):
+        M = pickle.loads(pickle.dumps(examples.bard511.create()))
+        L = M.U.LL[0]
+        self.assertIs(L.UL(), M.U)
+        self.assertIs(M.U.UL(), None)
+        self.assertEqual([X.id for X in L.levels()], [L.id, M.U.id])
+
+    def test_transport(self):
+        # Arrays that are received out-of-band are writable
+        M = generators.random_bilevel_lp(nxU=20, nxL=40, nU=5, nL=20, seed=0)
+        conn1, conn2 = multiprocessing.Pipe()
+        _send(conn1, M)
+        ans = _recv(conn2)
+        L = ans.U.LL[0]
+        self.assertEqual((L.A[L] != M.U.LL[0].A[M.U.LL[0]]).nnz, 0)
+        self.assertEqual(list(L.b), list(M.U.LL[0].b))
+        L.b[0] = -1
+        L.A[L].data[0] = -1
+        self.assertIs(L.UL(), ans.U)
+
+    def test_solve(self):
+        models = [examples.bard511.create() for i in range(6)]
+        with WorkerPool(processes=2, maxsize=1) as pool:
+            jobs = []
+            for M in models:
+                jobs.append(pool.submit('pao.mpr.FA', M, mip_solver='scipy-highs'))
+                # The queue is bounded
+                self.assertTrue(len(pool._pending) <= 1)
+            reports = list(pool.results())
+        self.assertEqual(sorted(r.job for r in reports), jobs)
+        for r in reports:
+            self.assertEqual(r.error, None)
+            self.assertEqual(r.termination_condition, pao.common.TerminationCondition.optimal)
+            self.assertTrue(math.isclose(r.best_feasible_objective, -12))
+        # Solutions are loaded into the submitted models
+        for M in models:
+            self.assertEqual(M.U.x.values, [4])
+
+    def test_error(self):
+        with WorkerPool(processes=1) as pool:
+            report = pool.solve('test.worker_pool', examples.bard511.create(), action='unknown')
+            self.assertEqual(report.termination_condition, pao.common.TerminationCondition.error)
+            self.assertEqual(report.error, "RuntimeError: Unknown action")
+            self.assertEqual(pool.restarts, 0)
+
+    def test_crash(self):
+        with WorkerPool(processes=1) as pool:
+            report = pool.solve('test.worker_pool', examples.bard511.create())
+            self.assertEqual(report.termination_condition, pao.common.TerminationCondition.error)
+            self.assertEqual(report.error, "Worker exited with code 3")
+            self.assertEqual(pool.restarts, 1)
+            # The restarted worker executes the next job
+            report = pool.solve('pao.mpr.FA', examples.bard511.create(), mip_solver='scipy-highs')
+            self.assertEqual(report.termination_condition, pao.common.TerminationCondition.optimal)
+
+    def test_time_limit(self):
+        start = time.time()
+        with WorkerPool(processes=1, time_limit=0.2, grace=0.2) as pool:
+            report = pool.solve('test.worker_pool', examples.bard511.create(), action='sleep')
+            self.assertEqual(report.termination_condition, pao.common.TerminationCondition.maxTimeLimit)
+            self.assertEqual(pool.restarts, 1)
+        self.assertTrue(time.time() - start < 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+#
+# A lightweight timer that records the time (and optionally the peak
+# memory) spent in the phases of a solver.
+#
+import time
+import tracemalloc
+import contextlib
+from pyutilib.misc import Options
+
+__all__ = ['PhaseTimer']
+
+#
+# The phases that are being measured, across all timers.  The peak
+# memory of each phase is updated before a nested phase resets the
+# tracemalloc peak.
+#
+_active_phases = []
+
+
+class PhaseTimer(object):
+    """
+    Record the time spent in named phases of a computation.
+
+    If a phase is executed more than once, then the time is accumulated
+    and the number of calls is recorded.  If ``memory`` is True, then
+    tracemalloc is used to record the peak memory allocated while each
+    phase is executed.  Tracing memory allocations slows down Python
+    significantly, so this is disabled by default.  A timer can be used
+    as a context manager, which stops tracing when the context exits,
+    even if an exception is raised.
+
+    >>> timer = PhaseTimer()
+    >>> with timer.phase('convert'):
+    ...     pass
+    >>> timer.summary()['convert'].calls
+    1
+    """
+
+    def __init__(self, memory=False):
+        self.memory = memory
+        self._phases = {}
+        self._started_tracemalloc = False
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """
+        A context manager that records the time spent in the named phase.
+        """
+        record = self._phases.get(name, None)
+        if record is None:
+            record = self._phases[name] = Options(time=0.0, calls=0)
+            if self.memory:
+                record.peak_memory = 0
+        frame = [record, 0]
+        if self.memory:
+            _update_peak_memory()
+            tracemalloc.reset_peak()
+        _active_phases.append(frame)
+        start_time = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.time += time.perf_counter() - start_time
+            record.calls += 1
+            if self.memory:
+                _update_peak_memory()
+            _active_phases.remove(frame)
+            if self.memory:
+                record.peak_memory = max(record.peak_memory, frame[1])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def stop(self):
+        """
+        Stop tracing memory allocations, if this timer started tracing.
+        """
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def summary(self):
+        """
+        Returns a dictionary that maps phase names to an Options object
+        with the total time, the number of calls, and the peak memory
+        (in bytes) if memory is traced.
+        """
+        self.stop()
+        return {name:Options(**record) for name, record in self._phases.items()}
+
+    @staticmethod
+    def aggregate(summaries):
+        """
+        Aggregate the phase summaries from multiple runs.
+
+        Parameters
+        ----------
+        summaries: list
+            A list of dictionaries generated by :meth:`summary`.
+
+        Returns
+        -------
+        dict
+            A dictionary that maps phase names to an Options object with
+            the number of runs, the total number of calls, and the total,
+            mean and maximum time.  The maximum peak memory is included
+            if it was recorded.
+        """
+        ans = {}
+        for summary in summaries:
+            for name, record in summary.items():
+                agg = ans.get(name, None)
+                if agg is None:
+                    agg = ans[name] = Options(runs=0, calls=0, total_time=0.0, mean_time=0.0, max_time=0.0)
+                agg.runs += 1
+                agg.calls += record.calls
+                agg.total_time += record.time
+                agg.max_time = max(agg.max_time, record.time)
+                if record.get('peak_memory', None) is not None:
+                    agg.peak_memory = max(agg.get('peak_memory', None) or 0, record.peak_memory)
+        for agg in ans.values():
+            agg.mean_time = agg.total_time / agg.runs
+        return ans
+
+
+def _update_peak_memory():
+    if not tracemalloc.is_tracing():        # pragma: no cover
+        return
+    peak = tracemalloc.get_traced_memory()[1]
+    for frame in _active_phases:
+        frame[1] = max(frame[1], peak)
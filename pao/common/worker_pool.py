@@ -0,0 +1,329 @@
+#
+# A pool of persistent worker processes that execute many small solves.
+#
+import os
+import time
+import signal
+import pickle
+import importlib
+import collections
+import multiprocessing
+import multiprocessing.connection
+from pyutilib.misc import Options
+
+from .solver import Solver, TerminationCondition
+from .solver_pool import solver_pool
+
+__all__ = ['WorkerPool']
+
+
+def _terminate_worker(proc, timeout=1):
+    """
+    Terminate a worker process and the solver executables in its process group.
+    """
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        if not proc.is_alive():
+            break
+        try:
+            os.killpg(proc.pid, sig)
+        except (ProcessLookupError, PermissionError):     # pragma: no cover
+            pass
+        proc.join(timeout)
+
+
+def _send(conn, obj):
+    """
+    Send an object with pickle protocol 5, if it is available.  The
+    data of numpy arrays and sparse matrices is sent as out-of-band
+    buffers, which are not copied into the pickle data.
+    """
+    if pickle.HIGHEST_PROTOCOL < 5:                             # pragma: no cover
+        conn.send(obj)
+        return
+    buffers = []
+    data = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+    buffers = [buf.raw() for buf in buffers]
+    conn.send((data, [buf.nbytes for buf in buffers]))
+    for buf in buffers:
+        conn.send_bytes(buf)
+
+
+def _recv(conn):
+    """
+    Receive an object sent with _send().  The out-of-band buffers are
+    received into writable bytearrays, which the unpickled arrays use
+    without copying.
+    """
+    if pickle.HIGHEST_PROTOCOL < 5:                             # pragma: no cover
+        return conn.recv()
+    data, sizes = conn.recv()
+    buffers = []
+    for n in sizes:
+        buf = bytearray(n)
+        if n > 0:
+            conn.recv_bytes_into(buf)
+        else:
+            conn.recv_bytes()
+        buffers.append(buf)
+    return pickle.loads(data, buffers=buffers)
+
+
+def _report(job, name, start_time, error=None, termination_condition=TerminationCondition.error, results=None, model=None):
+    ans = Options(job=job, name=name, error=error,
+                  time=time.time() - start_time,
+                  termination_condition=termination_condition,
+                  best_feasible_objective=None,
+                  best_objective_bound=None,
+                  values=None)
+    if results is not None:
+        ans.best_feasible_objective = results.solver.get('best_feasible_objective', None)
+        ans.best_objective_bound = results.solver.get('best_objective_bound', None)
+        ans.values = {L.id:list(L.x.values) for L in model.levels()}
+    return ans
+
+
+def _pool_worker(conn, preload, solvers):
+    """
+    Execute jobs that are received from the parent process.
+
+    This function is executed in a forked process, which starts a new
+    process group so the parent can terminate this process along with
+    any solver executables that it launches.  The modules in preload are
+    imported and a handle for each solver in solvers is created before
+    the first job is received.  The worker exits when it receives None.
+    """
+    os.setpgrp()
+    for module in preload:
+        importlib.import_module(module)
+    for name in solvers:
+        solver_pool.release(solver_pool.acquire(name))
+
+    while True:
+        try:
+            job = _recv(conn)
+        except EOFError:
+            break
+        if job is None:
+            break
+        job_id, name, options, model = job
+        start_time = time.time()
+        try:
+            results = Solver(name, **options).solve(model)
+            report = _report(job_id, name, start_time, termination_condition=results.solver.termination_condition, results=results, model=model)
+        except Exception as err:
+            report = _report(job_id, name, start_time, error="%s: %s" % (type(err).__name__, str(err)))
+        conn.send(report)
+
+
+class WorkerPool(object):
+    """
+    A pool of persistent worker processes for many small solves.
+
+    Each worker imports the modules in ``preload`` and creates handles
+    for the solvers in ``solvers`` when it starts, and then it executes
+    jobs until the pool is closed.  A job is a call to
+    ``Solver(name, **options).solve(model)``, and the model is pickled
+    to send it to a worker.  With pickle protocol 5, the arrays in the
+    model are sent as out-of-band buffers.
+
+    Jobs are queued with :meth:`submit`, and at most ``maxsize`` jobs
+    wait for a worker.  The :meth:`results` method yields a report for
+    each job as it finishes.  Reports are :class:`pyutilib.misc.Options`
+    objects with the same data as the reports in the portfolio solver,
+    and the solution is loaded into the submitted model if the job is
+    solved.
+
+    If ``time_limit`` is not None, then it is passed to each solver,
+    and a worker whose job does not finish shortly after the time limit
+    is terminated.  Workers that are terminated or that crash are
+    restarted.
+
+    Worker processes are created with the 'fork' start method, so this
+    class is not supported on Windows.
+
+    .. code-block:: python
+
+        from pao.mpr import examples
+
+        models = [examples.bard511.create() for i in range(10)]
+        with WorkerPool(processes=4, solvers=['cbc']) as pool:
+            for M in models:
+                pool.submit('pao.mpr.FA', M, mip_solver='cbc')
+            for report in pool.results():
+                print(report.job, report.termination_condition)
+    """
+
+    def __init__(self, processes=None, maxsize=None, time_limit=None, preload=('pao.mpr',), solvers=(), grace=1):
+        if processes is None:
+            processes = os.cpu_count() or 1
+        assert (processes > 0), "The number of worker processes must be positive"
+        self.processes = processes
+        self.maxsize = 2*processes if maxsize is None else maxsize
+        assert (self.maxsize > 0), "The queue size must be positive"
+        self.time_limit = time_limit
+        self.grace = grace
+        self.preload = tuple(preload)
+        self.solvers = tuple(solvers)
+        self.restarts = 0
+
+        self._ctx = multiprocessing.get_context('fork')
+        self._job_id = 0
+        self._models = {}
+        self._pending = collections.deque()
+        self._done = collections.deque()
+        self._workers = [self._start_worker() for i in range(processes)]
+
+    def _start_worker(self):
+        conn, child_conn = self._ctx.Pipe()
+        proc = self._ctx.Process(target=_pool_worker, args=(child_conn, self.preload, self.solvers), daemon=True)
+        proc.start()
+        child_conn.close()
+        return Options(proc=proc, conn=conn, job=None, name=None, start_time=None)
+
+    def _restart_worker(self, i, report):
+        worker = self._workers[i]
+        _terminate_worker(worker.proc)
+        worker.conn.close()
+        self._finish(report)
+        self._workers[i] = self._start_worker()
+        self.restarts += 1
+
+    def _finish(self, report):
+        model = self._models.pop(report.job)
+        if report.values is not None:
+            for L in model.levels():
+                L.x.values = list(report.values[L.id])
+        self._done.append(report)
+
+    def _dispatch(self):
+        for i, worker in enumerate(self._workers):
+            if len(self._pending) == 0:
+                break
+            if worker.job is not None:
+                continue
+            if not worker.proc.is_alive():
+                #
+                # Replace an idle worker that has exited
+                #
+                worker.conn.close()
+                worker = self._workers[i] = self._start_worker()
+                self.restarts += 1
+            job_id, name, options, model = self._pending.popleft()
+            worker.job, worker.name, worker.start_time = job_id, name, time.time()
+            try:
+                _send(worker.conn, (job_id, name, options, model))
+            except (BrokenPipeError, EOFError):                 # pragma: no cover
+                #
+                # The worker will be restarted when the parent polls
+                #
+                pass
+
+    def _poll(self, timeout):
+        """
+        Wait for jobs to finish, and restart workers that have crashed
+        or exceeded the time limit.
+        """
+        busy = [worker.conn for worker in self._workers if worker.job is not None]
+        if len(busy) > 0:
+            ready = multiprocessing.connection.wait(busy, timeout)
+        else:
+            ready = []
+        for i, worker in enumerate(self._workers):
+            if worker.job is None:
+                continue
+            if worker.conn in ready:
+                try:
+                    report = worker.conn.recv()
+                except (EOFError, OSError):
+                    worker.proc.join(1)
+                    self._restart_worker(i, _report(worker.job, worker.name, worker.start_time,
+                                            error="Worker exited with code %s" % str(worker.proc.exitcode)))
+                    continue
+                worker.job = None
+                self._finish(report)
+            elif self.time_limit is not None and time.time() - worker.start_time > self.time_limit + self.grace:
+                #
+                # Solvers enforce the time limit themselves, so a grace
+                # period is allowed before the worker is terminated
+                #
+                self._restart_worker(i, _report(worker.job, worker.name, worker.start_time,
+                                        termination_condition=TerminationCondition.maxTimeLimit))
+        self._dispatch()
+
+    def submit(self, name, model, **options):
+        """
+        Queue a job that solves the model with the named solver, and
+        return the job id.  If the queue is full, then this method waits
+        until a worker is available.
+
+        Parameters
+        ----------
+        name: str
+            The solver name
+        model
+            The model that is being optimized
+        options
+            Keyword options that are used to create the solver
+        """
+        assert (self._workers is not None), "Cannot submit a job to a closed WorkerPool"
+        while len(self._pending) >= self.maxsize:
+            self._poll(0.1)
+        if self.time_limit is not None:
+            options.setdefault('time_limit', self.time_limit)
+        job_id = self._job_id
+        self._job_id += 1
+        self._models[job_id] = model
+        self._pending.append((job_id, name, options, model))
+        self._dispatch()
+        return job_id
+
+    def results(self):
+        """
+        Yield the reports for the submitted jobs as they finish, until
+        all jobs have finished.
+        """
+        while True:
+            while len(self._done) > 0:
+                yield self._done.popleft()
+            if len(self._models) == 0:
+                break
+            self._poll(0.1)
+
+    def solve(self, name, model, **options):
+        """
+        Solve a model in a worker and return the report.  This method
+        waits for the job, and the reports of other jobs that finish
+        are yielded by :meth:`results`.
+        """
+        job_id = self.submit(name, model, **options)
+        while True:
+            for report in self._done:
+                if report.job == job_id:
+                    self._done.remove(report)
+                    return report
+            self._poll(0.1)
+
+    def close(self):
+        """
+        Stop the workers.  Jobs that have not finished are discarded.
+        """
+        if self._workers is None:
+            return
+        for worker in self._workers:
+            if worker.job is None:
+                try:
+                    _send(worker.conn, None)
+                except (BrokenPipeError, OSError):             # pragma: no cover
+                    pass
+                worker.proc.join(1)
+            _terminate_worker(worker.proc)
+            worker.conn.close()
+        self._workers = None
+        self._pending.clear()
+        self._models.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, t, v, traceback):
+        self.close()
@@ -23,6 +23,7 @@ __all__ = ("create_linear_dual_from",)
 #pylint: disable-msg=too-many-branches
 #pylint: disable-msg=too-many-statements
 
+import numpy as np
 from pyutilib.misc import Bunch
 from pyomo.repn import generate_standard_repn
 from pyomo.core import (Var,
@@ -35,8 +36,11 @@ from pyomo.core import (Var,
                         Reals,
                         Block,
                         Model,
-                        ConcreteModel)
+                        ConcreteModel,
+                        quicksum)
 from pyomo.core.expr.visitor import identify_variables
+from pyomo.core.expr.numvalue import native_numeric_types
+from pyomo.core.expr.numeric_expr import LinearExpression
 
 
 def collect_dual_representation(block, fixed_modelvars):
@@ -307,31 +311,346 @@ def collect_dual_representation(block, fixed_modelvars):
 
 
 
-def create_linear_dual_from(block, fixed=None, unfixed=None):
+class DualNameMap(object):
     """
-    Construct a block that represents the dual of the given block.
+    A map from the indices of the dual variables and dual constraints
+    to the names that are used by create_linear_dual_from() when
+    naming='names'.
 
-    The resulting block contains variables and constraints whose names are
-    the dual names of the primal block.  Note that this involves a many
-    string operations.  A quicker operations could be executed, but it
-    would generate a dual representation that is difficult to interpret.
+    The names are only generated when they are first requested, so this
+    map does not add the cost of string operations to the dualization.
+    """
 
-    Note that the dualization of a maximization problem is performed by
-    negating objective and right-hand side coefficients after dualizing
-    the corresponding minimization problem.  This suggestion is made
-    by Dimitri Bertsimas and John Tsitsiklis in section 4.2 page 143 of
-    "Introduction to Linear Optimization"
+    def __init__(self, block, vars, duals):
+        self._block = block
+        self._vars = vars
+        self._duals = duals
+        self._var_names = None
+        self._dual_names = None
+
+    def _name(self, component, suffix=''):
+        # Constraint names are relative to the block, and variable names
+        # are fully qualified
+        fully_qualified = not component.ctype is Constraint
+        try:
+            name = component.parent_component().getname(fully_qualified=fully_qualified, relative_to=self._block)
+        except RuntimeError:
+            name = component.parent_component().getname(fully_qualified=fully_qualified, relative_to=self._block.model())
+        name += suffix
+        ndx = component.index()
+        if ndx is None:
+            return name
+        elif isinstance(ndx, tuple):
+            return "%s[%s]" % (name, ','.join(map(str, ndx)))
+        return "%s[%s]" % (name, str(ndx))
+
+    def dual_variables(self):
+        """
+        Returns a list with the name of each dual variable
+        """
+        if self._dual_names is None:
+            self._dual_names = [self._name(component, suffix) for component, suffix in self._duals]
+        return self._dual_names
+
+    def dual_constraints(self):
+        """
+        Returns a list with the name of each dual constraint, which is
+        the name of the corresponding primal variable
+        """
+        if self._var_names is None:
+            self._var_names = [self._name(var) for var in self._vars]
+        return self._var_names
+
+
+def collect_dual_matrix_representation(block, fixed_modelvars):
+    """
+    Process linear terms from a block and return the information that is
+    used to define the dual in matrix form.  This function does not change
+    the block.
+
+    This collects the same information as collect_dual_representation(),
+    but the primal variables and the dual variables are identified by
+    their position, so no names are generated.  The primal constraint
+    matrix is collected in COO format and transposed by sorting its
+    entries by column.  The coefficients are kept in a list, since they
+    may be expressions of the fixed variables.
 
     Arguments:
-        block: A Pyomo block or model
-        unfixed: An iterable object with Variable and VarData values that are 
-                not fixed variables.  All other variables are assumed to be fixed.
-        fixed: An iterable object with Variable and VarData values that are fixed.  
-                All other variables are assumed not fixed.
+        block: The SubModel object that is dualized
+        fixed_modelvars: A map from variable ids to VarData objects, which will be
+                fixed before dualization
 
-    Returns:
-        If the block is a model object, then this returns a ConcreteModel.
-        Otherwise, it returns a Block.
+    Returns: A Bunch with the following values:
+        vars:       The primal variables
+        duals:      A list of (component, suffix) tuples that identify the
+                        primal constraint or variable bound for each dual
+                        variable
+        b:          The coefficients of the dual objective
+        v_domain:   The domain of each dual variable (-1: Nonpositive, 0: Unbounded,
+                        1: Nonnegative)
+        c:          The dual constraint right-hand sides
+        c_sense:    The sense of each dual constraint
+        d_sense:    The sense of the dual objective
+        obj_offset: The offset for the dual objective
+        AT:         A Bunch (indptr, rows, coefs) with the transpose of the
+                        constraint matrix in CSR format
+    """
+    #
+    # fix variables
+    #
+    for vdata in fixed_modelvars.values():
+        vdata.fixed = True
+
+    column = {}
+    vars = []
+    c = []
+
+    def var_column(var):
+        j = column.get(id(var))
+        if j is None:
+            j = column[id(var)] = len(vars)
+            vars.append(var)
+            c.append(0.0)
+        return j
+
+    duals = []
+    b = []
+    v_domain = []
+    rows = []
+    cols = []
+    coefs = []
+    #
+    # Collect objective
+    #
+    nobj = 0
+    obj_offset = 0
+    d_sense = None
+    for odata in block.component_objects(Objective, active=True):
+        for ndx in odata:
+            o_terms = generate_standard_repn(odata[ndx].expr, compute_values=False)
+            obj_offset = o_terms.constant
+            d_sense = minimize if odata[ndx].sense == maximize else maximize
+            for var, coef in zip(o_terms.linear_vars, o_terms.linear_coefs):
+                if var.parent_component() is None:
+                    raise RuntimeError("ERROR: Variable %s encountered that is not owned by a Pyomo model" % str(var))
+                c[var_column(var)] = coef
+            nobj += 1
+    if nobj == 0:
+        raise RuntimeError("Error dualizing block.  No objective expression.")
+    if nobj > 1:
+        raise RuntimeError("Error dualizing block.  Multiple objective expressions.")
+    if not vars:
+        # If there are no variables, then the objective is constant
+        raise RuntimeError("Error dualizing block.  Objective is constant.")
+
+    def add_dual(component, suffix, domain, rhs):
+        duals.append( (component, suffix) )
+        v_domain.append(domain)
+        b.append(rhs)
+        return len(duals)-1
+    #
+    # Collect constraints
+    #
+    for data in block.component_objects(Constraint, active=True):
+        for con in data.values():
+            body_terms = generate_standard_repn(con.body, compute_values=False)
+            if body_terms.is_fixed():
+                #
+                # If a constraint has a fixed body, then don't collect it.
+                #
+                continue
+            lower_terms = generate_standard_repn(con.lower, compute_values=False) \
+                                                    if not con.lower is None else None
+            upper_terms = generate_standard_repn(con.upper, compute_values=False) \
+                                                    if not con.upper is None else None
+            assert(lower_terms is None or lower_terms.is_constant())
+            assert(upper_terms is None or upper_terms.is_constant())
+            if con.equality:
+                k = [add_dual(con, '', 0, lower_terms.constant - body_terms.constant)]
+            elif lower_terms is None:
+                k = [add_dual(con, '', -1, upper_terms.constant - body_terms.constant)]
+            elif upper_terms is None:
+                k = [add_dual(con, '', 1, lower_terms.constant - body_terms.constant)]
+            else:
+                k = [add_dual(con, '_lb_', 1, lower_terms.constant - body_terms.constant),
+                     add_dual(con, '_ub_', -1, upper_terms.constant - body_terms.constant)]
+            for var, coef in zip(body_terms.linear_vars, body_terms.linear_coefs):
+                j = var_column(var)
+                for k_ in k:
+                    rows.append(k_)
+                    cols.append(j)
+                    coefs.append(coef)
+    #
+    # Collect bound constraints.  Bounds that are zero define the sense
+    # of the dual constraint, and other bounds define dual variables.
+    #
+    c_sense = []
+    for j, var in enumerate(vars):
+        lb, ub = var.bounds
+        if lb == 0:
+            c_sense.append('l')
+            lb = None
+        elif ub == 0:
+            c_sense.append('g')
+            ub = None
+        else:
+            c_sense.append('e')
+        if not ub is None:
+            rows.append(add_dual(var, '_upper_', -1, ub))
+            cols.append(j)
+            coefs.append(1.0)
+        if not lb is None:
+            rows.append(add_dual(var, '_lower_', 1, lb))
+            cols.append(j)
+            coefs.append(1.0)
+    #
+    # Transpose the constraint matrix
+    #
+    cols = np.array(cols, dtype=np.int64)
+    order = np.argsort(cols, kind='stable')
+    indptr = np.searchsorted(cols[order], np.arange(len(vars)+1))
+    AT = Bunch(indptr=indptr, rows=[rows[p] for p in order], coefs=[coefs[p] for p in order])
+    #
+    # Unfix the variables that were fixed
+    #
+    for vdata in fixed_modelvars.values():
+        vdata.fixed = False
+
+    return Bunch(vars=vars, duals=duals, b=b, v_domain=v_domain, c=c, c_sense=c_sense,
+                 d_sense=d_sense, obj_offset=obj_offset, AT=AT)
+
+
+def _linear_form(expr):
+    """
+    Returns a picklable representation of a coefficient.  Constant
+    coefficients are returned unchanged, and coefficients that are
+    linear expressions of fixed variables are returned as a tuple
+    (constant, var_ids, coefs).  Otherwise, this returns None.
+    """
+    if expr.__class__ in native_numeric_types:
+        return expr
+    fixed = [var for var in identify_variables(expr, include_fixed=True) if var.fixed]
+    for var in fixed:
+        var.fixed = False
+    try:
+        terms = generate_standard_repn(expr, compute_values=False, quadratic=False)
+    finally:
+        for var in fixed:
+            var.fixed = True
+    if not terms.is_linear() or \
+       not terms.constant.__class__ in native_numeric_types or \
+       not all(coef.__class__ in native_numeric_types for coef in terms.linear_coefs):
+        return None
+    if len(terms.linear_vars) == 0:
+        return terms.constant
+    return (terms.constant, [id(var) for var in terms.linear_vars], list(terms.linear_coefs))
+
+
+def encode_dual_matrix_representation(repn):
+    """
+    Returns a picklable copy of the data returned by
+    collect_dual_matrix_representation(), where Pyomo components are
+    replaced by their ids.  This is used to collect the data in a forked
+    process, where the component ids are the same as in the parent
+    process.
+
+    This returns None if a coefficient is a nonlinear expression of
+    the fixed variables, or if it depends on mutable parameters.
+    """
+    forms = {}
+    for name, values in (('b', repn.b), ('c', repn.c), ('coefs', repn.AT.coefs), ('obj_offset', [repn.obj_offset])):
+        forms[name] = [_linear_form(value) for value in values]
+        if any(form is None for form in forms[name]):
+            return None
+    return Bunch(vars=[id(var) for var in repn.vars],
+                 duals=[(id(component), suffix) for component, suffix in repn.duals],
+                 b=forms['b'],
+                 v_domain=repn.v_domain,
+                 c=forms['c'],
+                 c_sense=repn.c_sense,
+                 d_sense=repn.d_sense,
+                 obj_offset=forms['obj_offset'][0],
+                 AT=Bunch(indptr=repn.AT.indptr, rows=repn.AT.rows, coefs=forms['coefs']))
+
+
+def decode_dual_matrix_representation(data, components):
+    """
+    Returns the data created by encode_dual_matrix_representation(),
+    after mapping the component ids with the components dictionary.
+    """
+    def expr(form):
+        if form.__class__ is tuple:
+            constant, ids, coefs = form
+            return LinearExpression(constant=constant, linear_coefs=coefs,
+                                    linear_vars=[components[i] for i in ids])
+        return form
+
+    return Bunch(vars=[components[i] for i in data.vars],
+                 duals=[(components[i], suffix) for i, suffix in data.duals],
+                 b=[expr(form) for form in data.b],
+                 v_domain=data.v_domain,
+                 c=[expr(form) for form in data.c],
+                 c_sense=data.c_sense,
+                 d_sense=data.d_sense,
+                 obj_offset=expr(data.obj_offset),
+                 AT=Bunch(indptr=data.AT.indptr, rows=data.AT.rows,
+                          coefs=[expr(form) for form in data.AT.coefs]))
+
+
+def _create_indexed_dual(block, dual, fixed_modelvars, repn=None):
+    """
+    Add the dual variables (v), dual constraints (c) and the dual
+    objective (o) to the dual block, using integer indices.  The
+    dual data is collected from the block unless repn is specified.
+    """
+    if repn is None:
+        repn = collect_dual_matrix_representation(block, fixed_modelvars)
+    AT = repn.AT
+    domains = {1:NonNegativeReals, -1:NonPositiveReals, 0:Reals}
+
+    dual.v = Var(range(len(repn.duals)), domain=lambda b, k: domains[repn.v_domain[k]])
+    v = list(dual.v.values())
+
+    def dot(coefs, vars):
+        # Use a linear expression if the coefficients are constants
+        if all(coef.__class__ in native_numeric_types for coef in coefs):
+            return LinearExpression(constant=0, linear_coefs=coefs, linear_vars=vars)
+        return quicksum((coef*var for coef, var in zip(coefs, vars)), linear=False)
+    #
+    # The dualization of a maximization problem is handled by simply negating the
+    # objective and left-hand side coefficients while keeping the dual sense.
+    #
+    if repn.d_sense == minimize:
+        dual.o = Objective(expr=repn.obj_offset + dot([-b_k for b_k in repn.b], v), sense=repn.d_sense)
+        rhs_multiplier = -1
+    else:
+        dual.o = Objective(expr=repn.obj_offset + dot(repn.b, v), sense=repn.d_sense)
+        rhs_multiplier = 1
+
+    def c_rule(b, j):
+        start, stop = AT.indptr[j], AT.indptr[j+1]
+        if start == stop:
+            # The primal variable only appears in the objective
+            return Constraint.Skip
+        expr = dot(AT.coefs[start:stop], [v[k] for k in AT.rows[start:stop]])
+        rhsval = rhs_multiplier*repn.c[j]
+        if repn.c_sense[j] == 'e':
+            return expr - rhsval == 0
+        elif repn.c_sense[j] == 'l':
+            return expr - rhsval <= 0
+        return expr - rhsval >= 0
+    dual.c = Constraint(range(len(repn.vars)), rule=c_rule)
+
+    dual.name_map = DualNameMap(block, repn.vars, repn.duals)
+    return dual
+
+
+def collect_fixed_modelvars(block, fixed=None, unfixed=None):
+    """
+    Returns a map from variable ids to the VarData objects in the
+    active objectives and constraints of the block that are fixed
+    during dualization.  The fixed and unfixed arguments are
+    described in create_linear_dual_from().
     """
     #
     # Collect vardata that needs to be fixed
@@ -391,9 +710,48 @@ def create_linear_dual_from(block, fixed=None, unfixed=None):
                 if id_ in modelvars:
                     fixed_modelvars[id_] = modelvars[id_]
 
-    A, b_coef, obj_constant, c_rhs, c_sense, d_sense, v_domain =\
-                    collect_dual_representation(block, fixed_modelvars)
+    return fixed_modelvars
+
+
+def create_linear_dual_from(block, fixed=None, unfixed=None, naming='names', repn=None):
+    """
+    Construct a block that represents the dual of the given block.
+
+    If naming is 'names', then the resulting block contains variables and
+    constraints whose names are the dual names of the primal block.  Note
+    that this involves a many string operations.
 
+    If naming is 'indexed', then the resulting block contains indexed
+    dual variables (v) and dual constraints (c), which are generated from
+    the transpose of the primal constraint matrix.  This is much faster
+    for large blocks.  The name_map attribute of the block is a
+    DualNameMap object, which generates the names of the dual variables and
+    constraints when they are requested.
+
+    Note that the dualization of a maximization problem is performed by
+    negating objective and right-hand side coefficients after dualizing
+    the corresponding minimization problem.  This suggestion is made
+    by Dimitri Bertsimas and John Tsitsiklis in section 4.2 page 143 of
+    "Introduction to Linear Optimization"
+
+    Arguments:
+        block: A Pyomo block or model
+        unfixed: An iterable object with Variable and VarData values that are 
+                not fixed variables.  All other variables are assumed to be fixed.
+        fixed: An iterable object with Variable and VarData values that are fixed.  
+                All other variables are assumed not fixed.
+        naming: The naming of the dual variables and constraints ('names' or 'indexed').
+        repn: The data returned by collect_dual_matrix_representation(), which
+                was collected previously.  This is only used when naming
+                is 'indexed'.
+
+    Returns:
+        If the block is a model object, then this returns a ConcreteModel.
+        Otherwise, it returns a Block.
+    """
+    assert (naming in ('names', 'indexed')), "Unknown naming of dual components: %s" % str(naming)
+    assert (repn is None or naming == 'indexed'), "Precomputed dual data can only be used with indexed naming"
+    fixed_modelvars = collect_fixed_modelvars(block, fixed=fixed, unfixed=unfixed) if repn is None else {}
     #
     # Construct the block
     #
@@ -402,6 +760,11 @@ def create_linear_dual_from(block, fixed=None, unfixed=None):
     else:
         dual = Block()
     dual.construct()
+    if naming == 'indexed':
+        return _create_indexed_dual(block, dual, fixed_modelvars, repn=repn)
+
+    A, b_coef, obj_constant, c_rhs, c_sense, d_sense, v_domain =\
+                    collect_dual_representation(block, fixed_modelvars)
     _vars = {}
 
     # Return variable object from name and index (if applicable)
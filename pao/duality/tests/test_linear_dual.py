@@ -265,6 +265,58 @@ class Reformulate(unittest.TestCase, CommonTests):
 
 
 
+class Indexed(unittest.TestCase):
+
+    def _create(self, name):
+        return pyutilib.misc.import_file(join(exdir, name), clear_cache=True).model
+
+    def test_t5(self):
+        from pyomo.environ import Var, Constraint, value, minimize
+        from pao.duality.collect import create_linear_dual_from
+        model = self._create('t5.py')
+        dual = create_linear_dual_from(model, naming='indexed')
+        self.assertEqual(len(dual.v), 4)
+        self.assertEqual(len(dual.c), 2)
+        self.assertEqual(dual.o.sense, minimize)
+        self.assertEqual(dual.name_map.dual_variables(), ['c1', 'c2', 'c3', 'c4'])
+        self.assertEqual(dual.name_map.dual_constraints(), ['x1', 'x2'])
+        # The dual of the maximization problem is expressed with
+        # nonpositive dual variables
+        self.assertEqual([v.ub for v in dual.v.values()], [0]*4)
+        for k, v in enumerate(dual.v.values()):
+            v.value = -(k+1)
+        self.assertAlmostEqual(value(dual.o), 1000)
+        self.assertAlmostEqual(value(dual.c[0].body), -4.44 - 12 - 12 + 3)
+        self.assertEqual(value(dual.c[0].upper), 0)
+
+    def test_names(self):
+        # The named and indexed duals have the same dual variables and constraints
+        from pyomo.environ import Var, Constraint
+        from pao.duality.collect import create_linear_dual_from
+        for name, kwds in (('t1.py', {}), ('t7.py', {'fixed':['y']}), ('t8.py', {'fixed':['u']})):
+            model = self._create(name)
+            fixed = [getattr(model, v) for v in kwds.get('fixed', [])]
+            named = create_linear_dual_from(model, fixed=fixed)
+            indexed = create_linear_dual_from(model, fixed=fixed, naming='indexed')
+            names = indexed.name_map.dual_variables()
+            self.assertEqual(len(names), len(list(named.component_objects(Var))))
+            for name in names:
+                self.assertEqual(named.component(name).ctype, Var)
+            names = indexed.name_map.dual_constraints()
+            self.assertEqual(len(names), len(list(named.component_objects(Constraint))))
+            for name in names:
+                self.assertEqual(named.component(name).ctype, Constraint)
+
+    def test_errors(self):
+        from pao.duality.collect import create_linear_dual_from
+        with self.assertRaises(RuntimeError):
+            create_linear_dual_from(self._create('err1.py'), naming='indexed')
+        with self.assertRaises(RuntimeError):
+            create_linear_dual_from(self._create('err2.py'), naming='indexed')
+        with self.assertRaises(AssertionError):
+            create_linear_dual_from(self._create('t1.py'), naming='unknown')
+
+
 class Solver(unittest.TestCase):
 
     @classmethod
@@ -1,7 +1,12 @@
 from .repn import LinearMultilevelProblem, QuadraticMultilevelProblem
 from . import convert_repn
 from . import examples
+from . import generators
 from .convert_repn import linearize_bilinear_terms
+from .cache import SolveCache, problem_hash
+from .highpoint import create_highpoint_relaxation, solve_highpoint_relaxation
+from .decompose import lower_level_components, decompose_lower_levels, copy_decomposed_solution
+from .bigm import compute_bigm
 from .solver import Solver
 #from . import pyomo_solvers
 from . import solvers
@@ -0,0 +1,303 @@
+#
+# Big-M values for the complementarity conditions in the KKT
+# reformulation of a linear bilevel problem, which are computed by
+# solving bounding LPs.
+#
+import os
+import time
+import concurrent.futures
+import numpy as np
+import scipy.sparse
+from munch import Munch
+
+from .repn import LinearMultilevelProblem
+from .highpoint import create_highpoint_relaxation
+
+
+class _BoundingLP(object):
+    """
+    Maximize linear objectives over the region
+
+        cl <= A x <= cu
+        lb <=   x <= ub
+
+    The constraint data is converted for scipy.optimize.linprog once,
+    and then it is shared by all of the LPs.
+    """
+
+    def __init__(self, A, cl, cu, lb, ub):
+        A = scipy.sparse.csr_matrix(A, dtype=np.float64)
+        cl = np.asarray(cl, dtype=np.float64)
+        cu = np.asarray(cu, dtype=np.float64)
+        eq = cl == cu
+        upper = ~eq & np.isfinite(cu)
+        lower = ~eq & np.isfinite(cl)
+        A_ub = scipy.sparse.vstack([A[upper], -A[lower]]).tocsr()
+        self.A_ub = A_ub if A_ub.shape[0] > 0 else None
+        self.b_ub = np.concatenate((cu[upper], -cl[lower])) if A_ub.shape[0] > 0 else None
+        self.A_eq = A[eq] if np.any(eq) else None
+        self.b_eq = cl[eq] if np.any(eq) else None
+        self.bounds = list(zip(lb, ub))
+
+    def maximize(self, c, time_limit=None):
+        """
+        Returns the maximum of c' x, which is -inf if the region is
+        empty and inf if the LP is unbounded or if the solver fails.
+        """
+        from scipy.optimize import linprog
+
+        options = {}
+        if time_limit is not None:
+            options['time_limit'] = max(time_limit, 0)
+        res = linprog(-c, A_ub=self.A_ub, b_ub=self.b_ub, A_eq=self.A_eq, b_eq=self.b_eq,
+                      bounds=self.bounds, method='highs', options=options)
+        if res.status == 0:
+            return -res.fun
+        if res.status == 2:
+            return np.NINF
+        return np.PINF
+
+
+def _dual_region(L, interior_l, interior_u):
+    #
+    # The reduced costs of the lower-level variables are r = c_L + A_L' lam.
+    # At a KKT point, the multipliers of the bounds can be chosen as
+    # nu = max(r,0) and mu = max(-r,0), so r >= 0 if a variable only has
+    # a lower bound, r <= 0 if it only has an upper bound, and r = 0 if
+    # it does not have finite bounds.  If a bound is never active, then
+    # its multiplier is zero and the sign of r is restricted.
+    #
+    nx = len(L.x)
+    cL = np.zeros(nx) if L.c[L] is None else np.asarray(L.c[L], dtype=np.float64)
+    lower = np.isfinite(L.x.lower_bounds)
+    upper = np.isfinite(L.x.upper_bounds)
+    rl = np.full(nx, np.NINF)
+    ru = np.full(nx, np.PINF)
+    rl[(~upper) | interior_u] = 0
+    ru[(~lower) | interior_l] = 0
+    if L.A[L] is None or L.b.size == 0:
+        return cL, None, None
+    G = scipy.sparse.csr_matrix(L.A[L], dtype=np.float64).transpose().tocsr()
+    m = G.shape[1]
+    return cL, G, _BoundingLP(G, rl-cL, ru-cL, np.full(m, np.NINF), np.full(m, np.PINF))
+
+
+def _solve_tasks(tasks, max_workers, start_time, time_limit):
+    #
+    # Each task maximizes c' x + d over an LP, and stores the value in
+    # values[i]
+    #
+    def solve(task):
+        lp, c, d, values, i = task
+        remaining = None if time_limit is None else time_limit - (time.time() - start_time)
+        if remaining is not None and remaining <= 0:
+            values[i] = np.PINF
+        else:
+            values[i] = lp.maximize(c, time_limit=remaining) + d
+
+    if max_workers == 1 or len(tasks) <= 1:
+        for task in tasks:
+            solve(task)
+    else:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for ans in executor.map(solve, tasks):
+                pass
+
+
+def compute_bigm(repn, default=np.inf, time_limit=None, max_workers=None, margin=1e-6):
+    """
+    Compute a big-M value for each complementarity condition in the KKT
+    reformulation of a linear bilevel problem.
+
+    The repn is a bilevel problem whose lower levels have equality
+    constraints, like the problems created by
+    :func:`pao.mpr.convert_repn.convert_to_standard_form` with
+    inequalities=False.  For a lower-level variable x with a finite
+    lower bound lb, the slack x - lb is bounded by maximizing x over the
+    LP relaxation of the high-point relaxation, and its multiplier nu is
+    bounded by maximizing the reduced cost of x over the polyhedron of
+    the dual multipliers of the lower level.  If the minimum of the
+    slack is greater than margin, then the bound is never active and
+    the multiplier is zero.  Finite upper bounds are treated in the same
+    way.  Every bilevel-feasible point is feasible for the primal LPs,
+    and its multipliers can be chosen in the dual polyhedron, so a value
+    that is computed by an LP is a valid big-M value.
+
+    The LPs are solved in-process with the HiGHS solver in
+    scipy.optimize.linprog, which releases the GIL, so they are solved
+    in parallel by a pool of max_workers threads.  If an LP is
+    unbounded, or if the time limit expires, then the default value is
+    used, and this value is not known to be valid.  The dual polyhedron
+    is often unbounded, and in general valid big-M values for the
+    multipliers cannot be computed by solving LPs.  Computed values are
+    increased by a relative margin to allow for the tolerances of the
+    solver.
+
+    Returns
+    -------
+    Munch
+        For each lower level (levels), the indices of the variables with
+        finite lower (jl) and upper (ju) bounds, and the big-M values for
+        the slacks of these bounds (xl and xu) and for their multipliers
+        (nu and mu).  Also, the number of LPs (lps), the number of values
+        that are set to the default (defaults), a flag that is True if
+        all values were computed by LPs (valid), and the time spent
+        solving the LPs (time).
+    """
+    assert (type(repn) is LinearMultilevelProblem), "Big-M values can only be computed for a LinearMultilevelProblem"
+    start_time = time.time()
+    U = repn.U
+    for L in U.LL:
+        assert (len(L.LL) == 0), "Big-M values can only be computed for bilevel problems"
+        assert (not L.inequalities), "Big-M values can only be computed for lower levels with equality constraints"
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    #
+    # Bound the slacks of the finite bounds above and below over the LP
+    # relaxation of the high-point relaxation
+    #
+    hpr = create_highpoint_relaxation(repn)
+    primal = _BoundingLP(hpr.A, hpr.cl, hpr.cu, hpr.lb, hpr.ub)
+    n = hpr.c.size
+    tasks = []
+    levels = []
+    for L in U.LL:
+        jl = np.flatnonzero(np.isfinite(L.x.lower_bounds))
+        ju = np.flatnonzero(np.isfinite(L.x.upper_bounds))
+        K = Munch(id=L.id, jl=jl, ju=ju, xl=np.zeros(jl.size), xu=np.zeros(ju.size),
+                  nu=np.zeros(jl.size), mu=np.zeros(ju.size))
+        K.xl_min = np.zeros(jl.size)
+        K.xu_min = np.zeros(ju.size)
+        levels.append(K)
+        for k, j in enumerate(jl):
+            c = np.zeros(n)
+            c[hpr.offset[L.id]+j] = 1
+            tasks.append((primal, c, -L.x.lower_bounds[j], K.xl, k))
+            tasks.append((primal, -c, L.x.lower_bounds[j], K.xl_min, k))
+        for k, j in enumerate(ju):
+            c = np.zeros(n)
+            c[hpr.offset[L.id]+j] = -1
+            tasks.append((primal, c, L.x.upper_bounds[j], K.xu, k))
+            tasks.append((primal, -c, -L.x.upper_bounds[j], K.xu_min, k))
+    _solve_tasks(tasks, max_workers, start_time, time_limit)
+    lps = len(tasks)
+    #
+    # Bound the multipliers of the finite bounds over the dual polyhedron
+    # of each lower level.  The minimum slacks are the negated maxima.
+    #
+    tasks = []
+    for L, K in zip(U.LL, levels):
+        nx = len(L.x)
+        interior_l = np.zeros(nx, dtype=bool)
+        interior_u = np.zeros(nx, dtype=bool)
+        interior_l[K.jl] = -K.xl_min > margin
+        interior_u[K.ju] = -K.xu_min > margin
+        cL, G, dual = _dual_region(L, interior_l, interior_u)
+        for k, j in enumerate(K.jl):
+            if interior_l[j]:
+                K.nu[k] = 0
+            elif dual is None:
+                K.nu[k] = max(cL[j], 0)
+            else:
+                tasks.append((dual, G[j].toarray().ravel(), cL[j], K.nu, k))
+        for k, j in enumerate(K.ju):
+            if interior_u[j]:
+                K.mu[k] = 0
+            elif dual is None:
+                K.mu[k] = max(-cL[j], 0)
+            else:
+                tasks.append((dual, -G[j].toarray().ravel(), -cL[j], K.mu, k))
+        del K.xl_min
+        del K.xu_min
+    _solve_tasks(tasks, max_workers, start_time, time_limit)
+    lps += len(tasks)
+    #
+    # If an LP is infeasible, then the bilevel problem is infeasible and
+    # any big-M value is valid
+    #
+    defaults = 0
+    for K in levels:
+        for values in (K.xl, K.xu, K.nu, K.mu):
+            unbounded = np.isposinf(values)
+            defaults += int(np.sum(unbounded))
+            values[np.isneginf(values)] = 0
+            finite = ~unbounded
+            values[finite] = np.maximum(values[finite], 0)
+            values[finite] += margin*np.maximum(values[finite], 1)
+            values[unbounded] = default
+
+    return Munch(levels=levels, lps=lps, defaults=defaults, valid=defaults == 0, time=time.time() - start_time)
+
+
+def uniform_bigm(repn, bigM):
+    """
+    Create big-M values in the form returned by :func:`compute_bigm`,
+    where every slack and multiplier has the value bigM.
+    """
+    assert (type(repn) is LinearMultilevelProblem), "Big-M values can only be created for a LinearMultilevelProblem"
+    levels = []
+    defaults = 0
+    for L in repn.U.LL:
+        jl = np.flatnonzero(np.isfinite(L.x.lower_bounds))
+        ju = np.flatnonzero(np.isfinite(L.x.upper_bounds))
+        levels.append(Munch(id=L.id, jl=jl, ju=ju,
+                            xl=np.full(jl.size, float(bigM)), xu=np.full(ju.size, float(bigM)),
+                            nu=np.full(jl.size, float(bigM)), mu=np.full(ju.size, float(bigM))))
+        defaults += 2*(jl.size + ju.size)
+    return Munch(levels=levels, lps=0, defaults=defaults, valid=False, time=0)
+
+
+def _active(bigM, values, tol):
+    if values is None:
+        return bigM > 0
+    v = np.asarray(values, dtype=np.float64)
+    return (bigM > 0) & (v > tol) & (v >= bigM - tol*np.maximum(bigM, 1))
+
+
+def active_bigm(bounds, values=None, tol=1e-6):
+    """
+    Count the big-M values that are active in a solution of the big-M
+    reformulation.
+
+    The values are a list with a Munch for each lower level, which
+    contains the values of the slacks (xl and xu) and the multipliers
+    (nu and mu) in the same order as the big-M values in bounds.  A
+    big-M value is active if the slack or multiplier is positive and
+    within a relative tolerance of the big-M value.  If values is None,
+    e.g. when the reformulation is infeasible, then all positive big-M
+    values are active.
+
+    Returns
+    -------
+    int
+        The number of active big-M values.
+    """
+    count = 0
+    for i, K in enumerate(bounds.levels):
+        for name in ('xl', 'xu', 'nu', 'mu'):
+            count += int(np.sum(_active(K[name], None if values is None else values[i][name], tol)))
+    return count
+
+
+def update_bigm(bounds, values=None, growth=10, tol=1e-6):
+    """
+    Enlarge the big-M values that are active in a solution of the big-M
+    reformulation.
+
+    The active big-M values are defined as in :func:`active_bigm`, and
+    they are multiplied by growth.
+
+    Returns
+    -------
+    int
+        The number of big-M values that are enlarged.
+    """
+    count = 0
+    for i, K in enumerate(bounds.levels):
+        for name in ('xl', 'xu', 'nu', 'mu'):
+            bigM = K[name]
+            active = _active(bigM, None if values is None else values[i][name], tol)
+            bigM[active] *= growth
+            count += int(np.sum(active))
+    return count
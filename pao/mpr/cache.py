@@ -0,0 +1,206 @@
+#
+# A content hash for LinearMultilevelProblem objects, and an on-disk
+# cache of solver results that is keyed by this hash.
+#
+import os
+import pickle
+import hashlib
+import tempfile
+import numpy as np
+from scipy.sparse import csr_matrix
+from munch import Munch
+
+import pao.common
+from .repn import LinearMultilevelProblem
+
+
+def _update_array(h, x):
+    if x is None:
+        h.update(b'N')
+        return
+    x = np.ascontiguousarray(x, dtype=np.float64)
+    h.update(str(x.shape).encode())
+    h.update(memoryview(x).cast('B'))
+
+def _update_matrix(h, A):
+    if A is None:
+        h.update(b'N')
+        return
+    #
+    # Hash a canonical CSR representation, so the hash does not
+    # depend on the sparse format or the order of the nonzeros.
+    #
+    A = csr_matrix(A, dtype=np.float64, copy=True)
+    A.sum_duplicates()
+    A.eliminate_zeros()
+    A.sort_indices()
+    h.update(str(A.shape).encode())
+    for x in (A.indptr, A.indices):
+        h.update(memoryview(np.ascontiguousarray(x, dtype=np.int64)).cast('B'))
+    h.update(memoryview(np.ascontiguousarray(A.data)).cast('B'))
+
+def _canonical(value):
+    #
+    # A string representation of a configuration value that does not
+    # depend on the insertion order of dictionaries or the order of sets
+    #
+    if hasattr(value, 'items'):
+        return "{%s}" % ", ".join("%r: %s" % (str(k), _canonical(v)) for k,v in sorted(value.items(), key=lambda item: str(item[0])))
+    if isinstance(value, (list, tuple)):
+        return "[%s]" % ", ".join(_canonical(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return "{%s}" % ", ".join(sorted(_canonical(v) for v in value))
+    return repr(value)
+
+
+def problem_hash(lmp, config=None):
+    """
+    Compute a content hash of a linear multilevel problem.
+
+    The hash is computed from the level structure and the numeric data
+    in each level.  Level ids are replaced by the position of the level
+    in a depth-first traversal, so two problems with the same data have
+    the same hash.  Solver names and options are also included in the
+    hash if they are specified.
+
+    Parameters
+    ----------
+    lmp: LinearMultilevelProblem
+        The problem that is hashed.
+    config: dict
+        A dictionary of solver configuration options.  (default is None)
+
+    Returns
+    -------
+    str
+        A hexadecimal digest.
+    """
+    assert (type(lmp) is LinearMultilevelProblem), "Can only hash a LinearMultilevelProblem"
+    h = hashlib.blake2b(digest_size=20)
+    levels = list(lmp.levels())
+    position = {L.id:i for i,L in enumerate(levels)}
+    for L in levels:
+        h.update(("L %d %d %d %d %d %d %r" % (len(L.LL), L.x.nxR, L.x.nxZ, L.x.nxB, L.minimize, L.inequalities, L.d)).encode())
+        _update_array(h, L.x.lower_bounds)
+        _update_array(h, L.x.upper_bounds)
+        _update_array(h, L.b)
+        if L.bl is not None:
+            h.update(b'bl')
+            _update_array(h, L.bl)
+        for i in sorted(position[j] for j in L.c):
+            h.update(b'c%d' % i)
+            _update_array(h, L.c[levels[i]])
+        for i in sorted(position[j] for j in L.A):
+            h.update(b'A%d' % i)
+            _update_matrix(h, L.A[levels[i]])
+    if config is not None:
+        h.update(_canonical(config).encode())
+    return h.hexdigest()
+
+
+class SolveCache(object):
+    """
+    An on-disk cache of the results and solutions generated by PAO solvers.
+
+    Each entry is stored in a separate file in the cache directory.
+    When the total size of the entries exceeds ``max_size`` bytes, the
+    least recently used entries are deleted.
+    """
+
+    def __init__(self, directory, max_size=100*1024*1024):
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+    def _filename(self, key):
+        return os.path.join(self.directory, key+".pkl")
+
+    def get(self, key):
+        """
+        Returns the cache entry for the given key, or None if the key
+        is not in the cache.
+        """
+        fname = self._filename(key)
+        try:
+            with open(fname, 'rb') as INPUT:
+                entry = pickle.load(INPUT)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        # Mark this entry as recently used
+        try:
+            os.utime(fname)
+        except OSError:                         # pragma: no cover
+            pass
+        return entry
+
+    def put(self, key, entry):
+        """
+        Store an entry in the cache, and evict old entries if the cache
+        is too large.
+        """
+        # Write a temporary file and rename it, so readers never see a
+        # partial entry.
+        fd, tmpname = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, 'wb') as OUTPUT:
+            pickle.dump(entry, OUTPUT, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmpname, self._filename(key))
+        self.evict()
+
+    def evict(self):
+        """
+        Delete the least recently used entries until the cache size is
+        less than the maximum size.
+        """
+        entries = []
+        for fname in os.listdir(self.directory):
+            if not fname.endswith(".pkl"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, fname))
+            except OSError:                     # pragma: no cover
+                continue
+            entries.append((stat.st_mtime, stat.st_size, fname))
+        total = sum(size for _,size,_ in entries)
+        for _, size, fname in sorted(entries):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(os.path.join(self.directory, fname))
+            except OSError:                     # pragma: no cover
+                pass
+            total -= size
+
+    def clear(self):
+        """
+        Delete all entries in the cache.
+        """
+        for fname in os.listdir(self.directory):
+            if fname.endswith(".pkl"):
+                os.remove(os.path.join(self.directory, fname))
+
+    def __len__(self):
+        return sum(1 for fname in os.listdir(self.directory) if fname.endswith(".pkl"))
+
+
+def cache_entry(lmp, results):
+    """
+    Create a cache entry from the solver results and the solution
+    values in the problem.
+    """
+    return Munch(solver=dict(results.solver),
+                 problem=dict(results.problem),
+                 solution=[list(L.x.values) for L in lmp.levels()])
+
+def load_cache_entry(lmp, entry, load_solutions=True):
+    """
+    Create a results object from a cache entry, and load the solution
+    values into the problem.
+    """
+    results = pao.common.Results()
+    results.solver.update(entry.solver)
+    results.problem.update(entry.problem)
+    results.solver.cache_hit = True
+    if load_solutions:
+        for L, values in zip(lmp.levels(), entry.solution):
+            L.x.values = list(values)
+    return results
@@ -1,5 +1,5 @@
 import copy
-from scipy.sparse import coo_matrix, dok_matrix, csc_matrix, vstack
+from scipy.sparse import coo_matrix, dok_matrix, csc_matrix, csr_matrix, diags, vstack
 import numpy as np
 from .repn import LinearMultilevelProblem, QuadraticMultilevelProblem, LinearLevelRepn
 from .soln_manager import LMP_SolutionManager, SolutionManager_Linearized_Bilinear_Terms
@@ -485,7 +485,76 @@ def add_ineq_constraints(mat):
     return vstack([mat, newmat])
     
 
+def _select_rows(A, rows, sign):
+    """
+    Return a matrix with the specified rows of A, scaled by sign.
+    """
+    if A is None:
+        return None
+    return csr_matrix(diags(sign) @ csr_matrix(A)[rows])
+
+
+def convert_row_bounds(L, inequalities):
+    """
+    Expand the constraints bl <= A x <= b in level L into
+    less-than-or-equal inequalities or equalities.
+
+    Equality rows (bl == b) generate two inequalities, or one equality.
+    Other rows generate an inequality for each finite bound.  If
+    inequalities is False, then these inequalities are converted to
+    equalities with slack variables that are added to the real variables
+    in L.  The order of the rows is preserved.
+    """
+    bl = L.bl
+    b = L.b
+    equality = bl == b
+    has_lb = np.isfinite(bl) & ~equality
+    has_ub = np.isfinite(b) & ~equality
+    #
+    # The number of rows generated by each constraint.  The rows for
+    # lower bounds precede the rows for upper bounds, and the negated
+    # row of an equality follows the original row.
+    #
+    count = has_lb.astype(np.int64) + has_ub.astype(np.int64)
+    count[equality] = 2 if inequalities else 1
+    rows = np.repeat(np.arange(b.size), count)
+    first = np.ones(rows.size, dtype=bool)
+    first[1:] = rows[1:] != rows[:-1]
+    sign = np.where(np.where(first, has_lb[rows], equality[rows]), -1.0, 1.0)
+    rhs = np.where(sign < 0, -bl[rows], b[rows])
+    for X in L.levels():
+        A = L.A[X]
+        if A is not None:
+            L.A[X] = _select_rows(A, rows, sign)
+    if type(L) is not LinearLevelRepn:
+        for X,Y in L.Q:
+            L.Q[X,Y] = [None if L.Q[X,Y][i] is None else sign[k]*L.Q[X,Y][i] for k,i in enumerate(rows)]
+    L.b = rhs
+    L.bl = None
+    L.inequalities = inequalities
+    if not inequalities:
+        #
+        # Add slack variables to the rows generated from inequalities
+        #
+        slack = np.flatnonzero(~equality[rows])
+        if slack.size > 0:
+            nxR = L.x.nxR
+            L.resize( nxR=nxR + slack.size, nxZ=L.x.nxZ, nxB=L.x.nxB, lb=0 )
+            S = coo_matrix((np.ones(slack.size), (slack, nxR+np.arange(slack.size))), shape=(rows.size, len(L.x)))
+            if L.A[L] is None:
+                L.A[L] = S.tocsr()
+            else:
+                L.A[L] = (L.A[L] + S).tocsr()
+
+
 def convert_constraints(ans, inequalities):
+    #
+    # Expand constraints with lower and upper bounds
+    #
+    for L in ans.levels():
+        if L.bl is not None:
+            convert_row_bounds(L, inequalities)
+
     if inequalities:
         #
         # Creating inequality constraints from equalities by 
@@ -580,7 +649,7 @@ def convert_binaries_to_integers(mpr, nonnegative=True):
                 A.resize( [len(X.b), len(L.x)] )
 
 
-def convert_to_standard_form(M, inequalities=False):
+def convert_to_standard_form(M, inequalities=False, nonnegative=True):
     """
     Normalize the LinearMultilevelProblem into a standard form.
 
@@ -598,6 +667,10 @@ def convert_to_standard_form(M, inequalities=False):
     inequalities : bool, Default: False
         If this is True, then the normalized form has inequality constraints.  Otherwise, the normalized
         form has equality constraints.
+    nonnegative : bool, Default: True
+        If this is False, then the variables and their bounds are not
+        transformed.  This is used by solvers that represent the lower
+        and upper bounds of variables in their reformulations.
 
     Returns
     -------
@@ -622,7 +695,10 @@ def convert_to_standard_form(M, inequalities=False):
     #
     # Normalize variables
     #
-    changes = convert_to_nonnegative_variables(ans, inequalities)
+    if nonnegative:
+        changes = convert_to_nonnegative_variables(ans, inequalities)
+    else:
+        changes = {L.id:VChanges(L.x.nxR, L.x.nxZ) for L in ans.levels()}
     #
     # Resize matrices
     #
@@ -672,7 +748,7 @@ def linearize_bilinear_terms(M, bigM):
     """
     assert (type(M) is QuadraticMultilevelProblem), "Expected quadratic multilevel problem"
     for L in M.levels():
-        assert (L.inequalities), "The function linearize_bilinear_terms can only handle QMPs with inequalities"
+        assert (L.inequalities and L.bl is None), "The function linearize_bilinear_terms can only handle QMPs with inequalities"
 
     #
     # Explicit clone logic, since we are converting a Quadratic to a Linear representation
@@ -0,0 +1,153 @@
+#
+# Detect lower levels whose constraints separate into independent
+# blocks, and split them into independent followers.
+#
+import numpy as np
+from scipy.sparse import coo_matrix, csr_matrix
+from munch import Munch
+
+from .repn import LinearMultilevelProblem
+
+
+def lower_level_components(L):
+    """
+    Compute the independent blocks of the constraints of a lower level.
+
+    The blocks are the connected components of the bipartite graph
+    whose nodes are the rows and columns of L.A[L], with an edge for
+    each nonzero.  Columns that do not appear in a constraint form
+    their own block.  Rows without a lower-level variable only constrain
+    the upper-level variables, and they are included in the first
+    block.
+
+    Returns
+    -------
+    list
+        A list of (rows, cols) pairs of sorted index arrays, ordered by
+        the first column in each block.
+    """
+    from scipy.sparse.csgraph import connected_components
+
+    nrows = L.b.size if L.b is not None else 0
+    ncols = len(L.x)
+    if ncols == 0:
+        return [(np.arange(nrows), np.arange(0))]
+    A = L.A[L]
+    if A is None or nrows == 0:
+        A = coo_matrix((nrows, ncols))
+    else:
+        A = coo_matrix(A)
+    #
+    # Row i is node i, and column j is node nrows+j
+    #
+    n = nrows + ncols
+    graph = coo_matrix((np.ones(A.nnz), (A.row, A.col + nrows)), shape=(n, n))
+    ncomp, labels = connected_components(graph, directed=False)
+    col_labels = labels[nrows:]
+    row_labels = labels[:nrows]
+    #
+    # Order the blocks by their first column
+    #
+    order = {}
+    for label in col_labels:
+        order.setdefault(label, len(order))
+    cols = [[] for i in range(len(order))]
+    for j, label in enumerate(col_labels):
+        cols[order[label]].append(j)
+    rows = [[] for i in range(len(order))]
+    for i, label in enumerate(row_labels):
+        rows[order.get(label, 0)].append(i)
+    return [(np.array(r, dtype=np.int64), np.array(c, dtype=np.int64)) for r, c in zip(rows, cols)]
+
+
+def _split_level_type(L, cols):
+    nxR = int(np.sum(cols < L.x.nxR))
+    nxZ = int(np.sum((cols >= L.x.nxR) & (cols < L.x.nxR+L.x.nxZ)))
+    return nxR, nxZ, len(cols)-nxR-nxZ
+
+
+def _copy_level(L, X):
+    X.x.lower_bounds = np.copy(L.x.lower_bounds)
+    X.x.upper_bounds = np.copy(L.x.upper_bounds)
+    X.b = np.copy(L.b)
+    X.bl = None if L.bl is None else np.copy(L.bl)
+    X.d = L.d
+    X.minimize = L.minimize
+    X.inequalities = L.inequalities
+
+
+def decompose_lower_levels(M):
+    """
+    Split the lower levels of a bilevel problem into independent
+    followers.
+
+    Each lower level of M.U is split into the blocks computed by
+    :func:`lower_level_components`.  The followers of a split level have
+    the same objective sense and constraint type, and the constant terms
+    of its objective are included in the first follower.  Since the
+    blocks do not share variables or constraints, the followers have
+    the same optimal responses as the original lower level.
+
+    Returns
+    -------
+    Munch
+        The decomposed problem (problem), and a dictionary that maps the
+        id of each level in the decomposed problem to the id of the
+        original level and the indices of its variables (levels).
+    """
+    assert (type(M) is LinearMultilevelProblem), "Can only decompose a LinearMultilevelProblem"
+    U = M.U
+    for L in U.LL:
+        assert (len(L.LL) == 0), "Can only decompose the lower levels of bilevel problems"
+
+    D = LinearMultilevelProblem(name=M.name)
+    U2 = D.add_upper(nxR=U.x.nxR, nxZ=U.x.nxZ, nxB=U.x.nxB, name=U.name)
+    _copy_level(U, U2)
+    U2.c[U2] = U.c[U]
+    U2.A[U2] = U.A[U]
+    levels = {U2.id: (U.id, np.arange(len(U.x)))}
+
+    for L in U.LL:
+        blocks = lower_level_components(L)
+        for k, (rows, cols) in enumerate(blocks):
+            nxR, nxZ, nxB = _split_level_type(L, cols)
+            name = L.name if len(blocks) == 1 else "%s[%d]" % (L.name, k)
+            X = U2.add_lower(nxR=nxR, nxZ=nxZ, nxB=nxB, name=name)
+            levels[X.id] = (L.id, cols)
+            X.x.lower_bounds = L.x.lower_bounds[cols]
+            X.x.upper_bounds = L.x.upper_bounds[cols]
+            X.b = L.b[rows]
+            X.bl = None if L.bl is None else L.bl[rows]
+            X.minimize = L.minimize
+            X.inequalities = L.inequalities
+            if k == 0:
+                X.c[U2] = L.c[U]
+                X.d = L.d
+            if L.c[L] is not None:
+                X.c[X] = np.asarray(L.c[L])[cols]
+            if len(rows) > 0:
+                if L.A[U] is not None:
+                    X.A[U2] = csr_matrix(L.A[U])[rows]
+                if L.A[L] is not None:
+                    X.A[X] = csr_matrix(L.A[L])[rows][:, cols]
+            if U.c[L] is not None:
+                U2.c[X] = np.asarray(U.c[L])[cols]
+            if U.A[L] is not None:
+                U2.A[X] = csr_matrix(U.A[L])[:, cols]
+
+    return Munch(problem=D, levels=levels)
+
+
+def copy_decomposed_solution(D, M):
+    """
+    Copy the variable values of a problem created by
+    :func:`decompose_lower_levels` into the original problem M.
+    """
+    original = {L.id:L for L in M.levels()}
+    values = {L.id:[None]*len(L.x) for L in M.levels()}
+    for X in D.problem.levels():
+        i, cols = D.levels[X.id]
+        for j, v in zip(cols, X.x.values):
+            values[i][j] = v
+    for i, L in original.items():
+        L.x.values = values[i]
@@ -1,14 +1,26 @@
 # pao.mpr.examples
+#
+# Examples are imported when they are first accessed.
+#
+import importlib
 
-from . import anadalingam
-from . import bard511_list
-from . import bard511
-from . import barguel
-from . import besancon27
-from . import besancon27_shifted
-from . import getachew_ex1
-from . import getachew_ex2
-from . import pineda
-from . import toyexample1
-from . import toyexample2
-from . import toyexample3
+_examples = ['anadalingam',
+             'bard511_list',
+             'bard511',
+             'barguel',
+             'besancon27',
+             'besancon27_shifted',
+             'getachew_ex1',
+             'getachew_ex2',
+             'pineda',
+             'toyexample1',
+             'toyexample2',
+             'toyexample3']
+
+def __getattr__(name):
+    if name in _examples:
+        return importlib.import_module('.'+name, __name__)
+    raise AttributeError("module '%s' has no attribute '%s'" % (__name__, name))
+
+def __dir__():
+    return sorted(set(globals()) | set(_examples))
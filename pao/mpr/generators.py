@@ -0,0 +1,271 @@
+#
+# Generators for random bilevel problems with controllable size, density
+# and integrality.
+#
+# Each generator accepts a seed, and the same arguments generate the same
+# problem.  Problem data are constructed with bulk array operations,
+# so these generators can be used to create problems with millions of
+# nonzeros.
+#
+import numpy as np
+import scipy.sparse
+
+from .repn import LinearMultilevelProblem, QuadraticMultilevelProblem
+from .convert_repn import linearize_bilinear_terms
+
+
+def _random_coefficients(rng, n, low=1, high=10):
+    # Nonzero integer coefficients with random signs
+    return rng.integers(low, high+1, size=n) * rng.choice([-1, 1], size=n)
+
+
+def _random_matrix(rng, nrows, ncols, density):
+    nnz = int(round(density*nrows*ncols))
+    if nrows == 0 or ncols == 0 or nnz == 0:
+        return scipy.sparse.csr_matrix((nrows, ncols), dtype=np.float64)
+    #
+    # Sample linear indices without replacement.  For large matrices,
+    # sample with replacement and remove duplicates, which avoids a
+    # permutation of all nrows*ncols entries.
+    #
+    if nrows*ncols <= 10*nnz:
+        index = rng.choice(nrows*ncols, size=nnz, replace=False)
+    else:
+        index = np.unique(rng.integers(0, nrows*ncols, size=nnz))
+    rows, cols = np.divmod(index, ncols)
+    data = _random_coefficients(rng, index.size).astype(np.float64)
+    return scipy.sparse.csr_matrix((data, (rows, cols)), shape=(nrows, ncols))
+
+
+def _random_arcs(rng, nnodes, density):
+    #
+    # A random acyclic graph that contains the path 0, 1, ..., nnodes-1.
+    # Arcs (i,j) with i<j are included with the given density.
+    #
+    tail, head = np.triu_indices(nnodes, k=2)
+    keep = rng.random(tail.size) < density
+    tail = np.concatenate((np.arange(nnodes-1), tail[keep]))
+    head = np.concatenate((np.arange(1, nnodes), head[keep]))
+    return tail, head
+
+
+def _incidence_matrix(tail, head, nnodes):
+    # Rows are nodes, columns are arcs:  inflow - outflow
+    narcs = tail.size
+    rows = np.concatenate((head, tail))
+    cols = np.concatenate((np.arange(narcs), np.arange(narcs)))
+    data = np.concatenate((np.ones(narcs), -np.ones(narcs)))
+    return scipy.sparse.csr_matrix((data, (rows, cols)), shape=(nnodes, narcs))
+
+
+def random_bilevel_lp(*, nxU=10, nxL=10, nU=0, nL=10, density=0.1, nxZ_upper=0, nxZ_lower=0, ub=10, seed=None):
+    """
+    Generate a random sparse linear bilevel problem.
+
+    The upper level has ``nxU`` variables, of which the last ``nxZ_upper``
+    are integer, and ``nU`` constraints.  The lower level has ``nxL``
+    variables, of which the last ``nxZ_lower`` are integer, and ``nL``
+    constraints.  All variables are bounded in [0, ub], and the constraint
+    matrices have the given density with nonzero integer coefficients.
+    The right-hand-side of the constraints is chosen so a random point
+    satisfies all of the constraints.
+
+    Returns
+    -------
+    LinearMultilevelProblem
+    """
+    assert (0 <= nxZ_upper <= nxU), "The number of upper-level integer variables must be between 0 and nxU"
+    assert (0 <= nxZ_lower <= nxL), "The number of lower-level integer variables must be between 0 and nxL"
+    rng = np.random.default_rng(seed)
+
+    M = LinearMultilevelProblem(name="random_bilevel_lp")
+    U = M.add_upper(nxR=nxU-nxZ_upper, nxZ=nxZ_upper)
+    L = U.add_lower(nxR=nxL-nxZ_lower, nxZ=nxZ_lower)
+
+    U.x.lower_bounds = np.zeros(nxU)
+    U.x.upper_bounds = np.full(nxU, ub, dtype=np.float64)
+    L.x.lower_bounds = np.zeros(nxL)
+    L.x.upper_bounds = np.full(nxL, ub, dtype=np.float64)
+
+    U.c[U] = _random_coefficients(rng, nxU).astype(np.float64)
+    U.c[L] = _random_coefficients(rng, nxL).astype(np.float64)
+    L.c[L] = _random_coefficients(rng, nxL).astype(np.float64)
+    #
+    # A point that satisfies all constraints
+    #
+    xU = rng.integers(0, ub+1, size=nxU).astype(np.float64)
+    xL = rng.integers(0, ub+1, size=nxL).astype(np.float64)
+
+    for X, nrows in ((U, nU), (L, nL)):
+        if nrows == 0:
+            continue
+        X.A[U] = _random_matrix(rng, nrows, nxU, density)
+        X.A[L] = _random_matrix(rng, nrows, nxL, density)
+        X.b = X.A[U] @ xU + X.A[L] @ xL + rng.integers(0, ub+1, size=nrows)
+
+    return M
+
+
+def knapsack_interdiction(*, n=20, budget=0.25, capacity=0.5, integer=True, seed=None):
+    """
+    Generate a knapsack interdiction problem.
+
+    The leader removes items from a knapsack, subject to a budget on the
+    weight of the removed items, to minimize the profit of the follower.
+    The follower fills the knapsack with the remaining items to maximize
+    its profit.  The leader budget and follower capacity are fractions of
+    the total item weights.
+
+    If ``integer`` is False, then the follower solves the linear relaxation
+    of the knapsack problem.
+
+    Returns
+    -------
+    LinearMultilevelProblem
+    """
+    rng = np.random.default_rng(seed)
+    profit = rng.integers(1, 101, size=n).astype(np.float64)
+    leader_weight = rng.integers(1, 101, size=n).astype(np.float64)
+    follower_weight = rng.integers(1, 101, size=n).astype(np.float64)
+
+    M = LinearMultilevelProblem(name="knapsack_interdiction")
+    U = M.add_upper(nxB=n)
+    if integer:
+        L = U.add_lower(nxB=n)
+    else:
+        L = U.add_lower(nxR=n)
+        L.x.lower_bounds = np.zeros(n)
+        L.x.upper_bounds = np.ones(n)
+
+    U.c[L] = profit
+    U.A[U] = scipy.sparse.csr_matrix(leader_weight.reshape(1, n))
+    U.b = [np.floor(budget*leader_weight.sum())]
+
+    L.c[L] = profit
+    L.maximize = True
+    I = scipy.sparse.identity(n, format='csr')
+    L.A[U] = scipy.sparse.vstack([scipy.sparse.csr_matrix((1, n)), I], format='csr')
+    L.A[L] = scipy.sparse.vstack([scipy.sparse.csr_matrix(follower_weight.reshape(1, n)), I], format='csr')
+    L.b = np.concatenate(([np.floor(capacity*follower_weight.sum())], np.ones(n)))
+
+    return M
+
+
+def network_interdiction(*, nnodes=10, density=0.3, budget=2, seed=None):
+    """
+    Generate a maximum-flow interdiction problem.
+
+    The leader removes up to ``budget`` arcs from a random acyclic network
+    to minimize the maximum flow from node 0 to the last node.  The
+    follower variables are the flow value and the arc flows.
+
+    Returns
+    -------
+    LinearMultilevelProblem
+    """
+    assert (nnodes >= 2), "The network must have at least two nodes"
+    rng = np.random.default_rng(seed)
+    tail, head = _random_arcs(rng, nnodes, density)
+    narcs = tail.size
+    capacity = rng.integers(1, 21, size=narcs).astype(np.float64)
+    N = _incidence_matrix(tail, head, nnodes)
+
+    M = LinearMultilevelProblem(name="network_interdiction")
+    U = M.add_upper(nxB=narcs)
+    L = U.add_lower(nxR=1+narcs)
+    L.x.lower_bounds = np.zeros(1+narcs)
+
+    # Leader: minimize the flow value subject to the interdiction budget
+    U.c[L] = np.concatenate(([1], np.zeros(narcs)))
+    U.A[U] = scipy.sparse.csr_matrix(np.ones((1, narcs)))
+    U.b = [budget]
+    #
+    # Follower: maximize the flow value subject to
+    #   flow conservation at the interior nodes (as two inequalities)
+    #   f <= outflow from the source
+    #   y[a] <= capacity[a] * (1 - x[a])
+    #
+    L.c[L] = np.concatenate(([1], np.zeros(narcs)))
+    L.maximize = True
+    interior = N[1:nnodes-1]
+    ninterior = interior.shape[0]
+    f = scipy.sparse.csr_matrix(([1.0], ([0], [0])), shape=(1, 1))
+    L.A[L] = scipy.sparse.bmat([[None, interior],
+                                [None, -interior],
+                                [f, N[0]],
+                                [scipy.sparse.csr_matrix((narcs, 1)), scipy.sparse.identity(narcs)]], format='csr')
+    L.A[U] = scipy.sparse.vstack([scipy.sparse.csr_matrix((2*ninterior+1, narcs)),
+                                  scipy.sparse.diags(capacity)], format='csr')
+    L.b = np.concatenate((np.zeros(2*ninterior+1), capacity))
+
+    return M
+
+
+def toll_setting(*, nnodes=10, density=0.3, ntolls=3, nlevels=4, toll_step=1, linearize=True, seed=None):
+    """
+    Generate a toll-setting problem.
+
+    The leader sets the tolls on ``ntolls`` arcs of a random acyclic
+    network to maximize its revenue, and the follower routes one unit of
+    flow from node 0 to the last node on a path with minimum cost plus
+    tolls.  The toll on each arc is selected from ``nlevels`` discrete
+    values (toll_step, 2*toll_step, ...) with binary variables, so the
+    bilinear revenue terms can be linearized.  The path 0, 1, ...,
+    nnodes-1 has no tolls, so the follower always has a feasible path.
+
+    If ``linearize`` is True, then a LinearMultilevelProblem is returned.
+    Otherwise, a QuadraticMultilevelProblem is returned.
+
+    Returns
+    -------
+    LinearMultilevelProblem or QuadraticMultilevelProblem
+    """
+    assert (nnodes >= 2), "The network must have at least two nodes"
+    rng = np.random.default_rng(seed)
+    tail, head = _random_arcs(rng, nnodes, density)
+    narcs = tail.size
+    cost = rng.integers(1, 11, size=narcs).astype(np.float64)
+    N = _incidence_matrix(tail, head, nnodes)
+    # Tolls are placed on arcs that are not on the path 0, 1, ..., nnodes-1
+    toll_arcs = nnodes-1 + rng.permutation(narcs-nnodes+1)[:ntolls]
+    ntolls = toll_arcs.size
+    levels = toll_step*np.arange(1, nlevels+1, dtype=np.float64)
+
+    M = QuadraticMultilevelProblem(name="toll_setting")
+    # z[t*nlevels+k] is 1 if toll arc t has toll levels[k]
+    U = M.add_upper(nxB=ntolls*nlevels)
+    L = U.add_lower(nxR=narcs)
+    L.x.lower_bounds = np.zeros(narcs)
+    L.x.upper_bounds = np.ones(narcs)
+
+    # At most one toll level is selected for each toll arc
+    U.A[U] = scipy.sparse.kron(scipy.sparse.identity(ntolls), np.ones((1, nlevels)), format='csr')
+    U.b = np.ones(ntolls)
+    #
+    # Revenue:  sum_{t,k} levels[k] * z[t,k] * y[toll_arcs[t]]
+    #
+    rows = np.arange(ntolls*nlevels)
+    cols = np.repeat(toll_arcs, nlevels)
+    # linearize_bilinear_terms() iterates over the keys of a DOK matrix
+    P = scipy.sparse.coo_matrix((np.tile(levels, ntolls), (rows, cols)), shape=(ntolls*nlevels, narcs)).todok()
+    U.c[U] = np.zeros(ntolls*nlevels)
+    U.c[L] = np.zeros(narcs)
+    U.P[U,L] = P
+    U.maximize = True
+    #
+    # Follower: minimum cost path, with flow conservation expressed as
+    # two inequalities
+    #
+    L.c[L] = cost
+    L.P[U,L] = P.copy()
+    demand = np.zeros(nnodes)
+    demand[0] = -1
+    demand[-1] = 1
+    L.A[L] = scipy.sparse.vstack([N, -N], format='csr')
+    L.b = np.concatenate((demand, -demand))
+
+    if linearize:
+        # The flows are bounded by one
+        M, _ = linearize_bilinear_terms(M, 1)
+        M.name = "toll_setting"
+    return M
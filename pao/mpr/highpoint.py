@@ -0,0 +1,140 @@
+#
+# The high-point relaxation of a LinearMultilevelProblem, which
+# includes the constraints of all levels but omits the optimality
+# requirements of the lower levels.
+#
+import time
+import numpy as np
+from scipy.sparse import coo_matrix, csr_matrix, vstack
+from munch import Munch
+
+from .repn import LinearMultilevelProblem
+
+
+def create_highpoint_relaxation(M):
+    """
+    Create the matrices for the high-point relaxation of a linear
+    multilevel problem:
+
+        min  c' x + d
+        s.t. cl <= A x <= cu
+             lb <=   x <= ub
+             x[i] integer if integrality[i]
+
+    The variables of the levels are stacked in the order of M.levels(),
+    and the rows of A are the constraints of each level in the same
+    order.  The objective is the upper-level objective, which is negated
+    if the upper-level is a maximization problem.
+
+    Returns
+    -------
+    Munch
+        The relaxation data, the objective sign, and the offset of the
+        variables of each level.
+    """
+    assert (type(M) is LinearMultilevelProblem), "The high-point relaxation can only be created for a LinearMultilevelProblem"
+    levels = list(M.levels())
+    offset = {}
+    n = 0
+    for L in levels:
+        offset[L.id] = n
+        n += len(L.x)
+    U = M.U
+    sign = 1 if U.minimize else -1
+    #
+    # Objective
+    #
+    c = np.zeros(n)
+    for X in U.levels():
+        if U.c[X] is not None and len(X.x) > 0:
+            c[offset[X.id]:offset[X.id]+len(X.x)] = sign*np.asarray(U.c[X], dtype=np.float64)
+    #
+    # Constraints
+    #
+    blocks = []
+    cl = []
+    cu = []
+    for L in levels:
+        nrows = L.b.size
+        if nrows == 0:
+            continue
+        rows = []
+        cols = []
+        vals = []
+        for X in L.levels():
+            A = L.A[X]
+            if A is None:
+                continue
+            A = coo_matrix(A)
+            rows.append(A.row)
+            cols.append(A.col + offset[X.id])
+            vals.append(A.data)
+        if len(rows) == 0:
+            blocks.append(csr_matrix((nrows, n)))
+        else:
+            blocks.append(coo_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))), shape=(nrows, n)).tocsr())
+        b = np.asarray(L.b, dtype=np.float64)
+        if L.bl is not None:
+            cl.append(np.asarray(L.bl, dtype=np.float64))
+        elif L.inequalities:
+            cl.append(np.full(nrows, -np.inf))
+        else:
+            cl.append(b)
+        cu.append(b)
+    A = vstack(blocks).tocsr() if len(blocks) > 0 else csr_matrix((0, n))
+    #
+    # Variables
+    #
+    lb = np.concatenate([L.x.lower_bounds for L in levels]) if n > 0 else np.zeros(0)
+    ub = np.concatenate([L.x.upper_bounds for L in levels]) if n > 0 else np.zeros(0)
+    integrality = np.zeros(n, dtype=np.int32)
+    for L in levels:
+        integrality[offset[L.id]+L.x.nxR:offset[L.id]+len(L.x)] = 1
+
+    return Munch(c=c, d=U.d, sign=sign, A=A,
+                 cl=np.concatenate(cl) if len(cl) > 0 else np.zeros(0),
+                 cu=np.concatenate(cu) if len(cu) > 0 else np.zeros(0),
+                 lb=lb, ub=ub, integrality=integrality, offset=offset)
+
+
+def solve_highpoint_relaxation(M, relax_integrality=False, time_limit=None, tee=False):
+    """
+    Solve the high-point relaxation of a linear multilevel problem
+    in-process with the HiGHS solvers in scipy.optimize.
+
+    The optimal value of the relaxation is a bound on the optimal value
+    of the multilevel problem:  a lower bound if the upper-level is a
+    minimization problem, and an upper bound otherwise.  If the
+    relaxation is infeasible, then the multilevel problem is infeasible.
+    If relax_integrality is True, then the LP relaxation is solved,
+    which gives a weaker bound.
+
+    Returns
+    -------
+    Munch
+        The termination condition, the bound, the values of the variables
+        of each level (x) and the solver time.  The bound is None if the
+        solver did not find one, and x is None if the solver did not find
+        a solution.
+    """
+    from .solvers import scipy_util
+
+    start_time = time.time()
+    hpr = create_highpoint_relaxation(M)
+    integrality = None if relax_integrality else hpr.integrality
+    ans = scipy_util.solve_milp(hpr.c, hpr.A, hpr.cl, hpr.cu, hpr.lb, hpr.ub,
+                                integrality=integrality, time_limit=time_limit, tee=tee)
+
+    bound = None
+    if ans.best_objective_bound is not None:
+        bound = hpr.sign*ans.best_objective_bound + hpr.d
+    x = None
+    if ans.x is not None:
+        x = {}
+        for L in M.levels():
+            xL = ans.x[hpr.offset[L.id]:hpr.offset[L.id]+len(L.x)]
+            x[L.id] = [float(v) for v in xL[:L.x.nxR]] + [int(round(v)) for v in xL[L.x.nxR:]]
+    return Munch(termination_condition=ans.termination_condition,
+                 bound=bound,
+                 x=x,
+                 time=time.time() - start_time)
@@ -3,11 +3,28 @@ import weakref
 import copy
 import pprint
 import collections.abc
-from scipy.sparse import csr_matrix, dok_matrix
+from scipy.sparse import csr_matrix, dok_matrix, issparse
 import numpy as np
 from pyutilib.misc import Bunch
 
 
+def _pack_matrix(m):
+    #
+    # Sparse matrices are pickled in CSR format, so their data is stored
+    # in numpy arrays that can be pickled out-of-band with protocol 5.
+    # Returns the matrix and its original format.
+    #
+    if issparse(m) and m.format not in ('csr', 'csc', 'coo'):
+        return m.tocsr(), m.format
+    return m, None
+
+
+def _unpack_matrix(m, fmt):
+    if fmt is None:
+        return m
+    return m.asformat(fmt)
+
+
 def _equal_nparray(Ux, U_coef, Lx, L_coef):
     if Ux is None and Lx is None:
         return True
@@ -211,6 +228,24 @@ class LevelValues(object):
                 ans.x = np.copy(self.x)
         return ans
 
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        if self._matrix_list and self.x is not None:
+            packed = [_pack_matrix(m) for m in self.x]
+            state['x'] = [m for m,fmt in packed]
+            state['_formats'] = [fmt for m,fmt in packed]
+        else:
+            state['x'], state['_formats'] = _pack_matrix(self.x)
+        return state
+
+    def __setstate__(self, state):
+        formats = state.pop('_formats')
+        if state['_matrix_list'] and state['x'] is not None:
+            state['x'] = [_unpack_matrix(m, fmt) for m,fmt in zip(state['x'], formats)]
+        else:
+            state['x'] = _unpack_matrix(state['x'], formats)
+        self.__dict__.update(state)
+
     def set_values(self, x=None):
         if type(x) is list:
             if self._matrix:                
@@ -444,6 +479,7 @@ class LinearLevelRepn(object):
         self.A = LevelValueWrapper1("A",
                         matrix=True)    # constraint matrices at this level
         self.b = np.ndarray(0, dtype=np.float64)          # RHS of the constraints
+        self.bl = None                  # lower bounds of the constraints (optional)
         self._minimize = True           # sense of the objective at this level
         self._inequalities = True       # If True, the constraints are inequalities
         self.d = 0                      # constant in objective at this level
@@ -453,6 +489,21 @@ class LinearLevelRepn(object):
 
         self.name = None                # a string descriptor for this level
 
+    def __getstate__(self):
+        #
+        # Weakrefs cannot be pickled, so the link to the upper level is
+        # omitted and restored by the upper level in __setstate__
+        #
+        state = dict(self.__dict__)
+        del state['UL']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.UL = lambda: None          # "empty weakref" to upper level
+        for L in self.LL:
+            L.UL = weakref.ref(self)
+
     def _add_lower(self, tmp, nxR=0, nxZ=0, nxB=0, name=None, id=None):
         if name is None:
             tmp.name = self.name + ".LL[%d]" % len(self.LL)
@@ -557,6 +608,7 @@ class LinearLevelRepn(object):
         ans.c = self.c.clone()
         ans.A = self.A.clone()
         ans.b = np.copy(self.b)
+        ans.bl = None if self.bl is None else np.copy(self.bl)
         ans.minimize = self.minimize
         ans.inequalities = self.inequalities
         ans.d = self.d
@@ -578,7 +630,7 @@ class LinearLevelRepn(object):
     def clone(self, parent=None, clone_fn=None):
         if clone_fn is None:
             clone_fn = LinearLevelRepn._clone_level
-        ans = clone_fn(self, parent=parent, data=['x', 'c', 'A', 'b', 'minimize', 'inequalities', 'equalities', 'd', 'LL', 'UL'])
+        ans = clone_fn(self, parent=parent, data=['x', 'c', 'A', 'b', 'bl', 'minimize', 'inequalities', 'equalities', 'd', 'LL', 'UL'])
         ans.LL = self.LL.clone(parent=ans, clone_fn=clone_fn)
         return ans
 
@@ -601,7 +653,10 @@ class LinearLevelRepn(object):
         if self.b.size > 0:
             print("\nConstraints: ")
             self.A.print(names)
-            if self.inequalities:
+            if self.bl is not None:
+                print("  >=", self.bl)
+                print("  <=", self.b)
+            elif self.inequalities:
                 print("  <=", self.b)
             else:
                 print("  ==", self.b)
@@ -612,7 +667,7 @@ class LinearLevelRepn(object):
             L.print(names)
 
     def __setattr__(self, name, value):
-        if name == 'b' and value is not None:
+        if name in ('b', 'bl') and value is not None:
             value = np.array(value, dtype=np.float64)
             super().__setattr__(name, value)
         else:
@@ -640,6 +695,11 @@ class LinearLevelRepn(object):
             for X in self.levels():
                 if self.A[X] is not None:
                     assert (nr == self.A[X].shape[0]), "Incompatible specification of %s.b and %s.A[%s] (%d != %d)" % (self.name, self.name, X.name, nr, self.A[X].shape[0])
+        #
+        # Size of 'bl'
+        #
+        if self.bl is not None:
+            assert (self.b is not None and self.bl.size == self.b.size), "Incompatible specification of %s.b and %s.bl" % (self.name, self.name)
 
 
 class QuadraticLevelRepn(LinearLevelRepn):
@@ -683,7 +743,7 @@ class QuadraticLevelRepn(LinearLevelRepn):
     def clone(self, parent=None, clone_fn=None):
         if clone_fn is None:
             clone_fn = QuadraticLevelRepn._clone_level
-        ans = clone_fn(self, parent=parent, data=['x', 'c', 'A', 'b', 'minimize', 'maximize', 'inequalities', 'equalities', 'd', 'LL', 'UL', 'P', 'Q'])
+        ans = clone_fn(self, parent=parent, data=['x', 'c', 'A', 'b', 'bl', 'minimize', 'maximize', 'inequalities', 'equalities', 'd', 'LL', 'UL', 'P', 'Q'])
         ans.LL = self.LL.clone(parent=ans, clone_fn=clone_fn)
         return ans
 
@@ -708,7 +768,10 @@ class QuadraticLevelRepn(LinearLevelRepn):
             print("\nConstraints: ")
             self.A.print(names)
             self.Q.print(names)
-            if self.inequalities:
+            if self.bl is not None:
+                print("  >=", self.bl)
+                print("  <=", self.b)
+            elif self.inequalities:
                 print("  <=", self.b)
             else:
                 print("  ==", self.b)
@@ -751,6 +814,15 @@ class LinearMultilevelProblem(object):
 
                     min_{L.x}   L.c' * x + L.d
                     s.t.        L.A  * x       <= L.b      # Or ==
+
+      If U.bl is not None, then the upper-level constraints are
+
+                    U.bl <= U.A * x <= U.b
+
+      where the bounds may be infinite, and equality constraints have
+      equal bounds.  The inequalities flag is ignored for these levels.
+      The convert_to_standard_form() function expands these constraints
+      into the form required by a solver.
     """
 
     def __init__(self, name=None):
@@ -832,6 +904,10 @@ class QuadraticMultilevelProblem(object):
 
                     min_{L.x}   L.c' * x + x' * L.P * x + L.d
                     s.t.        L.A  * x + x' * L.Q * x       <= L.b     # Or ==
+
+      If U.bl is not None, then the upper-level constraints are
+
+                    U.bl <= U.A * x + x' * U.Q * x <= U.b
     """
 
     def __init__(self, name=None, bilinear=False):
@@ -1,5 +1,5 @@
 from munch import Munch
-import pyomo.environ as pe
+from pyomo.core import ConcreteModel, value
 from .repn import LinearMultilevelProblem, QuadraticMultilevelProblem
 
 
@@ -10,7 +10,7 @@ class LMP_SolutionManager(object):
         self.offsets = offsets
 
     def copy(self, From=None, To=None):
-        if type(From) is pe.ConcreteModel and type(To) in [LinearMultilevelProblem,QuadraticMultilevelProblem]:
+        if type(From) is ConcreteModel and type(To) in [LinearMultilevelProblem,QuadraticMultilevelProblem]:
             #
             # TODO - generalize this logic to multi-level models and models with multiple subproblems
             #
@@ -31,17 +31,17 @@ class LMP_SolutionManager(object):
                 multipliers = self.multipliers[L.id]
                 offsets = self.offsets[L.id]
                 for j in range(L.x.nxR):
-                    L.x.values[j] = sum(pe.value(From.LxR[L.id][v]) * c for v,c in multipliers[j]) + offsets[j]
+                    L.x.values[j] = sum(value(From.LxR[L.id][v]) * c for v,c in multipliers[j]) + offsets[j]
                 for j in range(L.x.nxZ):
                     jj = j+L.x.nxR
-                    L.x.values[jj] = round(sum(pe.value(From.LxZ[L.id][v-L.x.nxR]) * c for v,c in multipliers[jj])) + offsets[jj]
+                    L.x.values[jj] = round(sum(value(From.LxZ[L.id][v-L.x.nxR]) * c for v,c in multipliers[jj])) + offsets[jj]
                 if From.get('LxB',None) is None:
                     # Binaries are at the end of the integers
                     for j in range(L.x.nxB):
-                        L.x.values[j+L.x.nxR+L.x.nxZ] = round(pe.value(From.LxZ[L.id][j+L.x.nxZ]))
+                        L.x.values[j+L.x.nxR+L.x.nxZ] = round(value(From.LxZ[L.id][j+L.x.nxZ]))
                 else:
                     for j in range(L.x.nxB):
-                        L.x.values[j+L.x.nxR+L.x.nxZ] = round(pe.value(From.LxB[L.id][j]))
+                        L.x.values[j+L.x.nxR+L.x.nxZ] = round(value(From.LxB[L.id][j]))
 
         else:
             raise RuntimeError("Unexpected types: From=%s To=%s" % (str(type(From)), str(type(To))))
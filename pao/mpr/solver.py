@@ -1,5 +1,8 @@
-import pyomo.environ as pe
+import time
+from pyomo.common.config import ConfigBlock, ConfigValue
 import pao.common
+from .cache import SolveCache, problem_hash, cache_entry, load_cache_entry
+from .highpoint import solve_highpoint_relaxation
 
 Solver = pao.common.Solver
 
@@ -9,10 +12,104 @@ class LinearMultilevelSolverBase(pao.common.SolverAPI):
     Define the API for solvers that optimize a LinearMultilevelProblem
     """
 
+    config = pao.common.SolverAPI.config()
+    config.declare('time_limit', ConfigValue(
+        default=None,
+        domain=float,
+        description="Solver time limit (in seconds).  The remaining time is passed to each subsolver that is executed.  (default is None)"
+        ))
+    config.declare('profile_memory', ConfigValue(
+        default=False,
+        domain=bool,
+        description="If True, then the peak memory of each solver phase is recorded with tracemalloc.  (default is False)"
+        ))
+    config.declare('cache', ConfigValue(
+        default=None,
+        description="A directory name or SolveCache object that is used to cache solver results.  If the problem and solver options match a cache entry, then the cached results are returned without executing the solver.  (default is None)"
+        ))
+
     def __init__(self, name):
         super().__init__()
         self.name = name
 
+    #
+    # The following methods use the solver configuration, or the
+    # configuration of a single solve if config is not None.
+    #
+
+    def _remaining_time(self, start_time, config=None):
+        #
+        # The time remaining before the time limit is reached, or None
+        # if no time limit was specified.
+        #
+        config = self.config if config is None else config
+        if config.time_limit is None:
+            return None
+        return max(0, config.time_limit - (time.time() - start_time))
+
+    def _cache(self, config=None):
+        config = self.config if config is None else config
+        cache = config.cache
+        if isinstance(cache, str):
+            cache = SolveCache(cache)
+        return cache
+
+    def _cache_key(self, model, config=None):
+        #
+        # Options that do not change the results are excluded from the key
+        #
+        config = self.config if config is None else config
+        options = {k:config[k] for k in config if k not in ('tee', 'cache', 'callback', 'profile_memory')}
+        options['name'] = self.name
+        return problem_hash(model, options)
+
+    def _load_from_cache(self, model, config=None):
+        #
+        # Returns the cached results for this model, or None
+        #
+        config = self.config if config is None else config
+        cache = self._cache(config)
+        if cache is None:
+            return None
+        with pao.common.PhaseTimer(memory=config.profile_memory) as timer:
+            with timer.phase('cache_lookup'):
+                entry = cache.get(self._cache_key(model, config))
+            if entry is None:
+                return None
+            with timer.phase('copy_solution'):
+                results = load_cache_entry(model, entry, load_solutions=config.load_solutions)
+            results.solver.phases = timer.summary()
+            return results
+
+    def _store_in_cache(self, model, results, config=None):
+        #
+        # Only cache results that will not change if the solver is re-executed
+        #
+        cache = self._cache(config)
+        if cache is None:
+            return
+        if results.solver.termination_condition not in (pao.common.TerminationCondition.optimal,
+                                                         pao.common.TerminationCondition.infeasible,
+                                                         pao.common.TerminationCondition.unbounded,
+                                                         pao.common.TerminationCondition.infeasibleOrUnbounded):
+            return
+        cache.put(self._cache_key(model, config), cache_entry(model, results))
+
+    def _solve_highpoint_relaxation(self, repn, results, start_time, timer):
+        #
+        # Solve the high-point relaxation of the standard form, whose
+        # objective has the same sense as the bounds reported by the
+        # solver.  Returns the bound from the relaxation, or None.  If the
+        # relaxation is infeasible, then the multilevel problem is
+        # infeasible, and the termination condition is set.
+        #
+        with timer.phase('highpoint'):
+            ans = solve_highpoint_relaxation(repn, time_limit=self._remaining_time(start_time))
+        results.solver.highpoint_bound = ans.bound
+        if ans.termination_condition == pao.common.TerminationCondition.infeasible:
+            results.solver.termination_condition = ans.termination_condition
+        return ans.bound
+
     def check_model(self, lmp):         # pragma: no cover
         #
         # Confirm that the LinearMultilevelProblem is well-formed
@@ -1,5 +1,11 @@
-#from . import ld
-from . import fa
-from . import reg
-from . import pccg
-from . import mibs
+#
+# The solver modules are imported when a solver is first created.
+#
+from pao.common.solver import Solver
+
+#Solver.declare('pao.mpr.interdiction', 'pao.mpr.solvers.ld')
+Solver.declare('pao.mpr.FA', 'pao.mpr.solvers.fa')
+Solver.declare('pao.mpr.REG', 'pao.mpr.solvers.reg')
+Solver.declare('pao.mpr.PCCG', 'pao.mpr.solvers.pccg')
+Solver.declare('pao.mpr.MIBS', 'pao.mpr.solvers.mibs')
+Solver.declare('pao.mpr.Portfolio', 'pao.mpr.solvers.portfolio')
@@ -3,7 +3,10 @@
 # relaxations discussed by Fortuny-Amat and McCarl, 1981.
 #
 import time
+import logging
 import numpy as np
+import scipy.sparse
+from munch import Munch
 import pyutilib
 import pyomo.environ as pe
 import pyomo.opt
@@ -14,9 +17,179 @@ import pao.common
 from ..solver import Solver, LinearMultilevelSolverBase, LinearMultilevelResults
 from ..repn import LinearMultilevelProblem
 from ..convert_repn import convert_to_standard_form
+from ..bigm import compute_bigm, uniform_bigm, active_bigm, update_bigm
 from . import pyomo_util
+from . import scipy_util
 from .reg import create_model_replacing_LL_with_kkt
 
+logger = logging.getLogger(__name__)
+
+
+def create_bigm_milp(repn, bigM, bounds=None):
+    """
+    Create the matrices for the big-M MILP that replaces each lower-level
+    problem with its KKT conditions.
+
+    The repn is a bilevel problem with equality constraints, and the
+    lower-level variables may have finite or infinite lower and upper
+    bounds.  The MILP variables are ordered as follows:  the upper-level
+    variables, and then for each lower-level the lower-level variables
+    (x), the equality multipliers (lam), the multipliers for the finite
+    lower bounds (nu) and finite upper bounds (mu), and the binary
+    variables (zl and zu) that select the complementarity conditions:
+
+        c_L + A_L' lam - nu + mu = 0
+        x - lb <= bigM * zl         nu <= bigM * (1-zl)
+        ub - x <= bigM * zu         mu <= bigM * (1-zu)
+
+    If bounds is not None, then it contains the big-M values for each
+    slack and multiplier, as computed by
+    :func:`pao.mpr.bigm.compute_bigm`, and otherwise the value bigM is
+    used for all of them.
+
+    Returns
+    -------
+    Munch
+        The MILP data, a function that maps a MILP solution to the
+        values of the level variables (solution), and a function that
+        maps a MILP solution to the values of the slacks and multipliers
+        of each lower level (complementarity).
+    """
+    U = repn.U
+    LL = repn.U.LL
+    #
+    # Variable offsets
+    #
+    offset = {U.id: 0}
+    n = len(U.x)
+    kkt = []
+    for L in LL:
+        nx = len(L.x)
+        offset[L.id] = n
+        jl = np.flatnonzero(np.isfinite(L.x.lower_bounds))
+        ju = np.flatnonzero(np.isfinite(L.x.upper_bounds))
+        lam = n+nx
+        nu = lam+L.b.size
+        mu = nu+jl.size
+        zl = mu+ju.size
+        zu = zl+jl.size
+        kkt.append( Munch(jl=jl, ju=ju, lam=lam, nu=nu, mu=mu, zl=zl, zu=zu) )
+        n = zu+ju.size
+    rows = []
+    cols = []
+    vals = []
+    cl = []
+    cu = []
+
+    def add_matrix(A, row, col):
+        if A is None:
+            return
+        A = scipy.sparse.coo_matrix(A)
+        rows.append(A.row + row)
+        cols.append(A.col + col)
+        vals.append(A.data)
+
+    def add_rows(lower, upper):
+        cl.append(lower)
+        cu.append(upper)
+        return sum(x.size for x in cl) - lower.size
+    #
+    # Upper- and lower-level constraints
+    #
+    for X in [U] + list(LL):
+        if X.b.size == 0:
+            continue
+        r = add_rows(np.full(X.b.size, np.NINF) if X.inequalities else X.b, X.b)
+        add_matrix(X.A[U], r, 0)
+        for L in LL:
+            if X is U or X is L:
+                add_matrix(X.A[L], r, offset[L.id])
+    #
+    # KKT conditions
+    #
+    for i, (L, K) in enumerate(zip(LL, kkt)):
+        nx = len(L.x)
+        nl = K.jl.size
+        nu = K.ju.size
+        if bounds is None:
+            Mxl = Mnu = np.full(nl, bigM)
+            Mxu = Mmu = np.full(nu, bigM)
+        else:
+            B = bounds.levels[i]
+            Mxl, Mnu, Mxu, Mmu = B.xl, B.nu, B.xu, B.mu
+        cL = np.zeros(nx) if L.c[L] is None else np.asarray(L.c[L], dtype=np.float64)
+        r = add_rows(-cL, -cL)
+        add_matrix(None if L.A[L] is None else L.A[L].transpose(), r, K.lam)
+        add_matrix(scipy.sparse.coo_matrix((-np.ones(nl), (K.jl, np.arange(nl))), shape=(nx, nl)), r, K.nu)
+        add_matrix(scipy.sparse.coo_matrix((np.ones(nu), (K.ju, np.arange(nu))), shape=(nx, nu)), r, K.mu)
+        #
+        # Lower bounds:  x - bigM*zl <= lb,  nu + bigM*zl <= bigM
+        #
+        r = add_rows(np.full(nl, np.NINF), L.x.lower_bounds[K.jl])
+        add_matrix(scipy.sparse.coo_matrix((np.ones(nl), (np.arange(nl), K.jl)), shape=(nl, nx)), r, offset[L.id])
+        add_matrix(scipy.sparse.diags(-Mxl), r, K.zl)
+
+        r = add_rows(np.full(nl, np.NINF), Mnu)
+        add_matrix(scipy.sparse.identity(nl), r, K.nu)
+        add_matrix(scipy.sparse.diags(Mnu), r, K.zl)
+        #
+        # Upper bounds:  -x - bigM*zu <= -ub,  mu + bigM*zu <= bigM
+        #
+        r = add_rows(np.full(nu, np.NINF), -L.x.upper_bounds[K.ju])
+        add_matrix(scipy.sparse.coo_matrix((-np.ones(nu), (np.arange(nu), K.ju)), shape=(nu, nx)), r, offset[L.id])
+        add_matrix(scipy.sparse.diags(-Mxu), r, K.zu)
+
+        r = add_rows(np.full(nu, np.NINF), Mmu)
+        add_matrix(scipy.sparse.identity(nu), r, K.mu)
+        add_matrix(scipy.sparse.diags(Mmu), r, K.zu)
+    #
+    # Objective, bounds and integrality
+    #
+    c = np.zeros(n)
+    lb = np.zeros(n)
+    ub = np.full(n, np.PINF)
+    integrality = np.zeros(n, dtype=np.int32)
+    for X in [U] + list(LL):
+        if U.c[X] is not None:
+            c[offset[X.id]:offset[X.id]+len(X.x)] = U.c[X]
+        lb[offset[X.id]:offset[X.id]+len(X.x)] = X.x.lower_bounds
+        ub[offset[X.id]:offset[X.id]+len(X.x)] = X.x.upper_bounds
+        integrality[offset[X.id]+X.x.nxR:offset[X.id]+len(X.x)] = 1
+    for L, K in zip(LL, kkt):
+        lb[K.lam:K.nu] = np.NINF
+        ub[K.zl:K.zu+K.ju.size] = 1
+        integrality[K.zl:K.zu+K.ju.size] = 1
+
+    nrows = sum(x.size for x in cl)
+    A = scipy.sparse.coo_matrix((np.concatenate(vals) if vals else [], 
+                                (np.concatenate(rows) if rows else [], np.concatenate(cols) if cols else [])),
+                                shape=(nrows, n))
+
+    def solution(x):
+        LxR = {}
+        LxZ = {}
+        LxB = {}
+        for X in [U] + list(LL):
+            start = offset[X.id]
+            LxR[X.id] = x[start:start+X.x.nxR]
+            LxZ[X.id] = x[start+X.x.nxR:start+X.x.nxR+X.x.nxZ]
+            LxB[X.id] = x[start+X.x.nxR+X.x.nxZ:start+len(X.x)]
+        return Munch(LxR=LxR, LxZ=LxZ, LxB=LxB)
+
+    def complementarity(x):
+        values = []
+        for L, K in zip(LL, kkt):
+            xL = x[offset[L.id]:offset[L.id]+len(L.x)]
+            values.append(Munch(xl=xL[K.jl] - L.x.lower_bounds[K.jl],
+                                xu=L.x.upper_bounds[K.ju] - xL[K.ju],
+                                nu=x[K.nu:K.nu+K.jl.size],
+                                mu=x[K.mu:K.mu+K.ju.size]))
+        return values
+
+    return Munch(c=c, d=U.d, A=A.tocsr(), 
+                 cl=np.concatenate(cl) if cl else np.zeros(0), cu=np.concatenate(cu) if cu else np.zeros(0),
+                 lb=lb, ub=ub, integrality=integrality, solution=solution, complementarity=complementarity)
+
 
 @Solver.register(
         name='pao.mpr.FA',
@@ -32,7 +205,7 @@ class LinearMultilevelSolver_FA(LinearMultilevelSolverBase):
     config = LinearMultilevelSolverBase.config()
     config.declare('mip_solver', ConfigValue(
         default='glpk',
-        description="The MIP solver used by FA.  (default is glpk)"
+        description="The MIP solver used by FA.  If this is 'scipy-highs', then the MIP is solved in-process with scipy.optimize.milp.  (default is glpk)"
         ))
     #config.declare('mip_options', ConfigValue(
     #    default=None,
@@ -42,6 +215,31 @@ class LinearMultilevelSolver_FA(LinearMultilevelSolverBase):
         domain=float,
         description="The big-M value used to enforce complementarity conditions.  (default is 1e5)"
         ))
+    config.declare('compute_bigm', ConfigValue(
+        default=False,
+        domain=bool,
+        description="If True, then a big-M value is computed for each complementarity condition by solving bounding LPs in-process.  The bigm value is used for conditions whose LPs are unbounded, and then results.solver.bigm_valid is False.  (default is False)"
+        ))
+    config.declare('adaptive_bigm', ConfigValue(
+        default=False,
+        domain=bool,
+        description="If True, then the big-M values of the slacks and multipliers that are active in the solution of the MIP are enlarged, and the MIP is solved again until no big-M value is active.  All big-M values are enlarged if the MIP is infeasible.  This is a heuristic, so the termination condition is feasible unless all big-M values are computed by bounding LPs, and results.solver.bigm_active records the number of big-M values that are still active.  (default is False)"
+        ))
+    config.declare('bigm_growth', ConfigValue(
+        default=10,
+        domain=float,
+        description="The factor used to enlarge active big-M values when adaptive_bigm is True.  (default is 10)"
+        ))
+    config.declare('max_bigm_iterations', ConfigValue(
+        default=10,
+        domain=int,
+        description="The maximum number of times the MIP is solved again when adaptive_bigm is True.  (default is 10)"
+        ))
+    config.declare('highpoint', ConfigValue(
+        default=False,
+        domain=bool,
+        description="If True, then the high-point relaxation is solved in-process before the MIP.  The solver terminates if the relaxation is infeasible, and otherwise its bound is reported if the MIP solver does not find a better bound.  (default is False)"
+        ))
 
     def __init__(self, **kwds):
         super().__init__(name='pao.mpr.FA')
@@ -74,44 +272,231 @@ class LinearMultilevelSolver_FA(LinearMultilevelSolverBase):
         #
         self._update_config(options)
         #
+        # Return cached results
+        #
+        results = self._load_from_cache(model)
+        if results is not None:
+            return results
+        #
         # Start clock
         #
         start_time = time.time()
+        with pao.common.PhaseTimer(memory=self.config.profile_memory) as timer:
 
-        self.standard_form, soln_manager = convert_to_standard_form(model, inequalities=False)
+            with timer.phase('convert_to_standard_form'):
+                self.standard_form, soln_manager = convert_to_standard_form(model, inequalities=False, nonnegative=False)
+            results = LinearMultilevelResults(solution_manager=soln_manager)
 
-        M = self._create_pyomo_model(self.standard_form, self.config.bigm)
-        #
-        # Solve the Pyomo model the specified solver
-        #
-        results = LinearMultilevelResults(solution_manager=soln_manager)
-        if isinstance(self.config.mip_solver, str):
-            opt = pe.SolverFactory(self.config.mip_solver)
-        else:
-            opt = self.config.mip_solver
+            bound = None
+            if self.config.highpoint:
+                bound = self._solve_highpoint_relaxation(self.standard_form, results, start_time, timer)
+                if results.solver.termination_condition == pao.common.TerminationCondition.infeasible:
+                    results.solver.phases = timer.summary()
+                    results.solver.wallclock_time = time.time() - start_time
+                    self._store_in_cache(model, results)
+                    return results
 
-        #if self.config.mip_options is not None:
-        #    opt.options.update(self.config.mip_options)
-        pyomo_results = opt.solve(M, tee=self.config.tee, 
-                                     load_solutions=self.config.load_solutions)
-        pyomo.opt.check_optimal_termination(pyomo_results)
+            bounds = None
+            if self.config.compute_bigm:
+                with timer.phase('compute_bigm'):
+                    bounds = compute_bigm(self.standard_form, default=self.config.bigm,
+                                          time_limit=self._remaining_time(start_time))
+                results.solver.bigm_defaults = bounds.defaults
+                results.solver.bigm_valid = bounds.valid
+                if not bounds.valid:
+                    logger.warning("The bounding LPs did not bound %d big-M values, so the bigm value %g is used for them, and the solution is not certified to be optimal" % (bounds.defaults, self.config.bigm))
+            elif self.config.adaptive_bigm:
+                bounds = uniform_bigm(self.standard_form, self.config.bigm)
 
-        self._initialize_results(results, pyomo_results, M)
-        results.solver.rc = getattr(opt, '_rc', None)
+            if self.config.mip_solver == 'scipy-highs':
+                #
+                # Solve the big-M MILP directly, without creating a Pyomo model
+                #
+                self._solve_scipy(model, results, start_time, timer, bounds)
+                self._update_bound(results, bound)
+                results.solver.phases = timer.summary()
+                results.solver.wallclock_time = time.time() - start_time
+                self._store_in_cache(model, results)
+                return results
 
-        if self.config.load_solutions:
-            # Load results from the Pyomo model to the LinearMultilevelProblem
-            results.copy_solution(From=M, To=model)
-        else:
-            # Load results from the Pyomo model to the Results
-            results.load_from(pyomo_results)
+            #
+            # Solve the Pyomo model the specified solver
+            #
+            opt = scipy_util.create_solver(self.config.mip_solver)
+
+            #if self.config.mip_options is not None:
+            #    opt.options.update(self.config.mip_options)
+            iterations = 0
+            active = 0
+            previous = None
+            try:
+                while True:
+                    M = self._create_pyomo_model(self.standard_form, self.config.bigm, timer, bounds)
+                    kwds = {}
+                    if previous is not None and getattr(opt, 'warm_start_capable', lambda: False)():
+                        #
+                        # Start from the solution of the previous MIP
+                        #
+                        self._load_warmstart(M, previous)
+                        kwds['warmstart'] = True
+                    with timer.phase('solve'):
+                        pyomo_results = pyomo_util.solve_with_time_limit(opt, M, self._remaining_time(start_time),
+                                                 tee=self.config.tee, 
+                                                 load_solutions=self.config.load_solutions and not self.config.adaptive_bigm,
+                                                 **kwds)
+                    rc = getattr(opt, '_rc', None)
+                    if not self.config.adaptive_bigm or pyomo_results is None:
+                        break
+                    #
+                    # Enlarge the active big-M values, and solve again
+                    #
+                    tc = pyomo_util.pyomo2pao_termination_condition(pyomo_results.solver.termination_condition)
+                    if tc == pao.common.TerminationCondition.infeasible:
+                        values = None
+                    elif len(pyomo_results.solution) > 0:
+                        M.solutions.load_from(pyomo_results)
+                        values = self._complementarity_values(M, bounds)
+                        previous, previous_tc = M, tc
+                    else:
+                        break
+                    active = 0 if bounds.valid else active_bigm(bounds, values)
+                    if active == 0 or iterations == self.config.max_bigm_iterations:
+                        break
+                    update_bigm(bounds, values, growth=self.config.bigm_growth)
+                    iterations += 1
+            finally:
+                scipy_util.release_solver(opt)
+            if pyomo_results is None or (previous is not None and previous is not M):
+                #
+                # The time limit expired before the MIP solver returned, or the
+                # last MIP did not return a solution.  The solution of the
+                # previous MIP is reported.
+                #
+                results.solver.name = self.config.mip_solver
+                if pyomo_results is None:
+                    tc = pao.common.TerminationCondition.maxTimeLimit
+                else:
+                    tc = pyomo_util.pyomo2pao_termination_condition(pyomo_results.solver.termination_condition)
+                if previous is not None and tc != pao.common.TerminationCondition.maxTimeLimit:
+                    tc = previous_tc
+                results.solver.termination_condition = tc
+                if previous is not None:
+                    results.solver.best_feasible_objective = pe.value(previous.o)
+                    if self.config.load_solutions:
+                        with timer.phase('copy_solution'):
+                            results.copy_solution(From=previous, To=model)
+                if self.config.adaptive_bigm:
+                    self._report_bigm(results, bounds, iterations, active)
+                self._update_bound(results, bound)
+                results.solver.phases = timer.summary()
+                results.solver.wallclock_time = time.time() - start_time
+                return results
+            pyomo.opt.check_optimal_termination(pyomo_results)
+
+            self._initialize_results(results, pyomo_results, M)
+            if self.config.adaptive_bigm:
+                self._report_bigm(results, bounds, iterations, active)
+            self._update_bound(results, bound)
+            results.solver.rc = rc
+
+            with timer.phase('copy_solution'):
+                if self.config.load_solutions:
+                    # Load results from the Pyomo model to the LinearMultilevelProblem
+                    results.copy_solution(From=M, To=model)
+                else:
+                    # Load results from the Pyomo model to the Results
+                    results.load_from(pyomo_results)
 
-        #self._debug(M)
-        #results.solver.log = getattr(opt, '_log', None)
+            #self._debug(M)
+            #results.solver.log = getattr(opt, '_log', None)
 
-        results.solver.wallclock_time = time.time() - start_time
+            results.solver.phases = timer.summary()
+            results.solver.wallclock_time = time.time() - start_time
+            self._store_in_cache(model, results)
+            return results
+
+    def _solve_scipy(self, model, results, start_time, timer, bounds=None):
+        #
+        # scipy.optimize.milp does not accept a starting point, so the
+        # MILP is solved from scratch when big-M values are enlarged
+        #
+        iterations = 0
+        active = 0
+        incumbent = None
+        while True:
+            with timer.phase('create_milp'):
+                milp = create_bigm_milp(self.standard_form, self.config.bigm, bounds)
+            with timer.phase('solve'):
+                ans = scipy_util.solve_milp(milp.c, milp.A, milp.cl, milp.cu, milp.lb, milp.ub,
+                                        integrality=milp.integrality,
+                                        time_limit=self._remaining_time(start_time),
+                                        tee=self.config.tee)
+            if ans.x is not None:
+                incumbent = (milp, ans)
+            if not self.config.adaptive_bigm:
+                break
+            if ans.x is not None:
+                values = milp.complementarity(ans.x)
+            elif ans.termination_condition == pao.common.TerminationCondition.infeasible:
+                values = None
+            else:
+                break
+            active = 0 if bounds.valid else active_bigm(bounds, values)
+            if active == 0 or iterations == self.config.max_bigm_iterations:
+                break
+            update_bigm(bounds, values, growth=self.config.bigm_growth)
+            iterations += 1
+        timed_out = ans.termination_condition == pao.common.TerminationCondition.maxTimeLimit
+        if incumbent is not None:
+            #
+            # If the last MILP does not return a solution, then the
+            # solution of the previous MILP is reported with its
+            # termination condition, unless the time limit expired
+            #
+            milp, ans = incumbent
+        solv = results.solver
+        solv.name = self.config.mip_solver
+        solv.termination_condition = pao.common.TerminationCondition.maxTimeLimit if timed_out else ans.termination_condition
+        solv.solver_time = ans.time
+        if ans.best_objective_bound is not None:
+            solv.best_objective_bound = ans.best_objective_bound + milp.d
+        if incumbent is not None:
+            solv.best_feasible_objective = ans.fun + milp.d
+            if self.config.load_solutions:
+                with timer.phase('copy_solution'):
+                    results.copy_solution(From=milp.solution(ans.x), To=model)
+        if self.config.adaptive_bigm:
+            self._report_bigm(results, bounds, iterations, active)
         return results
 
+    def _report_bigm(self, results, bounds, iterations, active):
+        #
+        # Big-M values that are not computed by the bounding LPs may cut
+        # off the optimal solution, even if none of them is active.  So
+        # the solution is reported as feasible, and the bound from the MIP
+        # is not reported.
+        #
+        solv = results.solver
+        solv.bigm_iterations = iterations
+        solv.bigm_active = active
+        if active > 0:
+            logger.warning("The adaptive big-M loop stopped with %d active big-M values, so the solution may not be optimal" % active)
+        if not bounds.valid:
+            if solv.termination_condition == pao.common.TerminationCondition.optimal:
+                solv.termination_condition = pao.common.TerminationCondition.feasible
+            solv.best_objective_bound = None
+
+    def _update_bound(self, results, bound):
+        #
+        # Report the bound from the high-point relaxation if the MIP
+        # solver terminated without a better bound
+        #
+        solv = results.solver
+        if bound is None or solv.termination_condition == pao.common.TerminationCondition.optimal:
+            return
+        if solv.get('best_objective_bound', None) is None or solv.best_objective_bound < bound:
+            solv.best_objective_bound = bound
+
     def _initialize_results(self, results, pyomo_results, M):
         #
         # SOLVER
@@ -122,7 +507,9 @@ class LinearMultilevelSolver_FA(LinearMultilevelSolverBase):
         if hasattr(pyomo_results.solver, 'time'):
             solv.solver_time = pyomo_results.solver.time
         if self.config.load_solutions:
-            solv.best_feasible_objective = pe.value(M.o)
+            solv.best_feasible_objective = pe.value(M.o, exception=False)
+        if solv.termination_condition == pao.common.TerminationCondition.maxTimeLimit:
+            solv.best_objective_bound = pyomo_results.problem.lower_bound
         #
         # PROBLEM - Maybe this should be the summary of the BLP itself?
         #
@@ -137,8 +524,11 @@ class LinearMultilevelSolver_FA(LinearMultilevelSolverBase):
         #prob.sense = 'minimize'
         return results
 
-    def _create_pyomo_model(self, repn, bigM):
-        M = create_model_replacing_LL_with_kkt(repn)
+    def _create_pyomo_model(self, repn, bigM, timer=None, bounds=None):
+        if timer is None:
+            timer = pao.common.PhaseTimer()
+        with timer.phase('create_pyomo_model'):
+            M = create_model_replacing_LL_with_kkt(repn)
         #
         # Transform the problem to a MIP
         #
@@ -146,13 +536,59 @@ class LinearMultilevelSolver_FA(LinearMultilevelSolverBase):
         # Pyomo transformations in sequence creates a model object that is
         # difficult to interpret.
         #
-        xfrm = pe.TransformationFactory('mpec.simple_disjunction')
-        xfrm.apply_to(M)
-        xfrm = pe.TransformationFactory('gdp.bigm')
-        xfrm.apply_to(M, bigM=bigM)
+        with timer.phase('transform'):
+            xfrm = pe.TransformationFactory('mpec.simple_disjunction')
+            xfrm.apply_to(M)
+            if bounds is not None:
+                bigM = self._bigm_map(M, bounds)
+            xfrm = pe.TransformationFactory('gdp.bigm')
+            xfrm.apply_to(M, bigM=bigM)
 
         return M
 
+    def _bigm_map(self, M, bounds):
+        #
+        # The complementarity conditions for the lower bounds and then the
+        # upper bounds of each lower level are transformed into disjunctions
+        # where expr1 fixes the multiplier to zero and expr2 fixes the slack
+        # to zero.  The big-M value for expr1 bounds the multiplier, and the
+        # big-M value for expr2 bounds the slack.
+        #
+        bigM = {}
+        for i, B in enumerate(bounds.levels):
+            slackness = M.kkt[i].slackness
+            for k, (Mx, Mlam) in enumerate(zip(np.concatenate((B.xl, B.xu)), np.concatenate((B.nu, B.mu)))):
+                bigM[slackness[k+1].expr1] = float(Mlam)
+                bigM[slackness[k+1].expr2] = float(Mx)
+        return bigM
+
+    def _complementarity_values(self, M, bounds):
+        #
+        # The values of the slacks and multipliers of each lower level in
+        # the solution of the Pyomo model
+        #
+        values = []
+        for i, (L, B) in enumerate(zip(self.standard_form.U.LL, bounds.levels)):
+            x = np.array([pe.value(M.L[i].xR[j]) for j in range(L.x.nxR)], dtype=np.float64)
+            values.append(Munch(xl=x[B.jl] - L.x.lower_bounds[B.jl],
+                                xu=L.x.upper_bounds[B.ju] - x[B.ju],
+                                nu=[pe.value(M.kkt[i].nu[j]) for j in B.jl],
+                                mu=[pe.value(M.kkt[i].mu[j]) for j in B.ju]))
+        return values
+
+    def _load_warmstart(self, M, previous):
+        #
+        # Copy the variable values from the previous model.  Both models
+        # are created from the same problem, so their variables are
+        # declared in the same order.
+        #
+        variables = list(M.component_data_objects(pe.Var, descend_into=True))
+        previous_variables = list(previous.component_data_objects(pe.Var, descend_into=True))
+        assert (len(variables) == len(previous_variables)), "The warm start model has %d variables, but the model has %d variables" % (len(previous_variables), len(variables))
+        for v, w in zip(previous_variables, variables):
+            if v.value is not None:
+                w.set_value(v.value, skip_validation=True)
+
     def _debug(self, M):    # pragma: no cover
         for j in M.U.xR:
             print("U",j,pe.value(M.U.xR[j]))
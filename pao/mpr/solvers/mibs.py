@@ -10,11 +10,15 @@
 import os
 import sys
 import time
+import shutil
+import tempfile
+import contextlib
 import numpy as np
 import pyutilib
 import pyomo.environ as pe
 import pyomo.opt
 from pyomo.common.config import ConfigBlock, ConfigValue
+from munch import Munch
 #from pyomo.mpec import ComplementarityList, complements
 
 import pao.common
@@ -60,46 +64,103 @@ class LinearMultilevelSolver_MIBS(LinearMultilevelSolverBase):
         assert (len(model.U.LL) == 1), "Can only solve a bilevel problem with a single lower-level"
 
     def solve(self, model, **options):
+        self._update_config(options)
+        with self._presolve(model, self.config()) as state:
+            if state.results is not None:
+                return state.results
+            with state.timer.phase('solve'):
+                ans = pao.common.run_shellcmd(state.cmd, tee=state.config.tee, time_limit=self._remaining_time(state.start_time, state.config))
+            return self._postsolve(model, ans, state)
+
+    async def solve_async(self, model, log_callback=None, **options):
+        """
+        Executes MibS asynchronously and loads the solution into the model.
+
+        MibS is executed with asyncio.create_subprocess_exec, so
+        concurrent solves do not block the event loop.  If the awaiting
+        task is cancelled, then the MibS process is killed.  The options
+        only apply to this solve, so concurrent solves with different
+        options can share this solver.
+
+        Parameters
+        ----------
+        model
+            The model that is being optimized.
+        log_callback
+            A function that is called with each line of the MibS output.
+        options
+            Keyword options that are used to configure the solver.
+
+        Returns
+        -------
+        Results
+            A summary of the optimization results.
+        """
+        config = self.config()
+        self._update_config(options, config=config)
+        with self._presolve(model, config) as state:
+            if state.results is not None:
+                return state.results
+            with state.timer.phase('solve'):
+                ans = await pao.common.run_shellcmd_async(state.cmd, tee=state.config.tee, time_limit=self._remaining_time(state.start_time, state.config), log_callback=log_callback)
+            return self._postsolve(model, ans, state)
+
+    @contextlib.contextmanager
+    def _presolve(self, model, config):
+        #
+        # Yields the state of a single solve, so concurrent solves do not
+        # share state through this solver.  The MibS input files are
+        # deleted and the timer is stopped when the solve finishes.
         #
         # Error checks
         #
         self.check_model(model)
         #
-        # Process keyword options
+        # Return cached results
         #
-        self._update_config(options)
+        state = Munch(config=config, results=self._load_from_cache(model, config))
+        if state.results is not None:
+            yield state
+            return
         #
         # Start clock
         #
-        start_time = time.time()
-
-        self.standard_form, soln_manager = convert_to_standard_form(model, inequalities=True)
-
-        #
-        # Write the MPS file and MIBS auxilliary file
-        #
-        # TODO - Make these temporary files
-        #
-        M = self.create_mibs_model(model, "mibs.mps", "mibs.aux")
+        state.start_time = time.time()
+        with pao.common.PhaseTimer(memory=config.profile_memory) as state.timer:
+            with state.timer.phase('convert_to_standard_form'):
+                state.standard_form, soln_manager = convert_to_standard_form(model, inequalities=True)
+            #
+            # Write the MPS file and MIBS auxilliary file in a temporary
+            # directory
+            #
+            tmpdir = tempfile.mkdtemp(prefix='pao_mibs_')
+            try:
+                mps_filename = os.path.join(tmpdir, "mibs.mps")
+                aux_filename = os.path.join(tmpdir, "mibs.aux")
+                with state.timer.phase('write_files'):
+                    self.create_mibs_model(model, mps_filename, aux_filename)
 
-        cmd = [ self.config['executable'], '-Alps_instance', 'mibs.mps', '-MibS_auxiliaryInfoFile', 'mibs.aux']
-        if self.config['param_file'] is not None:
-            cmd.append('-param')
-            cmd.append('mibs.par')
+                state.cmd = [ config['executable'], '-Alps_instance', mps_filename, '-MibS_auxiliaryInfoFile', aux_filename]
+                if config['param_file'] is not None:
+                    state.cmd.append('-param')
+                    state.cmd.append('mibs.par')
+                yield state
+            finally:
+                shutil.rmtree(tmpdir)
 
-        ans = pao.common.run_shellcmd(cmd, tee=self.config['tee'])
-        os.remove("mibs.mps")
-        os.remove("mibs.aux")
+    def _postsolve(self, model, ans, state):
         #print("RC", ans.rc)
         #print("LOG", ans.log)
-
-        results = self._initialize_results(ans, model)
+        with state.timer.phase('copy_solution'):
+            results = self._initialize_results(ans, model, state.config)
         results.check_optimal_termination()
 
-        results.solver.wallclock_time = time.time() - start_time
+        results.solver.phases = state.timer.summary()
+        results.solver.wallclock_time = time.time() - state.start_time
+        self._store_in_cache(model, results, state.config)
         return results
 
-    def _initialize_results(self, ans, M):
+    def _initialize_results(self, ans, M, config):
         #
         # Default value is zero
         #
@@ -111,8 +172,10 @@ class LinearMultilevelSolver_MIBS(LinearMultilevelSolverBase):
         results = pao.common.Results()
         solv = results.solver
         solv.termination_condition = pao.common.TerminationCondition.unknown
-        solv.name = self.config['executable']
+        solv.name = config['executable']
         solv.rc = ans.rc
+        if ans.timed_out:
+            solv.termination_condition = pao.common.TerminationCondition.maxTimeLimit
         #
         # Parse Log
         #
@@ -192,15 +255,16 @@ class LinearMultilevelSolver_MIBS(LinearMultilevelSolverBase):
         #---------------------------------------------------
         # TODO - get variable mapping information
         #
-        M.write("tmp.mps")
+        tmp_filename = os.path.join(os.path.dirname(mps_filename), "tmp.mps")
+        M.write(tmp_filename)
         #
         # Add a space after "BOUND"
         #
-        with open("tmp.mps", "r") as INPUT:
+        with open(tmp_filename, "r") as INPUT:
             with open(mps_filename, "w") as OUTPUT:
                 for line in INPUT:
                     OUTPUT.write(line.replace("BOUND ", "BOUND  "))
-        os.remove("tmp.mps")
+        os.remove(tmp_filename)
 
         with open(aux_filename, "w") as OUTPUT:
             # Num lower-level variables
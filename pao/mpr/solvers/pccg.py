@@ -41,7 +41,7 @@ class LinearMultilevelSolver_PCCG(LinearMultilevelSolverBase):
     config = LinearMultilevelSolverBase.config()
     config.declare('mip_solver', ConfigValue(
         default='cbc',
-        description="The MIP solver used by PCCG.  (default is cbc)"
+        description="The MIP solver used by PCCG.  If this is 'scipy-highs', then the MIPs are solved in-process with scipy.optimize.milp.  (default is cbc)"
         ))
     #config.declare('mip_options', ConfigValue(
     #    default=None,
@@ -76,6 +76,20 @@ class LinearMultilevelSolver_PCCG(LinearMultilevelSolverBase):
         domain=bool,
         description="If False, then enable verbose solver output. (default is True)"
         ))
+    config.declare('highpoint', ConfigValue(
+        default=False,
+        domain=bool,
+        description="If True, then the high-point relaxation is solved in-process to initialize the lower bound.  The solver terminates if the relaxation is infeasible.  (default is False)"
+        ))
+    config.declare('decompose', ConfigValue(
+        default=False,
+        domain=bool,
+        description="If True, then the lower-level problem in subproblem 1 is split into the independent blocks of its constraints, which are solved separately.  These blocks are solved in parallel with the scipy-highs solver.  (default is False)"
+        ))
+    config.declare('callback', ConfigValue(
+        default=None,
+        description="A function that is called with the record of each iteration.  The records are also stored in results.solver.iterations. (default is None)"
+        ))
 
     def __init__(self, **kwds):
         super().__init__(name='pao.mpr.PCCG')
@@ -101,40 +115,68 @@ class LinearMultilevelSolver_PCCG(LinearMultilevelSolverBase):
         #
         self._update_config(config_options)
         #
+        # Return cached results
+        #
+        results = self._load_from_cache(mpr)
+        if results is not None:
+            return results
+        #
         # Start clock
         #
         start_time = time.time()
+        with pao.common.PhaseTimer(memory=self.config.profile_memory) as timer:
 
-        # PCCG requires a standard form with inequalities and 
-        # a maximization lower-level
-        self.standard_form, soln_manager = convert_to_standard_form(mpr, inequalities=True)
-        convert_sense(self.standard_form.U.LL, minimize=False)
-        convert_binaries_to_integers(self.standard_form)
+            # PCCG requires a standard form with inequalities and 
+            # a maximization lower-level
+            with timer.phase('convert_to_standard_form'):
+                self.standard_form, soln_manager = convert_to_standard_form(mpr, inequalities=True)
+                convert_sense(self.standard_form.U.LL, minimize=False)
+                convert_binaries_to_integers(self.standard_form)
         
-        results = LinearMultilevelResults(solution_manager=soln_manager)
-
-        UxR, UxZ, LxR, LxZ = execute_PCCG_solver(self.standard_form, self.config, results)
-        xR = {mpr.U.id:UxR, mpr.U.LL[0].id:LxR}
-        xZ = {mpr.U.id:UxZ, mpr.U.LL[0].id:LxZ}
-
-        if False:
-            print("UxR")
-            for i in UxR:
-                print(i, UxR[i].value)
-            print("UxZ")
-            for i in UxZ:
-                print(i, UxZ[i].value)
-            print("LxR")
-            for i in LxR:
-                print(i, LxR[i].value)
-            print("LxZ")
-            for i in LxZ:
-                print(i, LxZ[i].value)
-
-        results.copy_solution(From=Munch(LxR=xR, LxZ=xZ), To=mpr)
-
-        results.solver.wallclock_time = time.time() - start_time
-        return results
+            results = LinearMultilevelResults(solution_manager=soln_manager)
+
+            bound = None
+            if self.config.highpoint:
+                bound = self._solve_highpoint_relaxation(self.standard_form, results, start_time, timer)
+                if results.solver.termination_condition == pao.common.TerminationCondition.infeasible:
+                    results.solver.phases = timer.summary()
+                    results.solver.wallclock_time = time.time() - start_time
+                    self._store_in_cache(mpr, results)
+                    return results
+
+            UxR, UxZ, LxR, LxZ = execute_PCCG_solver(self.standard_form, self.config, results,
+                                                     time_limit=self._remaining_time(start_time),
+                                                     timer=timer, lower_bound=bound)
+            xR = {mpr.U.id:UxR, mpr.U.LL[0].id:LxR}
+            xZ = {mpr.U.id:UxZ, mpr.U.LL[0].id:LxZ}
+
+            if False:
+                print("UxR")
+                for i in UxR:
+                    print(i, UxR[i].value)
+                print("UxZ")
+                for i in UxZ:
+                    print(i, UxZ[i].value)
+                print("LxR")
+                for i in LxR:
+                    print(i, LxR[i].value)
+                print("LxZ")
+                for i in LxZ:
+                    print(i, LxZ[i].value)
+
+            #
+            # A solution is not available if the time limit expired before
+            # the first master problem was solved.
+            #
+            if all(v.value is not None for X in (UxR, UxZ, LxR, LxZ) for v in X.values()):
+                with timer.phase('copy_solution'):
+                    results.copy_solution(From=Munch(LxR=xR, LxZ=xZ), To=mpr)
+
+            results.solver.phases = timer.summary()
+
+            results.solver.wallclock_time = time.time() - start_time
+            self._store_in_cache(mpr, results)
+            return results
 
 
 pao.common.SolverAPI._generate_solve_docstring(LinearMultilevelSolver_PCCG)
@@ -10,13 +10,19 @@ This algorithm seeks to solve the following bilevel MILP:
     s.t. AR*xu + AZ*yu + BR*xl0 + BZ* yl0 <= r
      (xl0,yl0) in argmax {wR*xl+wZ*yl: PR*xl+PZ*yl<=s-QR*xu-QZ*yu}
 '''
+import os
 import time
+import concurrent.futures
+from munch import Munch
 
 from pyomo.environ import *
 from pyomo.gdp import *
 from pyomo.mpec import *
 
+import pao.common
 from . import pyomo_util
+from . import scipy_util
+from ..decompose import lower_level_components
 
 
 infinity = float('inf')
@@ -37,10 +43,14 @@ def array2dict(m, start=0, stop=None):
     return {i+offset-start:float(m[i]) for i in range(len(m)) if i>=start and i<stop}
 
 
-def create_pyomo_model(mpr, M):
+def create_pyomo_model(mpr, M, components=None):
     '''
     Parameter Import
 
+    If components is not None, then it is a list of the (rows, cols)
+    blocks of the lower-level constraints, and subproblem 1 is created
+    as a separate block for each of them.
+
     Notation:
     m is for upper level
     n is for lower level
@@ -285,11 +295,33 @@ def create_pyomo_model(mpr, M):
         return Parent.zero <= Parent.s[i] -value
 
 
-    Parent.sub1=Block()   
-    Parent.sub1.xl=Var(Parent.nRset, within=NonNegativeReals)
-    Parent.sub1.yl=Var(Parent.nZset, within=NonNegativeIntegers)
-    Parent.sub1.theta=Objective(rule=sub1_obj,sense=maximize)
-    Parent.sub1.c1=Constraint(Parent.nLset,rule=sub1_c1)
+    def sub1_block(B, k):
+        rows, cols = components[k]
+        Rset = [int(j)+offset for j in cols if j < nR]
+        Zset = [int(j)-nR+offset for j in cols if j >= nR]
+
+        def c1(B, i):
+            value=(sum(Parent.PR[(i,j)]*B.xl[j] for j in Rset)+
+                   sum(Parent.PZ[(i,j)]*B.yl[j] for j in Zset)+
+                   sum(Parent.QR[(i,j)]*Parent.xu_star[j] for j in Parent.mRset)+
+                   sum(Parent.QZ[(i,j)]*Parent.yu_star[j] for j in Parent.mZset))
+            return Parent.zero <= Parent.s[i] -value
+
+        B.xl=Var(Rset, within=NonNegativeReals)
+        B.yl=Var(Zset, within=NonNegativeIntegers)
+        B.theta=Objective(expr=sum(Parent.wR[j]*B.xl[j] for j in Rset)+
+                               sum(Parent.wZ[j]*B.yl[j] for j in Zset), sense=maximize)
+        B.c1=Constraint([int(i)+offset for i in rows], rule=c1)
+
+    if components is None:
+        Parent.sub1=Block()   
+        Parent.sub1.xl=Var(Parent.nRset, within=NonNegativeReals)
+        Parent.sub1.yl=Var(Parent.nZset, within=NonNegativeIntegers)
+        Parent.sub1.theta=Objective(rule=sub1_obj,sense=maximize)
+        Parent.sub1.c1=Constraint(Parent.nLset,rule=sub1_c1)
+    else:
+        # The lower-level problem separates into independent blocks
+        Parent.sub1=Block(range(len(components)), rule=sub1_block)
 
 
 
@@ -446,8 +478,48 @@ def check_termination(LB, UB, atol, rtol, quiet):
     return 0
 
 
-def execute_PCCG_solver(mpr, config, results):
+def solver_status(res):
+    if res is None:
+        return pyomo_util.pyomo2pao_termination_condition(TerminationCondition.maxTimeLimit)
+    return pyomo_util.pyomo2pao_termination_condition(res.solver.termination_condition)
+
+def timed_solve(opt, block, time_limit, timer, phase):
+    start = time.time()
+    with timer.phase(phase):
+        res = pyomo_util.solve_with_time_limit(opt, block, time_limit)
+    return res, time.time() - start
+
+def timed_solve_blocks(opt, blocks, time_limit, timer, phase):
+    '''
+    Solve independent blocks, and return the results of the first block
+    that is not solved to optimality, or else the results of the last
+    block.  The in-process HiGHS solver releases the GIL, so the blocks
+    are solved in parallel threads with that solver.  Other solvers are
+    executed serially.
+    '''
+    start = time.time()
+    def solve(block):
+        return pyomo_util.solve_with_time_limit(opt, block, None if time_limit is None else time_limit - (time.time() - start))
+    with timer.phase(phase):
+        if isinstance(opt, scipy_util.ScipySolver) and len(blocks) > 1:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(blocks), os.cpu_count() or 1)) as executor:
+                res = list(executor.map(solve, blocks))
+        else:
+            res = [solve(block) for block in blocks]
+    for r in res:
+        if r is None or r.solver.termination_condition != TerminationCondition.optimal:
+            return r, time.time() - start
+    return res[-1], time.time() - start
+
+def block_size(block):
+    return sum(1 for v in block.component_data_objects(Var, active=True, descend_into=True)), \
+           sum(1 for c in block.component_data_objects(Constraint, active=True, descend_into=True))
+
+
+def execute_PCCG_solver(mpr, config, results, time_limit=None, timer=None, lower_bound=None):
     t = time.time()
+    if timer is None:
+        timer = pao.common.PhaseTimer()
 
     #These parameters can be changed for your specific problem
     epsilon = get_value(config, 'epsilon', 1e-4) #For use in disjunction approximation
@@ -457,116 +529,188 @@ def execute_PCCG_solver(mpr, config, results):
     M       = get_value(config, 'bigm', 1e6)    #upper bound on variables
     solver  = config.mip_solver                 # MIP solver to use here
     quiet   = config.quiet                      # If True, then suppress output
+    callback= get_value(config, 'callback', None)  # Called with the record of each iteration
+    decompose=get_value(config, 'decompose', False) # If True, then subproblem 1 is decomposed
 
-    LB=-infinity
+    LB=-infinity if lower_bound is None else lower_bound   #A bound from a relaxation, e.g. the high-point relaxation
     UB=infinity
     k=0
      
     flag=0
-
-    Parent = create_pyomo_model(mpr, M)
+    timed_out=False
+
+    def remaining_time():
+        if time_limit is None:
+            return None
+        return time_limit - (time.time() - t)
+
+    #Per-iteration trace of the bounds, solve times and solver status
+    results.solver.iterations = []
+
+    def finish_iteration(record):
+        record.LB = LB
+        record.UB = UB
+        record.elapsed = time.time() - t
+        results.solver.iterations.append(record)
+        if callback is not None:
+            callback(record)
+
+    components = None
+    if decompose:
+        with timer.phase('decompose'):
+            components = lower_level_components(mpr.U.LL[0])
+        results.solver.lower_level_blocks = len(components)
+        if len(components) == 1:
+            components = None
+
+    with timer.phase('create_pyomo_model'):
+        Parent = create_pyomo_model(mpr, M, components=components)
+    sub1 = [Parent.sub1] if components is None else list(Parent.sub1.values())
 
     bigm_xfrm = TransformationFactory('gdp.bigm')
 
     #Step 1: Initialization (done)
-    if isinstance(solver, str):
-        opt = SolverFactory(solver)
-    else:
-        opt = solver
+    opt = scipy_util.create_solver(solver)
 
     #Iteration
-    while k < maxit:
-        #Step 2: Solve the Master Problem
-        TransformationFactory('mpec.simple_disjunction').apply_to(Parent.Master)
-        bigm_xfrm.apply_to(Parent.Master) 
-        res = opt.solve(Parent.Master)
-        if res.solver.termination_condition !=TerminationCondition.optimal:
-            raise RuntimeError("ERROR! ERROR! Master: Could not find optimal solution")
-
-        for i in Parent.xu_star:
-            Parent.xu_star[i]=Parent.Master.xu[i].value    
-        for i in Parent.yu_star:
-            Parent.yu_star[i]=Parent.Master.yu[i].value    
-        for i in Parent.xl0_star:
-            Parent.xl0_star[i]=Parent.Master.xl0[i].value
-        for i in Parent.yl0_star:
-            Parent.yl0_star[i]=Parent.Master.yl0[i].value
-
-        LB=value(Parent.Master.Theta_star) 
-        if not quiet:
-            print(f'Iteration {k}: Master Obj={LB} UB={UB}')
-
-        #Step 3: Terminate?
-        flag = check_termination(LB, UB, atol, rtol, quiet)
-        if flag:
-            elapsed = time.time() - t
-            break
-
-        if not quiet:
-            print("Step 4")
-        #Step 4: Solve first subproblem
-        results1=opt.solve(Parent.sub1) 
+    #The pooled solver is released even if an exception is raised
+    try:
+        while k < maxit:
+            #Stop between iterations if the time limit has expired
+            if time_limit is not None and remaining_time() <= 0:
+                timed_out = True
+                break
+            #Step 2: Solve the Master Problem
+            with timer.phase('transform'):
+                TransformationFactory('mpec.simple_disjunction').apply_to(Parent.Master)
+                bigm_xfrm.apply_to(Parent.Master) 
+            record = Munch(iteration=k, master_objective=None,
+                           master_time=None, sub1_time=None, sub2_time=None,
+                           master_termination=None, sub1_termination=None, sub2_termination=None)
+            record.master_nvariables, record.master_nconstraints = block_size(Parent.Master)
+            res, record.master_time = timed_solve(opt, Parent.Master, remaining_time(), timer, 'solve_master')
+            record.master_termination = solver_status(res)
+            if res is None or res.solver.termination_condition == TerminationCondition.maxTimeLimit:
+                timed_out = True
+                finish_iteration(record)
+                break
+            if res.solver.termination_condition !=TerminationCondition.optimal:
+                raise RuntimeError("ERROR! ERROR! Master: Could not find optimal solution")
+
+            for i in Parent.xu_star:
+                Parent.xu_star[i]=Parent.Master.xu[i].value    
+            for i in Parent.yu_star:
+                Parent.yu_star[i]=Parent.Master.yu[i].value    
+            for i in Parent.xl0_star:
+                Parent.xl0_star[i]=Parent.Master.xl0[i].value
+            for i in Parent.yl0_star:
+                Parent.yl0_star[i]=Parent.Master.yl0[i].value
+
+            LB=value(Parent.Master.Theta_star) 
+            record.master_objective = LB
+            if not quiet:
+                print(f'Iteration {k}: Master Obj={LB} UB={UB}')
+
+            #Step 3: Terminate?
+            flag = check_termination(LB, UB, atol, rtol, quiet)
+            if flag:
+                elapsed = time.time() - t
+                finish_iteration(record)
+                break
+
+            if not quiet:
+                print("Step 4")
+            #Step 4: Solve first subproblem
+            results1, record.sub1_time = timed_solve_blocks(opt, sub1, remaining_time(), timer, 'solve_sub1')
+            record.sub1_termination = solver_status(results1)
+            if results1 is None or results1.solver.termination_condition == TerminationCondition.maxTimeLimit:
+                timed_out = True
+                finish_iteration(record)
+                break
         
-        if results1.solver.termination_condition !=TerminationCondition.optimal:
-            raise RuntimeError("ERROR! ERROR! Subproblem 1: Could not find optimal solution")
-        Parent.theta=value(Parent.sub1.theta)
-
-        for i in Parent.xl_hat:
-            Parent.xl_hat[i]=Parent.sub1.xl[i].value 
-        for i in Parent.yl_hat:
-            Parent.yl_hat[i]=int(round(Parent.sub1.yl[i].value)) 
+            if results1.solver.termination_condition !=TerminationCondition.optimal:
+                raise RuntimeError("ERROR! ERROR! Subproblem 1: Could not find optimal solution")
+            Parent.theta=sum(value(B.theta) for B in sub1)
+
+            for B in sub1:
+                for i in B.xl:
+                    Parent.xl_hat[i]=B.xl[i].value 
+                for i in B.yl:
+                    Parent.yl_hat[i]=int(round(B.yl[i].value)) 
         
-        if not quiet:
-            print("Step 5")
-        #Step 5: Solve second subproblem
-        results2=opt.solve(Parent.sub2)
+            if not quiet:
+                print("Step 5")
+            #Step 5: Solve second subproblem
+            results2, record.sub2_time = timed_solve(opt, Parent.sub2, remaining_time(), timer, 'solve_sub2')
+            record.sub2_termination = solver_status(results2)
+            if results2 is None or results2.solver.termination_condition == TerminationCondition.maxTimeLimit:
+                timed_out = True
+                finish_iteration(record)
+                break
         
-        if results2.solver.termination_condition==TerminationCondition.optimal: #If Optimal
-            for i in Parent.xl_star:
-                Parent.xl_star[i]=Parent.sub2.xl[i].value
-            for i in Parent.yl_star:
-                Parent.yl_star[i]=int(round(Parent.sub2.yl[i].value))
-                Parent.yl_arc[i]=int(round(Parent.sub2.yl[i].value))
-            Parent.Theta_0=value(Parent.sub2.Theta_0)
+            if results2.solver.termination_condition==TerminationCondition.optimal: #If Optimal
+                for i in Parent.xl_star:
+                    Parent.xl_star[i]=Parent.sub2.xl[i].value
+                for i in Parent.yl_star:
+                    Parent.yl_star[i]=int(round(Parent.sub2.yl[i].value))
+                    Parent.yl_arc[i]=int(round(Parent.sub2.yl[i].value))
+                Parent.Theta_0=value(Parent.sub2.Theta_0)
 
      
-            UB=min(UB,value(UBnew(Parent)))
+                UB=min(UB,value(UBnew(Parent)))
             
-        elif results2.solver.termination_condition==TerminationCondition.infeasible or results2.solver.termination_condition==TerminationCondition.infeasibleOrUnbounded: #If infeasible
-            for i in Parent.yl_arc:
-                Parent.yl_arc[i]=Parent.yl_hat[i]  
-        else: 
-             raise RuntimeError("ERROR! Unexpected termination condition for Subproblem2: %s.  Expected an infeasible or optimal solution." % str(results2.solver.termination_condition)) 
+            elif results2.solver.termination_condition==TerminationCondition.infeasible or results2.solver.termination_condition==TerminationCondition.infeasibleOrUnbounded: #If infeasible
+                for i in Parent.yl_arc:
+                    Parent.yl_arc[i]=Parent.yl_hat[i]  
+            else: 
+                 raise RuntimeError("ERROR! Unexpected termination condition for Subproblem2: %s.  Expected an infeasible or optimal solution." % str(results2.solver.termination_condition)) 
         
-        if not quiet:
-            print("Step 6")
-        #Step 6: Add new constraints
-        k = k+1
-        for i in Parent.yl_arc:  #range(nZ):
-            Parent.Master.Y[(i,k)]=Parent.yl_arc[i] #Make sure yl_arc is int or else Master.Y rejects
-        Master_add(Parent, k, epsilon)
-
-        if not quiet:
-            print(f'Iteration {k}: Step 7 Obj={LB} UB={UB}')
-        #Step 7: Loop 
-        flag = check_termination(LB, UB, atol, rtol, quiet)
-        if flag:
-            elapsed = time.time() - t
-            break
+            if not quiet:
+                print("Step 6")
+            #Step 6: Add new constraints
+            k = k+1
+            for i in Parent.yl_arc:  #range(nZ):
+                Parent.Master.Y[(i,k)]=Parent.yl_arc[i] #Make sure yl_arc is int or else Master.Y rejects
+            Master_add(Parent, k, epsilon)
+            finish_iteration(record)
+
+            if not quiet:
+                print(f'Iteration {k}: Step 7 Obj={LB} UB={UB}')
+            #Step 7: Loop 
+            flag = check_termination(LB, UB, atol, rtol, quiet)
+            if flag:
+                elapsed = time.time() - t
+                break
+    finally:
+        scipy_util.release_solver(opt)
 
     #Output Information regarding objective and time/iterations to convergence    
     elapsed = time.time() - t
         
     results.solver.name = 'PCCG'
     results.solver_time = elapsed
-    if k>= maxit:
+    if timed_out:
         if not quiet:
-            print('Maximum Iterations Reached')
-        results.solver.termination_condition = TerminationCondition.maxIterations
-    elif k< maxit and flag !=1:
+            print(f'Time Limit Reached after {k} iterations and {elapsed} seconds: LB={LB} UB={UB}')
+        results.solver.termination_condition = pyomo_util.pyomo2pao_termination_condition(TerminationCondition.maxTimeLimit)
+        # Report the best bounds found so far
+        if LB > -infinity:
+            results.solver.best_objective_bound = LB
+        if UB < infinity:
+            results.solver.best_feasible_objective = UB
+    elif flag == 1:
         if not quiet:
             print(f'Optimal Solution Found in {k} iterations and {elapsed} seconds: Obj={UB}')
         results.solver.termination_condition = pyomo_util.pyomo2pao_termination_condition(TerminationCondition.optimal)
         results.best_feasible_objective = UB
+        results.solver.best_feasible_objective = UB
+    else:
+        if not quiet:
+            print('Maximum Iterations Reached')
+        results.solver.termination_condition = pyomo_util.pyomo2pao_termination_condition(TerminationCondition.maxIterations)
+        if LB > -infinity:
+            results.solver.best_objective_bound = LB
+        if UB < infinity:
+            results.solver.best_feasible_objective = UB
 
     return Parent.Master.xu, Parent.Master.yu, Parent.Master.xl0, Parent.Master.yl0
@@ -0,0 +1,249 @@
+#
+# A portfolio solver that races several PAO solvers on the same
+# multilevel problem, and returns the first optimal result.
+#
+import os
+import time
+import queue
+import multiprocessing
+from pyutilib.misc import Options
+from pyomo.common.config import ConfigBlock, ConfigValue
+
+import pao.common
+from pao.common.worker_pool import _terminate_worker
+from ..solver import Solver, LinearMultilevelSolverBase
+from ..repn import LinearMultilevelProblem
+
+
+def _portfolio_worker(name, options, model, channel):
+    """
+    Execute a single solver in the portfolio.
+
+    This function is executed in a forked process.  The worker starts a new
+    process group, which allows the parent to terminate this process along
+    with any solver executables that it launches.
+    """
+    os.setpgrp()
+    start_time = time.time()
+    try:
+        opt = Solver(name, **options)
+        results = opt.solve(model)
+        channel.put(Options(name=name,
+                            error=None,
+                            time=time.time() - start_time,
+                            termination_condition=results.solver.termination_condition,
+                            best_feasible_objective=results.solver.get('best_feasible_objective', None),
+                            best_objective_bound=results.solver.get('best_objective_bound', None),
+                            values={L.id:list(L.x.values) for L in model.levels()}))
+    except BaseException as err:
+        channel.put(Options(name=name,
+                            error="%s: %s" % (type(err).__name__, str(err)),
+                            time=time.time() - start_time,
+                            termination_condition=pao.common.TerminationCondition.error,
+                            best_feasible_objective=None,
+                            best_objective_bound=None,
+                            values=None))
+
+
+@Solver.register(
+        name='pao.mpr.Portfolio',
+        doc='PAO solver for Multilevel Problem Representations that executes a portfolio of PAO solvers in parallel, and returns the first optimal solution that is found.')
+class LinearMultilevelSolver_Portfolio(LinearMultilevelSolverBase):
+    """
+    PAO portfolio solver for linear MPRs: pao.mpr.Portfolio
+
+    This solver launches each solver in the portfolio in a separate
+    process.  The first solver that terminates with an optimal solution
+    wins, and the other solvers are terminated.  Solvers that cannot be
+    applied to the model are skipped.
+
+    The time limit is passed to each solver in the portfolio.  Workers
+    that have not reported a result shortly after the time limit expires
+    are terminated.
+
+    Worker processes are created with the 'fork' start method, so this
+    solver is not supported on Windows.
+    """
+
+    config = LinearMultilevelSolverBase.config()
+    config.declare('solvers', ConfigValue(
+        default=['pao.mpr.FA', 'pao.mpr.PCCG', 'pao.mpr.MIBS', 'pao.mpr.REG'],
+        domain=list,
+        description="The names of the PAO solvers that are executed.  (default is ['pao.mpr.FA', 'pao.mpr.PCCG', 'pao.mpr.MIBS', 'pao.mpr.REG'])"
+        ))
+    config.declare('solver_options', ConfigValue(
+        default=None,
+        domain=dict,
+        description="A dictionary that maps solver names to a dictionary of options used to create that solver.  (default is None)"
+        ))
+
+    def __init__(self, **kwds):
+        super().__init__(name='pao.mpr.Portfolio')
+
+    def check_model(self, model):
+        #
+        # Confirm that the LinearMultilevelProblem is well-formed
+        #
+        assert (type(model) is LinearMultilevelProblem), "Solver '%s' can only solve a linear multilevel problem" % self.name
+        model.check()
+
+    def _portfolio(self, model):
+        #
+        # Create the solvers in the portfolio, and skip solvers that
+        # cannot be applied to this model.
+        #
+        solver_options = self.config.solver_options or {}
+        portfolio = {}
+        skipped = []
+        for name in self.config.solvers:
+            assert (name != self.name), "Cannot include solver '%s' in its own portfolio" % self.name
+            options = dict(solver_options.get(name, {}))
+            options.setdefault('tee', self.config.tee)
+            if self.config.time_limit is not None:
+                options.setdefault('time_limit', self.config.time_limit)
+            try:
+                Solver(name, **options).check_model(model)
+            except AssertionError:
+                skipped.append(name)
+                continue
+            portfolio[name] = options
+        return portfolio, skipped
+
+    def solve(self, model, **options):
+        #
+        # Error checks
+        #
+        self.check_model(model)
+        #
+        # Process keyword options
+        #
+        self._update_config(options)
+        #
+        # Return cached results
+        #
+        results = self._load_from_cache(model)
+        if results is not None:
+            return results
+        #
+        # Start clock
+        #
+        start_time = time.time()
+        with pao.common.PhaseTimer(memory=self.config.profile_memory) as timer:
+
+            portfolio, skipped = self._portfolio(model)
+            assert (len(portfolio) > 0), "None of the solvers in the portfolio can be applied to this model: %s" % " ".join(self.config.solvers)
+            #
+            # Launch a worker for each solver
+            #
+            ctx = multiprocessing.get_context('fork')
+            channel = ctx.Queue()
+            workers = {}
+            for name, solver_options in portfolio.items():
+                workers[name] = ctx.Process(target=_portfolio_worker, args=(name, solver_options, model, channel), daemon=True)
+                workers[name].start()
+            #
+            # Collect worker results until one is optimal
+            #
+            reports = {}
+            winner = None
+            timed_out = False
+            pending = set(workers.keys())
+            with timer.phase('solve'):
+                try:
+                    while len(pending) > 0 and winner is None:
+                        #
+                        # Solvers enforce the time limit themselves, so allow
+                        # a grace period before terminating the workers.
+                        #
+                        if self.config.time_limit is not None and time.time() - start_time > self.config.time_limit + 1:
+                            timed_out = True
+                            break
+                        try:
+                            report = channel.get(timeout=0.1)
+                        except queue.Empty:
+                            #
+                            # Workers always report before exiting normally, so a
+                            # worker that exits with an error code has crashed.
+                            #
+                            for name in sorted(pending):
+                                if not workers[name].is_alive() and workers[name].exitcode != 0:
+                                    reports[name] = Options(name=name, error="Worker exited with code %s" % str(workers[name].exitcode),
+                                                        time=time.time() - start_time,
+                                                        termination_condition=pao.common.TerminationCondition.error,
+                                                        best_feasible_objective=None, best_objective_bound=None, values=None)
+                                    pending.discard(name)
+                            continue
+                        reports[report.name] = report
+                        pending.discard(report.name)
+                        if report.termination_condition == pao.common.TerminationCondition.optimal:
+                            winner = report
+                finally:
+                    for name in workers:
+                        _terminate_worker(workers[name])
+                    channel.close()
+
+            results = self._initialize_results(winner, reports, pending, skipped, start_time, timed_out, model.U.minimize)
+            if winner is not None and self.config.load_solutions:
+                with timer.phase('copy_solution'):
+                    for L in model.levels():
+                        L.x.values = list(winner.values[L.id])
+
+            results.solver.phases = timer.summary()
+            results.solver.wallclock_time = time.time() - start_time
+            self._store_in_cache(model, results)
+            return results
+
+    def _initialize_results(self, winner, reports, pending, skipped, start_time, timed_out, minimize):
+        results = pao.common.Results()
+        solv = results.solver
+        solv.name = self.name
+        #
+        # Per-solver summary
+        #
+        solv.portfolio = {}
+        for name, report in reports.items():
+            solv.portfolio[name] = Options(status='winner' if report is winner else ('error' if report.error else 'completed'),
+                                           time=report.time,
+                                           termination_condition=report.termination_condition,
+                                           best_feasible_objective=report.best_feasible_objective,
+                                           best_objective_bound=report.best_objective_bound)
+            if report.error:
+                solv.portfolio[name].error = report.error
+        for name in pending:
+            solv.portfolio[name] = Options(status='terminated',
+                                           time=time.time() - start_time,
+                                           termination_condition=pao.common.TerminationCondition.interrupted,
+                                           best_feasible_objective=None)
+        for name in skipped:
+            solv.portfolio[name] = Options(status='skipped', time=0,
+                                           termination_condition=pao.common.TerminationCondition.unknown,
+                                           best_feasible_objective=None)
+        #
+        # Summary of the winning solver
+        #
+        if winner is None:
+            solv.termination_condition = pao.common.TerminationCondition.error
+            for report in reports.values():
+                if report.error is None:
+                    solv.termination_condition = report.termination_condition
+                    break
+            if timed_out or solv.termination_condition == pao.common.TerminationCondition.maxTimeLimit:
+                #
+                # Report the best bounds found by the solvers before the time limit
+                #
+                solv.termination_condition = pao.common.TerminationCondition.maxTimeLimit
+                best = min if minimize else max
+                feasible = [r.best_feasible_objective for r in reports.values() if r.best_feasible_objective is not None]
+                if len(feasible) > 0:
+                    solv.best_feasible_objective = best(feasible)
+                bounds = [r.best_objective_bound for r in reports.values() if r.best_objective_bound is not None]
+                if len(bounds) > 0:
+                    solv.best_objective_bound = max(bounds) if minimize else min(bounds)
+        else:
+            solv.winner = winner.name
+            solv.termination_condition = winner.termination_condition
+            solv.best_feasible_objective = winner.best_feasible_objective
+        return results
+
+
+pao.common.SolverAPI._generate_solve_docstring(LinearMultilevelSolver_Portfolio)
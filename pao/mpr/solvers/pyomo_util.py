@@ -2,6 +2,8 @@
 # Utilities for creating Pyomo models using data in
 # LinearMultilevelProblem objects.
 #
+import math
+import subprocess
 import numpy as np
 import pyomo.environ as pe
 import pyomo.opt.results
@@ -55,39 +57,20 @@ def add_variables(block, level):
 
     level.x.pyvar = np.array(pyvar)
 
-    if level.x.lower_bounds is not None:
-        i=0
-        while i<level.x.nxR:
-            lb = level.x.lower_bounds[i]
-            if not lb is np.NINF:
-                block.xR[i].setlb( lb )
-            i += 1
-        while i<level.x.nxZ:
-            lb = level.x.lower_bounds[i]
-            if not lb is np.NINF:
-                block.xZ[i].setlb( lb )
-            i += 1
-        while i<level.x.nxB:
-            lb = level.x.lower_bounds[i]
-            block.xB[i].setlb( lb )
-            i += 1
-
-    if level.x.upper_bounds is not None:
-        i=0
-        while i<level.x.nxR:
-            ub = level.x.upper_bounds[i]
-            if not ub is np.PINF:
-                block.xR[i].setub( ub )
-            i += 1
-        while i<level.x.nxZ:
-            ub = level.x.upper_bounds[i]
-            if not ub is np.PINF:
-                block.xZ[i].setub( ub )
-            i += 1
-        while i<level.x.nxB:
-            ub = level.x.upper_bounds[i]
-            block.xB[i].setub( ub )
-            i += 1
+    #
+    # Set the finite bounds of the real and integer variables.  The
+    # bounds of binary variables are defined by their domain.
+    #
+    lower_bounds = level.x.lower_bounds
+    upper_bounds = level.x.upper_bounds
+    for var, start, n in ((block.xR, 0, level.x.nxR), (block.xZ, level.x.nxR, level.x.nxZ)):
+        for i in range(n):
+            lb = lower_bounds[start+i]
+            if np.isfinite(lb):
+                var[i].setlb( float(lb) )
+            ub = upper_bounds[start+i]
+            if np.isfinite(ub):
+                var[i].setub( float(ub) )
 
 
 def add_linear_constraints(block, A, U, L, b, inequalities):
@@ -111,6 +94,23 @@ def add_linear_constraints(block, A, U, L, b, inequalities):
             block.c.add( e[i] == b[i] )
 
 
+def solve_with_time_limit(opt, M, time_limit, **kwds):
+    """
+    Solve the Pyomo model M, passing the remaining time limit to the
+    solver.  Returns None if the time limit expires before the solver
+    returns a result.
+    """
+    if time_limit is not None:
+        if time_limit <= 0:
+            return None
+        # Some solvers (e.g. glpk) only accept an integer time limit
+        kwds['timelimit'] = max(1, int(math.ceil(time_limit)))
+    try:
+        return opt.solve(M, **kwds)
+    except subprocess.TimeoutExpired:
+        return None
+
+
 def pyomo2pao_termination_condition(tc):
 
     if tc == pyomo.opt.results.TerminationCondition.unknown or \
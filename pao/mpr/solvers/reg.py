@@ -19,7 +19,20 @@ from . import pyomo_util
 
 def create_model_replacing_LL_with_kkt(repn):
     """
-    TODO - Document this transformation
+    Create a Pyomo model that replaces each lower-level problem with its
+    KKT conditions.
+
+    The lower-level problems have equality constraints and real variables
+    with lower and upper bounds, which may be infinite.  The KKT
+    conditions use multipliers for the equality constraints (lam), for
+    the finite lower bounds (nu) and for the finite upper bounds (mu):
+
+        c_L + A_L' lam - nu + mu = 0
+        x - lb >= 0  complements  nu >= 0
+        ub - x >= 0  complements  mu >= 0
+
+    Variables without bounds do not have complementarity conditions, so
+    the variables do not need to be transformed to non-negative variables.
     """
     U = repn.U
     LL = repn.U.LL
@@ -40,8 +53,10 @@ def create_model_replacing_LL_with_kkt(repn):
         # lower-level variables
         pyomo_util.add_variables(M.L[i], L)
         # dual variables
+        nxR = L.x.nxR
         M.kkt[i].lam = pe.Var(range(len(L.b)))                                    # equality constraints
-        M.kkt[i].nu = pe.Var(range(len(L.x)), within=pe.NonNegativeReals)         # variable bounds
+        M.kkt[i].nu = pe.Var(np.flatnonzero(np.isfinite(L.x.lower_bounds[:nxR])).tolist(), within=pe.NonNegativeReals)     # lower bounds
+        M.kkt[i].mu = pe.Var(np.flatnonzero(np.isfinite(L.x.upper_bounds[:nxR])).tolist(), within=pe.NonNegativeReals)     # upper bounds
 
     # objective
     e = pyomo_util.dot(U.c[U], U.x, num=1) + U.d
@@ -62,17 +77,29 @@ def create_model_replacing_LL_with_kkt(repn):
         # stationarity
         M.kkt[i].stationarity = pe.ConstraintList() 
         # L_A_L' * lam
-        L_A_L_T = L.A[L].transpose().todok()
-        X = pyomo_util.dot( L_A_L_T, M.kkt[i].lam )
-        if L.c[L] is not None:
-            for k in range(len(L.c[L])):
-                M.kkt[i].stationarity.add( L.c[L][k] + X[k] - M.kkt[i].nu[k] == 0 )
+        if L.A[L] is None:
+            X = np.zeros(L.x.nxR)
+        else:
+            X = pyomo_util.dot( L.A[L].transpose().todok(), M.kkt[i].lam, num=L.x.nxR )
+        cL = np.zeros(L.x.nxR) if L.c[L] is None else L.c[L]
+        nu = M.kkt[i].nu
+        mu = M.kkt[i].mu
+        for k in range(L.x.nxR):
+            e = cL[k] + X[k]
+            if k in nu:
+                e -= nu[k]
+            if k in mu:
+                e += mu[k]
+            M.kkt[i].stationarity.add( e == 0 )
 
     for i in range(N):
+        L = LL[i]
         # complementarity slackness - variables
         M.kkt[i].slackness = ComplementarityList()
         for j in M.kkt[i].nu:
-            M.kkt[i].slackness.add( complements( M.L[i].xR[j] >= 0, M.kkt[i].nu[j] >= 0 ) )
+            M.kkt[i].slackness.add( complements( M.L[i].xR[j] >= float(L.x.lower_bounds[j]), M.kkt[i].nu[j] >= 0 ) )
+        for j in M.kkt[i].mu:
+            M.kkt[i].slackness.add( complements( M.L[i].xR[j] <= float(L.x.upper_bounds[j]), M.kkt[i].mu[j] >= 0 ) )
 
     return M
 
@@ -138,43 +165,69 @@ class LinearMultilevelSolver_REG(LinearMultilevelSolverBase):
         #
         self._update_config(options)
         #
+        # Return cached results
+        #
+        results = self._load_from_cache(model)
+        if results is not None:
+            return results
+        #
         # Start clock
         #
         start_time = time.time()
+        with pao.common.PhaseTimer(memory=self.config.profile_memory) as timer:
 
-        self.standard_form, soln_manager = convert_to_standard_form(model, inequalities=False)
+            with timer.phase('convert_to_standard_form'):
+                self.standard_form, soln_manager = convert_to_standard_form(model, inequalities=False, nonnegative=False)
 
-        M = self._create_pyomo_model(self.standard_form, self.config.rho)
-        #
-        # Solve the Pyomo model the specified solver
-        #
-        results = LinearMultilevelResults(solution_manager=soln_manager)
-        if isinstance(self.config.nlp_solver, str):
-            opt = pe.SolverFactory(self.config.nlp_solver)
-        else:
-            opt = self.config.nlp_solver
+            M = self._create_pyomo_model(self.standard_form, self.config.rho, timer)
+            #
+            # Solve the Pyomo model the specified solver
+            #
+            results = LinearMultilevelResults(solution_manager=soln_manager)
+            if isinstance(self.config.nlp_solver, str):
+                opt = pao.common.solver_pool.acquire(self.config.nlp_solver)
+            else:
+                opt = self.config.nlp_solver
 
-        #if self.config.nlp_options is not None:
-        #    opt.options.update(self.config.nlp_options)
-        pyomo_results = opt.solve(M, tee=self.config.tee, 
-                                     load_solutions=self.config.load_solutions)
-        pyomo.opt.check_optimal_termination(pyomo_results)
+            #if self.config.nlp_options is not None:
+            #    opt.options.update(self.config.nlp_options)
+            with timer.phase('solve'):
+                try:
+                    pyomo_results = pyomo_util.solve_with_time_limit(opt, M, self._remaining_time(start_time),
+                                             tee=self.config.tee, 
+                                             load_solutions=self.config.load_solutions)
+                finally:
+                    rc = getattr(opt, '_rc', None)
+                    pao.common.solver_pool.release(opt)
+            if pyomo_results is None:
+                #
+                # The time limit expired before the NLP solver returned
+                #
+                results.solver.name = self.config.nlp_solver
+                results.solver.termination_condition = pao.common.TerminationCondition.maxTimeLimit
+                results.solver.phases = timer.summary()
+                results.solver.wallclock_time = time.time() - start_time
+                return results
+            pyomo.opt.check_optimal_termination(pyomo_results)
 
-        self._initialize_results(results, pyomo_results, M)
-        results.solver.rc = getattr(opt, '_rc', None)
+            self._initialize_results(results, pyomo_results, M)
+            results.solver.rc = rc
 
-        if self.config.load_solutions:
-            # Load results from the Pyomo model to the LinearMultilevelProblem
-            results.copy_solution(From=M, To=model)
-        else:
-            # Load results from the Pyomo model to the Results
-            results.load_from(pyomo_results)
+            with timer.phase('copy_solution'):
+                if self.config.load_solutions:
+                    # Load results from the Pyomo model to the LinearMultilevelProblem
+                    results.copy_solution(From=M, To=model)
+                else:
+                    # Load results from the Pyomo model to the Results
+                    results.load_from(pyomo_results)
 
-        #self._debug()
-        #results.solver.log = getattr(opt, '_log', None)
+            #self._debug()
+            #results.solver.log = getattr(opt, '_log', None)
 
-        results.solver.wallclock_time = time.time() - start_time
-        return results
+            results.solver.phases = timer.summary()
+            results.solver.wallclock_time = time.time() - start_time
+            self._store_in_cache(model, results)
+            return results
 
     def _initialize_results(self, results, pyomo_results, M):
         #
@@ -186,7 +239,7 @@ class LinearMultilevelSolver_REG(LinearMultilevelSolverBase):
         if hasattr(pyomo_results.solver, 'time'):
             solv.solver_time = pyomo_results.solver.time
         if self.config.load_solutions:
-            solv.best_feasible_objective = pe.value(M.o)
+            solv.best_feasible_objective = pe.value(M.o, exception=False)
         #
         # PROBLEM - Maybe this should be the summary of the BLP itself?
         #
@@ -201,13 +254,17 @@ class LinearMultilevelSolver_REG(LinearMultilevelSolverBase):
         prob.sense = 'minimize'
         return results
 
-    def _create_pyomo_model(self, repn, rho):
-        M = create_model_replacing_LL_with_kkt(repn)
+    def _create_pyomo_model(self, repn, rho, timer=None):
+        if timer is None:
+            timer = pao.common.PhaseTimer()
+        with timer.phase('create_pyomo_model'):
+            M = create_model_replacing_LL_with_kkt(repn)
         #
         # Transform the problem to a MIP
         #
-        xfrm = pe.TransformationFactory('mpec.simple_nonlinear')
-        xfrm.apply_to(M, mpec_bound=rho)
+        with timer.phase('transform'):
+            xfrm = pe.TransformationFactory('mpec.simple_nonlinear')
+            xfrm.apply_to(M, mpec_bound=rho)
 
         return M
 
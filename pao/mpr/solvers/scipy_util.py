@@ -0,0 +1,220 @@
+#
+# Utilities for solving linear and mixed-integer linear problems
+# in-process with the HiGHS solvers in scipy.optimize.
+#
+import time
+import numpy as np
+import scipy.sparse
+from scipy.optimize import milp, linprog, LinearConstraint, Bounds
+from munch import Munch
+import pyomo.environ as pe
+import pyomo.opt
+from pyomo.repn import generate_standard_repn
+
+import pao.common
+import pao.common.solver
+
+
+_termination_condition = {
+    0: pao.common.solver.TerminationCondition.optimal,
+    1: pao.common.solver.TerminationCondition.maxTimeLimit,
+    2: pao.common.solver.TerminationCondition.infeasible,
+    3: pao.common.solver.TerminationCondition.unbounded,
+    4: pao.common.solver.TerminationCondition.error,
+    }
+
+_pyomo_termination_condition = {
+    pao.common.solver.TerminationCondition.optimal: pyomo.opt.TerminationCondition.optimal,
+    pao.common.solver.TerminationCondition.maxTimeLimit: pyomo.opt.TerminationCondition.maxTimeLimit,
+    pao.common.solver.TerminationCondition.infeasible: pyomo.opt.TerminationCondition.infeasible,
+    pao.common.solver.TerminationCondition.unbounded: pyomo.opt.TerminationCondition.unbounded,
+    pao.common.solver.TerminationCondition.error: pyomo.opt.TerminationCondition.error,
+    pao.common.solver.TerminationCondition.feasible: pyomo.opt.TerminationCondition.feasible,
+    }
+
+
+def solve_milp(c, A, cl, cu, lb, ub, integrality=None, time_limit=None, tee=False):
+    """
+    Solve the problem
+
+        min  c' x
+        s.t. cl <= A x <= cu
+             lb <=   x <= ub
+             x[i] integer if integrality[i]
+
+    with scipy.optimize.milp.  The scipy.optimize.linprog solver is used
+    if there are no integer variables.
+
+    Returns
+    -------
+    Munch
+        The termination condition, solution, objective value, best
+        objective bound and solver time.
+    """
+    start_time = time.time()
+    c = np.asarray(c, dtype=np.float64)
+    A = scipy.sparse.csr_matrix(A, dtype=np.float64)
+    options = {'disp': tee}
+    if time_limit is not None:
+        options['time_limit'] = time_limit
+
+    if integrality is not None and np.any(integrality):
+        constraints = [LinearConstraint(A, cl, cu)] if A.shape[0] > 0 else []
+        res = milp(c, integrality=np.asarray(integrality, dtype=np.int32), bounds=Bounds(lb, ub),
+                   constraints=constraints, options=options)
+        bound = getattr(res, 'mip_dual_bound', None)
+    else:
+        #
+        # linprog expects separate equality and inequality constraints
+        #
+        cl = np.asarray(cl, dtype=np.float64)
+        cu = np.asarray(cu, dtype=np.float64)
+        eq = cl == cu
+        upper = ~eq & np.isfinite(cu)
+        lower = ~eq & np.isfinite(cl)
+        A_ub = scipy.sparse.vstack([A[upper], -A[lower]]).tocsr()
+        b_ub = np.concatenate((cu[upper], -cl[lower]))
+        res = linprog(c, A_ub=A_ub if A_ub.shape[0] > 0 else None, b_ub=b_ub if A_ub.shape[0] > 0 else None,
+                      A_eq=A[eq] if np.any(eq) else None, b_eq=cl[eq] if np.any(eq) else None,
+                      bounds=list(zip(lb, ub)), method='highs', options=options)
+        bound = None
+
+    ans = Munch(termination_condition=_termination_condition.get(res.status, pao.common.solver.TerminationCondition.error),
+                x=res.x,
+                fun=res.fun if res.x is not None else None,
+                best_objective_bound=bound,
+                message=res.message,
+                time=time.time() - start_time)
+    if ans.termination_condition == pao.common.solver.TerminationCondition.optimal and ans.best_objective_bound is None:
+        ans.best_objective_bound = ans.fun
+    return ans
+
+
+class ScipySolver(object):
+    """
+    A solver with a minimal Pyomo solver interface that solves linear
+    Pyomo models and blocks in-process with the HiGHS solvers in
+    scipy.optimize.
+
+    Fixed variables and parameters are treated as constants.  All
+    active constraints and the active objective in the block are
+    collected, so the block must be linear.
+    """
+
+    name = 'scipy-highs'
+
+    def available(self, exception_flag=False):
+        return True
+
+    def solve(self, block, tee=False, load_solutions=True, timelimit=None, **kwds):
+        #
+        # Objective
+        #
+        objectives = list(block.component_data_objects(pe.Objective, active=True, descend_into=True))
+        assert (len(objectives) == 1), "Solver '%s' requires a single active objective (found %d)" % (self.name, len(objectives))
+        obj = objectives[0]
+        varmap = {}
+        variables = []
+
+        def index(v):
+            i = varmap.get(id(v), None)
+            if i is None:
+                i = varmap[id(v)] = len(variables)
+                variables.append(v)
+            return i
+
+        repn = generate_standard_repn(obj.expr, quadratic=False)
+        assert (repn.nonlinear_expr is None), "Solver '%s' cannot solve a model with a nonlinear objective" % self.name
+        sign = 1 if obj.sense == pe.minimize else -1
+        cdict = {}
+        for v, coef in zip(repn.linear_vars, repn.linear_coefs):
+            i = index(v)
+            cdict[i] = cdict.get(i, 0) + sign*coef
+        offset = pe.value(repn.constant)
+        #
+        # Constraints
+        #
+        rows = []
+        cols = []
+        vals = []
+        cl = []
+        cu = []
+        for con in block.component_data_objects(pe.Constraint, active=True, descend_into=True):
+            repn = generate_standard_repn(con.body, quadratic=False)
+            assert (repn.nonlinear_expr is None), "Solver '%s' cannot solve a model with nonlinear constraint %s" % (self.name, con.name)
+            const = pe.value(repn.constant)
+            lower = -np.inf if con.lower is None else pe.value(con.lower) - const
+            upper = np.inf if con.upper is None else pe.value(con.upper) - const
+            if len(repn.linear_vars) == 0:
+                assert (lower <= 1e-8 and upper >= -1e-8), "Trivial constraint %s is violated" % con.name
+                continue
+            r = len(cl)
+            for v, coef in zip(repn.linear_vars, repn.linear_coefs):
+                rows.append(r)
+                cols.append(index(v))
+                vals.append(coef)
+            cl.append(lower)
+            cu.append(upper)
+        #
+        # Variables
+        #
+        n = len(variables)
+        c = np.zeros(n)
+        for i, coef in cdict.items():
+            c[i] = coef
+        A = scipy.sparse.coo_matrix((vals, (rows, cols)), shape=(len(cl), n))
+        lb = np.array([-np.inf if v.lb is None else v.lb for v in variables], dtype=np.float64)
+        ub = np.array([np.inf if v.ub is None else v.ub for v in variables], dtype=np.float64)
+        integrality = np.array([v.is_integer() or v.is_binary() for v in variables], dtype=np.int32)
+
+        ans = solve_milp(c, A, np.array(cl), np.array(cu), lb, ub, integrality=integrality, time_limit=timelimit, tee=tee)
+        #
+        # Create a Pyomo results object
+        #
+        results = pyomo.opt.SolverResults()
+        results.solver.name = self.name
+        results.solver.termination_condition = _pyomo_termination_condition[ans.termination_condition]
+        results.solver.time = ans.time
+        results.solver.message = str(ans.message)
+        if ans.fun is not None:
+            value = sign*(ans.fun + sign*offset)
+            if obj.sense == pe.minimize:
+                results.problem.upper_bound = value
+            else:
+                results.problem.lower_bound = value
+        if ans.best_objective_bound is not None:
+            bound = sign*(ans.best_objective_bound + sign*offset)
+            if obj.sense == pe.minimize:
+                results.problem.lower_bound = bound
+            else:
+                results.problem.upper_bound = bound
+        if load_solutions and ans.x is not None:
+            for v, val in zip(variables, ans.x):
+                if v.is_integer() or v.is_binary():
+                    val = round(val)
+                v.set_value(val, skip_validation=True)
+        return results
+
+
+def create_solver(solver):
+    """
+    Create a solver object used to solve Pyomo models.
+
+    The name 'scipy-highs' is used to create a ScipySolver object.  Other
+    names are used to create a Pyomo solver, which is drawn from the
+    global solver pool and can be returned with release_solver().  If
+    the solver argument is not a string, then it is returned.
+    """
+    if not isinstance(solver, str):
+        return solver
+    if solver == 'scipy-highs':
+        return ScipySolver()
+    return pao.common.solver_pool.acquire(solver)
+
+
+def release_solver(opt):
+    """
+    Return a solver object created by create_solver() to the global
+    solver pool.  Other solver objects are ignored.
+    """
+    pao.common.solver_pool.release(opt)
@@ -0,0 +1,86 @@
+import os
+import sys
+import math
+import stat
+import asyncio
+import tempfile
+import shutil
+import pyutilib.th as unittest
+
+import pao.common
+from pao.mpr import *
+from pao.mpr import examples
+
+
+#
+# A script that prints the MibS output for the optimal solution of bard511
+#
+fake_mibs = """#!{}
+import sys
+assert (sys.argv[1] == '-Alps_instance')
+print("Optimal solution:")
+print("Cost = -12")
+print("x[0] = 4")
+print("y[0] = 4")
+print("Number of problems solved = 1")
+"""
+
+
+class Test_solve_async(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.executable = os.path.join(self.tmpdir, 'mibs')
+        with open(self.executable, 'w') as OUTPUT:
+            OUTPUT.write(fake_mibs.format(sys.executable))
+        os.chmod(self.executable, stat.S_IRWXU)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_mibs(self):
+        lines = []
+        models = [examples.bard511.create() for i in range(3)]
+        opt = Solver('pao.mpr.MIBS', executable=self.executable)
+        async def main():
+            return await asyncio.gather(*[opt.solve_async(M, log_callback=lines.append) for M in models])
+        for M, results in zip(models, asyncio.run(main())):
+            self.assertEqual(results.solver.termination_condition, pao.common.TerminationCondition.optimal)
+            self.assertTrue(math.isclose(results.solver.best_feasible_objective, -12))
+            self.assertEqual(M.U.x.values, [4])
+            self.assertEqual(M.U.LL.x.values, [4])
+            self.assertTrue('solve' in results.solver.phases)
+        self.assertEqual(lines.count("Cost = -12"), 3)
+        # The same results are returned by solve()
+        M = examples.bard511.create()
+        results = opt.solve(M)
+        self.assertTrue(math.isclose(results.solver.best_feasible_objective, -12))
+        self.assertEqual(M.U.LL.x.values, [4])
+
+    def test_options(self):
+        # The options of a solve do not change the other solves
+        executable = os.path.join(self.tmpdir, 'mibs2')
+        shutil.copy(self.executable, executable)
+        models = [examples.bard511.create() for i in range(2)]
+        opt = Solver('pao.mpr.MIBS')
+        async def main():
+            return await asyncio.gather(opt.solve_async(models[0], executable=self.executable),
+                                        opt.solve_async(models[1], executable=executable))
+        results = asyncio.run(main())
+        self.assertEqual(results[0].solver.name, self.executable)
+        self.assertEqual(results[1].solver.name, executable)
+        self.assertEqual(opt.config.executable, 'mibs')
+        for name in ('_start_time', '_timer', '_cmd', '_tmpdir', 'standard_form'):
+            self.assertFalse(hasattr(opt, name))
+
+    def test_default(self):
+        # Solvers without an external process are executed in a thread
+        M = examples.bard511.create()
+        opt = Solver('pao.mpr.FA', mip_solver='scipy-highs')
+        results = asyncio.run(opt.solve_async(M))
+        self.assertEqual(results.solver.termination_condition, pao.common.TerminationCondition.optimal)
+        self.assertTrue(math.isclose(results.solver.best_feasible_objective, -12))
+
+
+if __name__ == "__main__":
+    unittest.main()
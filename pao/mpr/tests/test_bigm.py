@@ -0,0 +1,275 @@
+import math
+import numpy as np
+from scipy.sparse import coo_matrix
+from munch import Munch
+import pyutilib.th as unittest
+import pao.common
+from pao.mpr import *
+from pao.mpr import examples, generators
+from pao.mpr.solvers import scipy_util, pyomo_util
+from pao.mpr.convert_repn import convert_to_standard_form
+from pao.mpr.bigm import uniform_bigm, update_bigm
+import pyomo.opt
+import pyomo.environ as pe
+
+
+solvers = pyomo.opt.check_available_solvers('cbc')
+
+
+def create_bounded():
+    # The lower-level response is y0 = max(x-1,0) and y1 = max(1-x,0), and
+    # the multipliers of the lower-level constraint are bounded
+    M = LinearMultilevelProblem()
+    U = M.add_upper(nxR=1)
+    L = U.add_lower(nxR=2)
+    U.x.lower_bounds = np.array([0])
+    U.x.upper_bounds = np.array([4])
+    U.c[U] = np.array([-1])
+    U.c[L] = np.array([0.5, 3])
+    U.A[U] = coo_matrix(np.array([[0]]))
+    U.A[L] = coo_matrix(np.array([[1, 1]]))
+    U.b = np.array([5])
+    L.x.lower_bounds = np.array([0, 0])
+    L.c[L] = np.array([1, 1])
+    L.A[U] = coo_matrix(np.array([[-1]]))
+    L.A[L] = coo_matrix(np.array([[1, -1]]))
+    L.b = np.array([-1])
+    L.inequalities = False
+    return M
+
+
+class Test_bigm(unittest.TestCase):
+
+    def test_bounds(self):
+        M = create_bounded()
+        S, _ = convert_to_standard_form(M, inequalities=False, nonnegative=False)
+        bounds = compute_bigm(S, margin=0)
+        self.assertEqual(bounds.lps, 6)
+        self.assertEqual(bounds.defaults, 0)
+        self.assertTrue(bounds.valid)
+        K = bounds.levels[0]
+        self.assertEqual(list(K.jl), [0, 1])
+        self.assertEqual(list(K.ju), [])
+        self.assertTrue(np.allclose(K.xl, [4, 3]))
+        self.assertTrue(np.allclose(K.nu, [2, 2]))
+
+    def test_threads(self):
+        M = examples.bard511.create()
+        S, _ = convert_to_standard_form(M, inequalities=False, nonnegative=False)
+        serial = compute_bigm(S, default=1e5, max_workers=1)
+        threads = compute_bigm(S, default=1e5, max_workers=4)
+        self.assertEqual(serial.lps, threads.lps)
+        self.assertEqual(serial.defaults, threads.defaults)
+        for K1, K2 in zip(serial.levels, threads.levels):
+            self.assertTrue(np.allclose(K1.xl, K2.xl))
+            self.assertTrue(np.allclose(K1.nu, K2.nu))
+
+    def test_unbounded(self):
+        # The multipliers of the slack variables are unbounded, and the
+        # lower bound of y is never active
+        M = examples.bard511.create()
+        S, _ = convert_to_standard_form(M, inequalities=False, nonnegative=False)
+        bounds = compute_bigm(S, default=1e5, margin=0)
+        self.assertEqual(bounds.defaults, 4)
+        self.assertFalse(bounds.valid)
+        K = bounds.levels[0]
+        self.assertTrue(np.allclose(K.xl, [6, 6, 4, 8, 7]))
+        self.assertEqual(list(K.nu), [0, 1e5, 1e5, 1e5, 1e5])
+
+    def test_FA(self):
+        # The bigm value is too small, so the MILP is infeasible unless
+        # big-M values are computed
+        M = create_bounded()
+        results = Solver('pao.mpr.FA', mip_solver='scipy-highs', bigm=0.5).solve(M)
+        self.assertEqual(results.solver.termination_condition, pao.common.TerminationCondition.infeasible)
+
+        M = create_bounded()
+        results = Solver('pao.mpr.FA', mip_solver='scipy-highs', bigm=0.5, compute_bigm=True).solve(M)
+        self.assertEqual(results.solver.termination_condition, pao.common.TerminationCondition.optimal)
+        self.assertTrue(math.isclose(results.solver.best_feasible_objective, -2.5, abs_tol=1e-6))
+        self.assertEqual(results.solver.bigm_defaults, 0)
+        self.assertTrue(results.solver.bigm_valid)
+        self.assertTrue('compute_bigm' in results.solver.phases)
+        self.assertTrue(np.allclose(M.U.LL[0].x.values, [3, 0]))
+
+        # Some multipliers are not bounded, so the solution is not certified
+        M = examples.bard511.create()
+        with self.assertLogs('pao.mpr.solvers.fa', level='WARNING'):
+            results = Solver('pao.mpr.FA', mip_solver='scipy-highs', compute_bigm=True).solve(M)
+        self.assertTrue(math.isclose(results.solver.best_feasible_objective, -12, abs_tol=1e-6))
+        self.assertEqual(results.solver.bigm_defaults, 4)
+        self.assertFalse(results.solver.bigm_valid)
+
+    @unittest.skipIf('cbc' not in solvers, "CBC solver is not available")
+    def test_FA_pyomo(self):
+        M = create_bounded()
+        results = Solver('pao.mpr.FA', mip_solver='cbc', bigm=0.5, compute_bigm=True).solve(M)
+        self.assertEqual(results.solver.termination_condition, pao.common.TerminationCondition.optimal)
+        self.assertTrue(math.isclose(results.solver.best_feasible_objective, -2.5, abs_tol=1e-6))
+        self.assertTrue(np.allclose(M.U.LL[0].x.values, [3, 0]))
+
+        M = examples.bard511.create()
+        results = Solver('pao.mpr.FA', mip_solver='cbc', compute_bigm=True).solve(M)
+        self.assertTrue(math.isclose(results.solver.best_feasible_objective, -12, abs_tol=1e-6))
+
+    def test_update(self):
+        M = examples.bard511.create()
+        S, _ = convert_to_standard_form(M, inequalities=False, nonnegative=False)
+        bounds = uniform_bigm(S, 2)
+        self.assertEqual(bounds.defaults, 10)
+        K = bounds.levels[0]
+        self.assertEqual(list(K.xl), [2]*5)
+        # The first slack and the last multiplier are active
+        values = [Munch(xl=[2, 1, 0, 0, 0], xu=[], nu=[0, 0, 0, 0, 2], mu=[])]
+        self.assertEqual(update_bigm(bounds, values, growth=10), 2)
+        self.assertEqual(list(K.xl), [20, 2, 2, 2, 2])
+        self.assertEqual(list(K.nu), [2, 2, 2, 2, 20])
+        # All values are enlarged
+        self.assertEqual(update_bigm(bounds, growth=10), 10)
+        self.assertEqual(list(K.xl), [200, 20, 20, 20, 20])
+
+    def test_adaptive(self):
+        # The MILP is infeasible with the initial bigm value.  The big-M
+        # values are not certified, so the solution is only feasible.
+        M = create_bounded()
+        results = Solver('pao.mpr.FA', mip_solver='scipy-highs', bigm=0.5, adaptive_bigm=True).solve(M)
+        self.assertEqual(results.solver.termination_condition, pao.common.TerminationCondition.feasible)
+        self.assertTrue(math.isclose(results.solver.best_feasible_objective, -2.5, abs_tol=1e-6))
+        self.assertIsNone(results.solver.best_objective_bound)
+        self.assertEqual(results.solver.bigm_iterations, 1)
+        self.assertEqual(results.solver.bigm_active, 0)
+        # Active big-M values are enlarged
+        M = examples.bard511.create()
+        results = Solver('pao.mpr.FA', mip_solver='scipy-highs', bigm=1, adaptive_bigm=True).solve(M)
+        self.assertTrue(math.isclose(results.solver.best_feasible_objective, -12, abs_tol=1e-6))
+        self.assertTrue(results.solver.bigm_iterations > 0)
+        # The number of solves is limited, and the active big-M values
+        # are reported
+        M = examples.bard511.create()
+        with self.assertLogs('pao.mpr.solvers.fa', level='WARNING'):
+            results = Solver('pao.mpr.FA', mip_solver='scipy-highs', bigm=4, adaptive_bigm=True, max_bigm_iterations=0).solve(M)
+        self.assertEqual(results.solver.bigm_iterations, 0)
+        self.assertEqual(results.solver.bigm_active, 1)
+        self.assertTrue(math.isclose(results.solver.best_feasible_objective, -10, abs_tol=1e-6))
+        self.assertEqual(results.solver.termination_condition, pao.common.TerminationCondition.feasible)
+        # Valid big-M values are not enlarged
+        M = create_bounded()
+        results = Solver('pao.mpr.FA', mip_solver='scipy-highs', compute_bigm=True, adaptive_bigm=True).solve(M)
+        self.assertEqual(results.solver.termination_condition, pao.common.TerminationCondition.optimal)
+        self.assertEqual(results.solver.bigm_iterations, 0)
+
+    def test_adaptive_wrong(self):
+        # No big-M value is active in the solution with bigm=100, but the
+        # solution is not optimal
+        M = generators.random_bilevel_lp(nxU=6, nxL=6, nL=6, nU=2, density=0.4, ub=10, seed=7)
+        results = Solver('pao.mpr.FA', mip_solver='scipy-highs', bigm=100, adaptive_bigm=True).solve(M)
+        self.assertEqual(results.solver.termination_condition, pao.common.TerminationCondition.feasible)
+        self.assertEqual(results.solver.bigm_active, 0)
+        self.assertTrue(results.solver.best_feasible_objective > -455.38 + 1)
+
+        M = generators.random_bilevel_lp(nxU=6, nxL=6, nL=6, nU=2, density=0.4, ub=10, seed=7)
+        results = Solver('pao.mpr.FA', mip_solver='scipy-highs', bigm=1e6).solve(M)
+        self.assertEqual(results.solver.termination_condition, pao.common.TerminationCondition.optimal)
+        self.assertTrue(math.isclose(results.solver.best_feasible_objective, -455.38, abs_tol=1e-2))
+
+    def test_adaptive_time_limit(self):
+        # The time limit expires when the MILP is solved again, so the
+        # previous solution is reported
+        solve_milp = scipy_util.solve_milp
+        calls = []
+        def timeout(*args, **kwds):
+            calls.append(None)
+            if len(calls) == 1:
+                return solve_milp(*args, **kwds)
+            return Munch(termination_condition=pao.common.TerminationCondition.maxTimeLimit,
+                         x=None, fun=None, best_objective_bound=None, message='', time=0)
+        scipy_util.solve_milp = timeout
+        try:
+            M = examples.bard511.create()
+            results = Solver('pao.mpr.FA', mip_solver='scipy-highs', bigm=4, adaptive_bigm=True).solve(M)
+        finally:
+            scipy_util.solve_milp = solve_milp
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(results.solver.termination_condition, pao.common.TerminationCondition.maxTimeLimit)
+        self.assertTrue(math.isclose(results.solver.best_feasible_objective, -10, abs_tol=1e-6))
+        self.assertTrue(math.isclose(M.U.x.values[0], 3.6, abs_tol=1e-6))
+
+    def test_adaptive_infeasible(self):
+        # The last MILP is infeasible, so the previous solution is reported
+        # with its termination condition
+        solve_milp = scipy_util.solve_milp
+        calls = []
+        def infeasible(*args, **kwds):
+            calls.append(None)
+            if len(calls) == 1:
+                return solve_milp(*args, **kwds)
+            return Munch(termination_condition=pao.common.TerminationCondition.infeasible,
+                         x=None, fun=None, best_objective_bound=None, message='', time=0)
+        scipy_util.solve_milp = infeasible
+        try:
+            M = examples.bard511.create()
+            with self.assertLogs('pao.mpr.solvers.fa', level='WARNING'):
+                results = Solver('pao.mpr.FA', mip_solver='scipy-highs', bigm=4, adaptive_bigm=True, max_bigm_iterations=1).solve(M)
+        finally:
+            scipy_util.solve_milp = solve_milp
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(results.solver.termination_condition, pao.common.TerminationCondition.feasible)
+        self.assertTrue(math.isclose(results.solver.best_feasible_objective, -10, abs_tol=1e-6))
+        self.assertTrue(math.isclose(M.U.x.values[0], 3.6, abs_tol=1e-6))
+
+    def test_warmstart(self):
+        # The values of the previous model are copied to the variables
+        # with the same names
+        repn, soln_manager = convert_to_standard_form(examples.bard511.create(), inequalities=False, nonnegative=False)
+        opt = Solver('pao.mpr.FA')
+        opt.standard_form = repn
+        previous = opt._create_pyomo_model(repn, 4, bounds=uniform_bigm(repn, 4))
+        M = opt._create_pyomo_model(repn, 40, bounds=uniform_bigm(repn, 40))
+        variables = list(previous.component_data_objects(pe.Var, descend_into=True))
+        for i, v in enumerate(variables):
+            v.set_value(i, skip_validation=True)
+        opt._load_warmstart(M, previous)
+        for v in variables:
+            self.assertEqual(M.find_component(v.name).value, v.value)
+
+    @unittest.skipIf('cbc' not in solvers, "CBC solver is not available")
+    def test_adaptive_pyomo(self):
+        M = create_bounded()
+        results = Solver('pao.mpr.FA', mip_solver='cbc', bigm=0.5, adaptive_bigm=True).solve(M)
+        self.assertEqual(results.solver.termination_condition, pao.common.TerminationCondition.feasible)
+        self.assertTrue(math.isclose(results.solver.best_feasible_objective, -2.5, abs_tol=1e-6))
+        self.assertTrue(np.allclose(M.U.LL[0].x.values, [3, 0]))
+
+        M = examples.bard511.create()
+        results = Solver('pao.mpr.FA', mip_solver='cbc', bigm=0.1, adaptive_bigm=True).solve(M)
+        self.assertTrue(math.isclose(results.solver.best_feasible_objective, -12, abs_tol=1e-6))
+        self.assertTrue(results.solver.bigm_iterations > 0)
+        self.assertTrue(np.allclose(M.U.x.values, [4]))
+
+        M = generators.random_bilevel_lp(nxU=6, nxL=6, nL=6, nU=2, density=0.4, ub=10, seed=7)
+        results = Solver('pao.mpr.FA', mip_solver='cbc', bigm=100, adaptive_bigm=True).solve(M)
+        self.assertEqual(results.solver.termination_condition, pao.common.TerminationCondition.feasible)
+        self.assertTrue(results.solver.best_feasible_objective > -455.38 + 1)
+
+    @unittest.skipIf('cbc' not in solvers, "CBC solver is not available")
+    def test_adaptive_pyomo_time_limit(self):
+        solve_with_time_limit = pyomo_util.solve_with_time_limit
+        calls = []
+        def timeout(*args, **kwds):
+            calls.append(None)
+            if len(calls) == 1:
+                return solve_with_time_limit(*args, **kwds)
+            return None
+        pyomo_util.solve_with_time_limit = timeout
+        try:
+            M = examples.bard511.create()
+            results = Solver('pao.mpr.FA', mip_solver='cbc', bigm=4, adaptive_bigm=True).solve(M)
+        finally:
+            pyomo_util.solve_with_time_limit = solve_with_time_limit
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(results.solver.termination_condition, pao.common.TerminationCondition.maxTimeLimit)
+        self.assertTrue(math.isclose(results.solver.best_feasible_objective, -10, abs_tol=1e-6))
+        self.assertTrue(math.isclose(M.U.x.values[0], 3.6, abs_tol=1e-6))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+import os
+import math
+import shutil
+import tempfile
+import numpy as np
+import scipy.sparse
+import pyutilib.th as unittest
+import pao.common
+from pao.mpr import *
+from pao.mpr.solver import LinearMultilevelSolverBase
+from pao.mpr import examples
+import pyomo.opt
+
+
+solvers = pyomo.opt.check_available_solvers('cbc')
+
+
+class _CountSolver(LinearMultilevelSolverBase):
+
+    count = 0
+
+    def __init__(self, **kwds):
+        super().__init__(name='pao.mpr.test.Count')
+
+    def solve(self, model, **options):
+        self._update_config(options)
+        results = self._load_from_cache(model)
+        if results is not None:
+            return results
+        _CountSolver.count += 1
+        for L in model.levels():
+            L.x.values = [1]*len(L.x)
+        results = pao.common.Results()
+        results.solver.termination_condition = pao.common.TerminationCondition.optimal
+        results.solver.best_feasible_objective = 1
+        self._store_in_cache(model, results)
+        return results
+
+
+class Test_hash(unittest.TestCase):
+
+    def test_same_data(self):
+        # Level ids differ, but the data is the same
+        self.assertEqual(problem_hash(examples.bard511.create()), problem_hash(examples.bard511.create()))
+        self.assertEqual(problem_hash(examples.bard511.create()), problem_hash(examples.bard511.create().clone()))
+
+    def test_matrix_format(self):
+        M1 = examples.bard511.create()
+        M2 = examples.bard511.create()
+        L = M2.U.LL
+        L.A[M2.U] = scipy.sparse.coo_matrix(L.A[M2.U])
+        self.assertEqual(problem_hash(M1), problem_hash(M2))
+
+    def test_different_data(self):
+        M1 = examples.bard511.create()
+        M2 = examples.bard511.create()
+        M2.U.LL.b[0] += 1
+        self.assertNotEqual(problem_hash(M1), problem_hash(M2))
+
+        M2 = examples.bard511.create()
+        M2.U.x.upper_bounds = np.array([10], dtype=np.float64)
+        self.assertNotEqual(problem_hash(M1), problem_hash(M2))
+
+        M2 = examples.bard511.create()
+        M2.U.LL.minimize = not M2.U.LL.minimize
+        self.assertNotEqual(problem_hash(M1), problem_hash(M2))
+
+        self.assertNotEqual(problem_hash(examples.bard511.create()), problem_hash(examples.besancon27.create()))
+
+    def test_config(self):
+        M = examples.bard511.create()
+        self.assertEqual(problem_hash(M, {'a':1, 'b':2}), problem_hash(M, {'b':2, 'a':1}))
+        self.assertNotEqual(problem_hash(M, {'a':1}), problem_hash(M, {'a':2}))
+        self.assertNotEqual(problem_hash(M), problem_hash(M, {'a':1}))
+        # Nested options do not depend on insertion order
+        self.assertEqual(problem_hash(M, {'mip_options':{'a':1, 'b':2}}), problem_hash(M, {'mip_options':{'b':2, 'a':1}}))
+        self.assertNotEqual(problem_hash(M, {'mip_options':{'a':1}}), problem_hash(M, {'mip_options':{'a':2}}))
+
+
+class Test_cache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        Solver.register(_CountSolver, name='pao.mpr.test.Count', doc='A test solver that counts the number of times it is executed')
+
+    @classmethod
+    def tearDownClass(cls):
+        Solver.unregister('pao.mpr.test.Count')
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        _CountSolver.count = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_put_get(self):
+        cache = SolveCache(self.tmpdir)
+        self.assertEqual(cache.get('foo'), None)
+        cache.put('foo', {'a':1})
+        self.assertEqual(cache.get('foo'), {'a':1})
+        self.assertEqual(len(cache), 1)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def test_evict(self):
+        cache = SolveCache(self.tmpdir, max_size=3000)
+        for i in range(10):
+            cache.put('key%d' % i, 'x'*1000)
+            os.utime(os.path.join(self.tmpdir, 'key%d.pkl' % i), (i, i))
+        self.assertTrue(len(cache) <= 2)
+        # The most recent entry is kept
+        self.assertEqual(cache.get('key9'), 'x'*1000)
+        self.assertEqual(cache.get('key0'), None)
+
+    def test_solve(self):
+        opt = Solver('pao.mpr.test.Count', cache=self.tmpdir)
+        M = examples.bard511.create()
+        results = opt.solve(M)
+        self.assertEqual(_CountSolver.count, 1)
+        self.assertEqual(results.solver.get('cache_hit', None), None)
+
+        M = examples.bard511.create()
+        results = opt.solve(M)
+        self.assertEqual(_CountSolver.count, 1)
+        self.assertTrue(results.solver.cache_hit)
+        self.assertEqual(results.solver.termination_condition, pao.common.TerminationCondition.optimal)
+        self.assertEqual(results.solver.best_feasible_objective, 1)
+        self.assertEqual(M.U.x.values, [1])
+        self.assertEqual(M.U.LL.x.values, [1])
+
+        # Different solver options are not a cache hit
+        results = opt.solve(M, time_limit=10)
+        self.assertEqual(_CountSolver.count, 2)
+
+    @unittest.skipIf('cbc' not in solvers, "CBC solver is not available")
+    def test_PCCG(self):
+        cache = SolveCache(self.tmpdir)
+        opt = Solver('pao.mpr.PCCG', mip_solver='cbc', cache=cache)
+        M = examples.bard511.create()
+        opt.solve(M)
+        self.assertEqual(len(cache), 1)
+
+        M = examples.bard511.create()
+        results = opt.solve(M)
+        self.assertTrue(results.solver.cache_hit)
+        self.assertTrue(math.isclose(M.U.x.values[0], 4, abs_tol=1e-4))
+        self.assertTrue(math.isclose(M.U.LL.x.values[0], 4, abs_tol=1e-4))
+
+
+if __name__ == "__main__":
+    unittest.main()
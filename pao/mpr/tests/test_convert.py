@@ -1734,6 +1734,76 @@ class Test_Integers(unittest.TestCase):
         self.assertEqual(list(L.A[L].toarray()[0]), [1,1,3,3,3,3])
 
 
+class Test_RowBounds(unittest.TestCase):
+
+    def _create(self):
+        # Rows with a range, an upper bound and an equality
+        mpr = LinearMultilevelProblem()
+        U = mpr.add_upper(nxR=2)
+        U.x.lower_bounds = [0, 0]
+        L = U.add_lower(nxR=1)
+        L.x.lower_bounds = [0]
+        U.A[U] = [[1,1],[1,0],[0,1]]
+        U.bl = [1, np.NINF, 2]
+        U.b = [3, 4, 2]
+        mpr.check()
+        return mpr
+
+    def test_inequalities(self):
+        mpr = self._create()
+        ans, soln_manager = convert_to_standard_form(mpr, inequalities=True)
+        ans.check()
+
+        self.assertEqual(ans.U.bl, None)
+        self.assertTrue(ans.U.inequalities)
+        self.assertEqual(list(ans.U.b), [-1, 3, 4, 2, -2])
+        self.assertEqual(ans.U.A[ans.U].toarray().tolist(), [[-1,-1],[1,1],[1,0],[0,1],[0,-1]])
+        # The original problem is not changed
+        self.assertEqual(list(mpr.U.bl), [1, np.NINF, 2])
+
+    def test_equalities(self):
+        mpr = self._create()
+        ans, soln_manager = convert_to_standard_form(mpr, inequalities=False)
+        ans.check()
+
+        # Slack variables are only added to the inequalities
+        self.assertEqual(ans.U.bl, None)
+        self.assertFalse(ans.U.inequalities)
+        self.assertEqual(list(ans.U.b), [-1, 3, 4, 2])
+        self.assertEqual(len(ans.U.x), 5)
+        self.assertEqual(ans.U.A[ans.U].toarray().tolist(), [[-1,-1,1,0,0],[1,1,0,1,0],[1,0,0,0,1],[0,1,0,0,0]])
+
+
+class Test_StandardForm(unittest.TestCase):
+
+    def test_nonnegative(self):
+        mpr = LinearMultilevelProblem()
+        U = mpr.add_upper(nxR=1)
+        U.x.upper_bounds = [4]
+        L = U.add_lower(nxR=2)
+        L.x.lower_bounds = [-3, np.NINF]
+        L.x.upper_bounds = [5, np.PINF]
+        L.c[L] = [1, 1]
+        L.A[U] = [[1]]
+        L.A[L] = [[1, -1]]
+        L.b = [2]
+        mpr.check()
+
+        # The variables and bounds are not transformed
+        std, soln_manager = convert_to_standard_form(mpr, nonnegative=False)
+        L = std.U.LL[0]
+        self.assertEqual(len(std.U.x), 1)
+        self.assertEqual(len(L.x), 3)       # With one slack variable
+        self.assertEqual(list(L.x.lower_bounds), [-3, np.NINF, 0])
+        self.assertEqual(list(L.x.upper_bounds), [5, np.PINF, np.PINF])
+        self.assertEqual(L.A[L].todense().tolist(), [[1, -1, 1]])
+        self.assertEqual(list(L.b), [2])
+
+        # Free and bounded variables are transformed into non-negative variables
+        std, soln_manager = convert_to_standard_form(mpr)
+        self.assertEqual(list(std.U.LL[0].x.lower_bounds), [0]*len(std.U.LL[0].x))
+
+
 class Test_Examples(unittest.TestCase):
 
     def _create(self):
@@ -0,0 +1,89 @@
+import math
+import numpy as np
+from scipy.sparse import coo_matrix
+import pyutilib.th as unittest
+import pao.common
+from pao.mpr import *
+from pao.mpr import examples
+import pyomo.opt
+
+
+solvers = pyomo.opt.check_available_solvers('cbc')
+
+
+def create_separable():
+    # The lower-level constraints have three blocks:  {y0}, {y1, y3} and {y2}
+    M = LinearMultilevelProblem()
+    U = M.add_upper(nxR=1)
+    L = U.add_lower(nxR=4)
+    U.x.lower_bounds = np.array([0])
+    U.x.upper_bounds = np.array([10])
+    U.c[U] = np.array([1])
+    U.c[L] = np.array([-1, -2, -3, -4])
+    U.A[U] = coo_matrix(np.array([[-1]]))
+    U.A[L] = coo_matrix(np.array([[0, 1, 1, 0]]))
+    U.b = np.array([6])
+    L.x.lower_bounds = np.zeros(4)
+    L.x.upper_bounds = np.array([5, 5, 5, 5])
+    L.c[L] = np.array([1, 1, 1, 1])
+    L.maximize = True
+    L.A[U] = coo_matrix(np.array([[-1], [0], [1], [0]]))
+    L.A[L] = coo_matrix(np.array([[1, 0, 0, 0], [0, 1, 0, 1], [0, 0, 1, 0], [0, 0, 0, 0]]))
+    L.b = np.array([2, 3, 4, 1])
+    return M
+
+
+class Test_decompose(unittest.TestCase):
+
+    def test_components(self):
+        M = create_separable()
+        blocks = lower_level_components(M.U.LL[0])
+        self.assertEqual([(list(r), list(c)) for r, c in blocks], [([0, 3], [0]), ([1], [1, 3]), ([2], [2])])
+        # bard511 has a single block
+        M = examples.bard511.create()
+        self.assertEqual(len(lower_level_components(M.U.LL[0])), 1)
+
+    def test_decompose(self):
+        M = create_separable()
+        D = decompose_lower_levels(M)
+        P = D.problem
+        P.check()
+        self.assertEqual(len(P.U.LL), 3)
+        L1 = P.U.LL[1]
+        self.assertEqual(list(D.levels[L1.id][1]), [1, 3])
+        self.assertEqual(L1.A[L1].todense().tolist(), [[1, 1]])
+        self.assertEqual(list(P.U.c[L1]), [-2, -4])
+        self.assertEqual(list(P.U.LL[0].b), [2, 1])
+        self.assertEqual(P.U.LL[2].A[P.U].todense().tolist(), [[1]])
+        self.assertTrue(L1.maximize)
+
+    def test_solve(self):
+        # The decomposed problem has the same solution
+        M1 = create_separable()
+        r1 = Solver('pao.mpr.FA', mip_solver='scipy-highs').solve(M1)
+        M2 = create_separable()
+        D = decompose_lower_levels(M2)
+        r2 = Solver('pao.mpr.FA', mip_solver='scipy-highs').solve(D.problem)
+        self.assertTrue(math.isclose(r1.solver.best_feasible_objective, r2.solver.best_feasible_objective))
+        copy_decomposed_solution(D, M2)
+        for L1, L2 in zip(M1.levels(), M2.levels()):
+            self.assertEqual(L1.x.values, L2.x.values)
+
+    @unittest.skipIf('cbc' not in solvers, "CBC solver is not available")
+    def test_PCCG(self):
+        M = create_separable()
+        results = Solver('pao.mpr.PCCG', mip_solver='cbc', decompose=True).solve(M)
+        self.assertEqual(results.solver.termination_condition, pao.common.TerminationCondition.optimal)
+        self.assertTrue(math.isclose(results.solver.best_feasible_objective, -26, abs_tol=1e-4))
+        self.assertEqual(results.solver.lower_level_blocks, 3)
+        self.assertEqual(list(M.U.LL[0].x.values), [2, 0, 4, 3])
+
+    def test_PCCG_scipy(self):
+        M = create_separable()
+        results = Solver('pao.mpr.PCCG', mip_solver='scipy-highs', decompose=True).solve(M)
+        self.assertEqual(results.solver.termination_condition, pao.common.TerminationCondition.optimal)
+        self.assertTrue(math.isclose(results.solver.best_feasible_objective, -26, abs_tol=1e-4))
+
+
+if __name__ == "__main__":
+    unittest.main()
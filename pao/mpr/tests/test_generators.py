@@ -0,0 +1,84 @@
+import math
+import numpy as np
+import pyutilib.th as unittest
+import pao.common
+from pao.mpr import *
+from pao.mpr import generators
+import pyomo.opt
+
+
+solvers = pyomo.opt.check_available_solvers('cbc')
+
+
+class Test_generators(unittest.TestCase):
+
+    def test_seed(self):
+        for gen in (generators.random_bilevel_lp, generators.knapsack_interdiction, generators.network_interdiction, generators.toll_setting):
+            self.assertEqual(problem_hash(gen(seed=1)), problem_hash(gen(seed=1)))
+            self.assertNotEqual(problem_hash(gen(seed=1)), problem_hash(gen(seed=2)))
+
+    def test_random_bilevel_lp(self):
+        M = generators.random_bilevel_lp(nxU=20, nxL=30, nU=5, nL=40, density=0.2, nxZ_upper=4, nxZ_lower=3, seed=0)
+        M.check()
+        U = M.U
+        L = U.LL[0]
+        self.assertEqual((U.x.nxR, U.x.nxZ, L.x.nxR, L.x.nxZ), (16, 4, 27, 3))
+        self.assertEqual(U.A[L].shape, (5, 30))
+        self.assertEqual(L.A[U].shape, (40, 20))
+        self.assertEqual(L.A[U].nnz, 160)
+        self.assertEqual(L.A[L].nnz, 240)
+
+    def test_random_bilevel_lp_large(self):
+        M = generators.random_bilevel_lp(nxU=10000, nxL=10000, nL=10000, density=0.005, seed=0)
+        L = M.U.LL[0]
+        # Duplicate indices are removed for very sparse matrices
+        nnz = L.A[M.U].nnz + L.A[L].nnz
+        self.assertTrue(990000 < nnz <= 1000000)
+
+    def test_knapsack_interdiction(self):
+        M = generators.knapsack_interdiction(n=10, seed=0)
+        M.check()
+        self.assertEqual(M.U.x.nxB, 10)
+        self.assertEqual(M.U.LL[0].x.nxB, 10)
+        self.assertEqual(M.U.LL[0].A[M.U].shape, (11, 10))
+
+        M = generators.knapsack_interdiction(n=10, integer=False, seed=0)
+        self.assertEqual(M.U.LL[0].x.nxR, 10)
+        opt = Solver('pao.mpr.FA', mip_solver='scipy-highs')
+        results = opt.solve(M)
+        self.assertEqual(results.solver.termination_condition, pao.common.TerminationCondition.optimal)
+        # The budget constraint is satisfied
+        self.assertTrue(M.U.A[M.U] @ np.array(M.U.x.values) <= M.U.b[0] + 1e-6)
+
+    def test_network_interdiction(self):
+        M = generators.network_interdiction(nnodes=8, budget=1, seed=1)
+        M.check()
+        opt = Solver('pao.mpr.FA', mip_solver='scipy-highs')
+        results = opt.solve(M)
+        self.assertEqual(results.solver.termination_condition, pao.common.TerminationCondition.optimal)
+        self.assertTrue(math.isclose(results.solver.best_feasible_objective, 2, abs_tol=1e-6))
+        self.assertTrue(sum(M.U.x.values) <= 1)
+
+    def test_toll_setting(self):
+        M = generators.toll_setting(nnodes=6, ntolls=2, nlevels=3, linearize=False, seed=1)
+        self.assertEqual(type(M), QuadraticMultilevelProblem)
+        self.assertEqual(M.U.x.nxB, 6)
+
+        M = generators.toll_setting(nnodes=6, seed=1)
+        self.assertEqual(type(M), LinearMultilevelProblem)
+        M.check()
+        opt = Solver('pao.mpr.FA', mip_solver='scipy-highs')
+        results = opt.solve(M)
+        self.assertEqual(results.solver.termination_condition, pao.common.TerminationCondition.optimal)
+
+    @unittest.skipIf('cbc' not in solvers, "CBC solver is not available")
+    def test_random_bilevel_lp_PCCG(self):
+        M = generators.random_bilevel_lp(nxU=5, nxL=5, nL=6, density=0.5, seed=1)
+        results = Solver('pao.mpr.FA', mip_solver='scipy-highs').solve(M)
+        FA_objective = results.solver.best_feasible_objective
+        results = Solver('pao.mpr.PCCG', mip_solver='cbc').solve(M)
+        self.assertTrue(math.isclose(results.solver.best_feasible_objective, FA_objective, abs_tol=1e-4))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import math
+import numpy as np
+from scipy.sparse import coo_matrix
+import pyutilib.th as unittest
+import pao.common
+from pao.mpr import *
+from pao.mpr import examples, generators
+import pyomo.opt
+
+
+solvers = pyomo.opt.check_available_solvers('cbc')
+
+
+def create_infeasible():
+    # The upper-level requires x+y >= 5, and the lower-level requires y <= 1
+    M = LinearMultilevelProblem()
+    U = M.add_upper(nxR=1)
+    L = U.add_lower(nxR=1)
+    U.x.lower_bounds = np.array([0])
+    U.x.upper_bounds = np.array([2])
+    U.c[U] = np.array([1])
+    U.A[U] = coo_matrix(np.array([[-1]]))
+    U.A[L] = coo_matrix(np.array([[-1]]))
+    U.b = np.array([-5])
+    L.x.lower_bounds = np.array([0])
+    L.c[L] = np.array([-1])
+    L.A[L] = coo_matrix(np.array([[1]]))
+    L.b = np.array([1])
+    return M
+
+
+class Test_highpoint(unittest.TestCase):
+
+    def test_create(self):
+        M = examples.bard511.create()
+        hpr = create_highpoint_relaxation(M)
+        self.assertEqual(hpr.A.shape, (4, 2))
+        self.assertEqual(list(hpr.c), [1, -4])
+        self.assertEqual(list(hpr.cu), [-3, 0, 12, 4])
+        self.assertTrue(np.all(np.isinf(hpr.cl)))
+        self.assertEqual(hpr.offset, {M.U.id:0, M.U.LL[0].id:1})
+
+    def test_bound(self):
+        M = examples.bard511.create()
+        ans = solve_highpoint_relaxation(M)
+        self.assertEqual(ans.termination_condition, pao.common.TerminationCondition.optimal)
+        self.assertTrue(math.isclose(ans.bound, -21))
+        self.assertEqual(set(ans.x.keys()), {M.U.id, M.U.LL[0].id})
+        # The bilevel optimum is -12
+        self.assertTrue(ans.bound <= -12)
+
+    def test_maximize(self):
+        M = examples.bard511.create()
+        M.U.maximize = True
+        M.U.c[M.U] = -M.U.c[M.U]
+        M.U.c[M.U.LL[0]] = -M.U.c[M.U.LL[0]]
+        M.U.d = 1
+        ans = solve_highpoint_relaxation(M)
+        self.assertTrue(math.isclose(ans.bound, 22))
+
+    def test_integer(self):
+        M = generators.knapsack_interdiction(n=10, seed=0)
+        milp = solve_highpoint_relaxation(M)
+        lp = solve_highpoint_relaxation(M, relax_integrality=True)
+        self.assertEqual(milp.termination_condition, pao.common.TerminationCondition.optimal)
+        self.assertTrue(lp.bound <= milp.bound + 1e-6)
+        self.assertTrue(all(type(v) is int for v in milp.x[M.U.id]))
+
+    def test_infeasible(self):
+        M = create_infeasible()
+        ans = solve_highpoint_relaxation(M)
+        self.assertEqual(ans.termination_condition, pao.common.TerminationCondition.infeasible)
+        self.assertEqual(ans.bound, None)
+        self.assertEqual(ans.x, None)
+
+    def test_FA(self):
+        M = examples.bard511.create()
+        results = Solver('pao.mpr.FA', mip_solver='scipy-highs', highpoint=True).solve(M)
+        self.assertEqual(results.solver.termination_condition, pao.common.TerminationCondition.optimal)
+        self.assertTrue(math.isclose(results.solver.best_feasible_objective, -12))
+        self.assertTrue(math.isclose(results.solver.highpoint_bound, -21))
+        self.assertTrue('highpoint' in results.solver.phases)
+
+        M = create_infeasible()
+        results = Solver('pao.mpr.FA', mip_solver='scipy-highs', highpoint=True).solve(M)
+        self.assertEqual(results.solver.termination_condition, pao.common.TerminationCondition.infeasible)
+        self.assertFalse('solve' in results.solver.phases)
+
+    @unittest.skipIf('cbc' not in solvers, "CBC solver is not available")
+    def test_PCCG(self):
+        M = examples.bard511.create()
+        results = Solver('pao.mpr.PCCG', mip_solver='cbc', highpoint=True).solve(M)
+        self.assertEqual(results.solver.termination_condition, pao.common.TerminationCondition.optimal)
+        self.assertTrue(math.isclose(results.solver.best_feasible_objective, -12, abs_tol=1e-4))
+        # The master problem gives a lower bound that is at least as tight
+        self.assertTrue(results.solver.iterations[0].master_objective >= results.solver.highpoint_bound - 1e-6)
+
+        M = create_infeasible()
+        results = Solver('pao.mpr.PCCG', mip_solver='cbc', highpoint=True).solve(M)
+        self.assertEqual(results.solver.termination_condition, pao.common.TerminationCondition.infeasible)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+import pickle
 import numpy as np
 import scipy.sparse
 import pyutilib.th as unittest
@@ -283,6 +284,29 @@ class Test_LevelValues(unittest.TestCase):
                 [0,3,0,4]]
         self.assertEqual(type(l.x),scipy.sparse.csr.csr_matrix)
 
+    @unittest.skipIf(pickle.HIGHEST_PROTOCOL < 5, "Pickle protocol 5 is not available")
+    def test_pickle_matrix(self):
+        # Sparse matrices are pickled with out-of-band buffers, and
+        # their format is restored
+        l = LevelValues(matrix=True)
+        l.x = ((2,3), {(0,1):2, (1,2):3})
+        self.assertEqual(l.x.format, 'dok')
+        buffers = []
+        data = pickle.dumps(l, protocol=5, buffer_callback=buffers.append)
+        self.assertEqual(len(buffers), 3)
+        ans = pickle.loads(data, buffers=buffers)
+        self.assertEqual(ans.x.format, 'dok')
+        self.assertEqual(dict(ans.x), {(0,1):2, (1,2):3})
+        self.assertEqual(ans._matrix, True)
+
+    def test_pickle_matrix_list(self):
+        l = LevelValues(matrix_list=True)
+        l.x = ((3,2,2), {(0,0,1):2, (2,1,1):3})
+        ans = pickle.loads(pickle.dumps(l))
+        self.assertEqual(ans.x[1], None)
+        self.assertEqual(ans.x[0].format, 'csr')
+        self.assertEqual(ans.x[2].todense().tolist(), [[0,0],[0,3]])
+
 
 class Test_LevelValueWrapper1(unittest.TestCase):
 
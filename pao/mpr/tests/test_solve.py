@@ -1,6 +1,10 @@
 import math
+import time
+import tracemalloc
 import pyutilib.th as unittest
+import pao.common
 from pao.mpr import *
+from pao.mpr.solver import LinearMultilevelSolverBase
 from pao.mpr import examples
 import pyomo.opt
 
@@ -8,6 +12,26 @@ import pyomo.opt
 solvers = pyomo.opt.check_available_solvers('glpk','cbc','ipopt')
 
 
+def create_unconstrained_lower():
+    # The lower level has a single variable and no constraints, so
+    # y = 0 and the upper level selects x = 2
+    mpr = LinearMultilevelProblem()
+    U = mpr.add_upper(nxR=1)
+    U.x.lower_bounds = [0]
+    U.x.upper_bounds = [4]
+    L = U.add_lower(nxR=1)
+    L.x.lower_bounds = [0]
+    L.x.upper_bounds = [10]
+    U.c[U] = [1]
+    U.c[L] = [1]
+    U.A[U] = [[-1]]
+    U.A[L] = [[-1]]
+    U.b = [-2]
+    L.c[L] = [1]
+    mpr.check()
+    return mpr
+
+
 class Test_bilevel_FA(unittest.TestCase):
 
     # TODO - test with either cbc or glpk
@@ -102,6 +126,17 @@ class Test_bilevel_FA(unittest.TestCase):
         self.assertTrue(math.isclose(mpr.U.x.values[0], 2))
         self.assertTrue(math.isclose(mpr.U.LL.x.values[0], 100))
 
+    @unittest.skipIf('cbc' not in solvers, "CBC solver is not available")
+    def test_unconstrained_lower(self):
+        mpr = create_unconstrained_lower()
+
+        opt = Solver('pao.mpr.FA')
+        results = opt.solve(mpr, mip_solver='cbc')
+
+        self.assertEqual(results.solver.termination_condition, pao.common.TerminationCondition.optimal)
+        self.assertTrue(math.isclose(mpr.U.x.values[0], 2, abs_tol=1e-6))
+        self.assertTrue(math.isclose(mpr.U.LL.x.values[0], 0, abs_tol=1e-6))
+
 
 @unittest.skipIf('ipopt' not in solvers, "Ipopt solver is not available")
 class Test_bilevel_REG(unittest.TestCase):
@@ -188,6 +223,15 @@ class Test_bilevel_REG(unittest.TestCase):
         self.assertTrue(math.isclose(mpr.U.x.values[0], 2, abs_tol=1e-4))
         self.assertTrue(math.isclose(mpr.U.LL.x.values[0], 100, abs_tol=1e-4))
 
+    def test_unconstrained_lower(self):
+        mpr = create_unconstrained_lower()
+
+        opt = Solver('pao.mpr.REG')
+        opt.solve(mpr)
+
+        self.assertTrue(math.isclose(mpr.U.x.values[0], 2, abs_tol=1e-4))
+        self.assertTrue(math.isclose(mpr.U.LL.x.values[0], 0, abs_tol=1e-4))
+
 
 @unittest.skipIf('cbc' not in solvers, "CBC solver is not available")
 class Test_bilevel_PCCG(unittest.TestCase):
@@ -204,6 +248,53 @@ class Test_bilevel_PCCG(unittest.TestCase):
         self.assertTrue(math.isclose(mpr.U.x.values[0], 4, abs_tol=1e-4))
         self.assertTrue(math.isclose(mpr.U.LL.x.values[0], 4, abs_tol=1e-4))
 
+    def test_release(self):
+        # The pooled solver is released when PCCG raises an exception
+        from pao.mpr.solvers import pccg_solver, scipy_util
+
+        def timed_solve(*args, **kwds):
+            raise RuntimeError("master failure")
+
+        released = []
+        release_solver = scipy_util.release_solver
+        def release(opt):
+            released.append(opt)
+            release_solver(opt)
+
+        mpr = examples.bard511.create()
+        opt = Solver('pao.mpr.PCCG')
+        orig = pccg_solver.timed_solve
+        try:
+            pccg_solver.timed_solve = timed_solve
+            scipy_util.release_solver = release
+            opt.solve(mpr, mip_solver=self.solver)
+            self.fail("Expected a RuntimeError")
+        except RuntimeError:
+            pass
+        finally:
+            pccg_solver.timed_solve = orig
+            scipy_util.release_solver = release_solver
+        self.assertEqual(len(released), 1)
+
+    def test_bard511_iterations(self):
+        mpr = examples.bard511.create()
+        mpr.check()
+
+        records = []
+        opt = Solver('pao.mpr.PCCG')
+        results = opt.solve(mpr, mip_solver=self.solver, callback=records.append)
+
+        iterations = results.solver.iterations
+        self.assertTrue(len(iterations) > 0)
+        self.assertEqual(records, iterations)
+        self.assertEqual([r.iteration for r in iterations], list(range(len(iterations))))
+        self.assertEqual(iterations[0].master_termination, pao.common.TerminationCondition.optimal)
+        self.assertEqual(iterations[0].sub1_termination, pao.common.TerminationCondition.optimal)
+        self.assertTrue(iterations[0].master_time >= 0)
+        self.assertTrue(iterations[0].master_nconstraints > 0)
+        # The last iteration terminates after the master problem is solved
+        self.assertTrue(math.isclose(iterations[-1].LB, iterations[-1].UB, abs_tol=1e-4))
+
     def test_bard511_list(self):
         mpr = examples.bard511_list.create()
         mpr.check()
@@ -317,6 +408,236 @@ class Test_bilevel_PCCG(unittest.TestCase):
         self.assertEqual(mpr.U.LL.x.values[1], 0)
 
 
+class Test_bilevel_scipy(unittest.TestCase):
+
+    solver = 'scipy-highs'
+
+    def test_FA_bard511(self):
+        mpr = examples.bard511.create()
+        mpr.check()
+
+        opt = Solver('pao.mpr.FA')
+        results = opt.solve(mpr, mip_solver=self.solver)
+
+        self.assertEqual(results.solver.termination_condition, pao.common.TerminationCondition.optimal)
+        self.assertTrue(math.isclose(results.solver.best_feasible_objective, -12, abs_tol=1e-6))
+        self.assertTrue(math.isclose(mpr.U.x.values[0], 4))
+        self.assertTrue(math.isclose(mpr.U.LL.x.values[0], 4))
+
+    def test_FA_phases(self):
+        mpr = examples.bard511.create()
+        opt = Solver('pao.mpr.FA')
+        results = opt.solve(mpr, mip_solver=self.solver, profile_memory=True)
+
+        phases = results.solver.phases
+        self.assertEqual(sorted(phases.keys()), ['convert_to_standard_form', 'copy_solution', 'create_milp', 'solve'])
+        self.assertEqual(phases['solve'].calls, 1)
+        self.assertTrue(phases['create_milp'].peak_memory > 0)
+
+    def test_FA_phases_error(self):
+        # Memory tracing is stopped when the MIP solver fails
+        class FailingSolver(object):
+            def solve(self, *args, **kwds):
+                raise RuntimeError("solver failure")
+
+        mpr = examples.bard511.create()
+        opt = Solver('pao.mpr.FA')
+        try:
+            opt.solve(mpr, mip_solver=FailingSolver(), profile_memory=True)
+            self.fail("Expected a RuntimeError")
+        except RuntimeError:
+            pass
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_FA_besancon27_shifted(self):
+        mpr = examples.besancon27_shifted.create()
+        mpr.check()
+
+        opt = Solver('pao.mpr.FA')
+        opt.solve(mpr, mip_solver=self.solver)
+
+        self.assertTrue(math.isclose(mpr.U.x.values[0], 2.5))
+        self.assertTrue(math.isclose(mpr.U.LL.x.values[0], 1.25))
+
+    def test_FA_pineda(self):
+        mpr = examples.pineda.create()
+        mpr.check()
+
+        opt = Solver('pao.mpr.FA')
+        opt.solve(mpr, mip_solver=self.solver)
+
+        self.assertTrue(math.isclose(mpr.U.x.values[0], 2))
+        self.assertTrue(math.isclose(mpr.U.LL.x.values[0], 100))
+
+    def test_FA_bounds(self):
+        # The lower-level variable has a negative lower bound and no
+        # upper bound:  y = max(x-5, -3)
+        mpr = LinearMultilevelProblem()
+        U = mpr.add_upper(nxR=1)
+        U.x.lower_bounds = [0]
+        U.x.upper_bounds = [10]
+        L = U.add_lower(nxR=1)
+        L.x.lower_bounds = [-3]
+        U.c[U] = [-1]
+        U.c[L] = [1.5]
+        L.c[L] = [1]
+        L.A[U] = [[1]]
+        L.A[L] = [[-1]]
+        L.b = [5]
+        mpr.check()
+
+        opt = Solver('pao.mpr.FA')
+        results = opt.solve(mpr, mip_solver=self.solver)
+
+        self.assertEqual(results.solver.termination_condition, pao.common.TerminationCondition.optimal)
+        self.assertTrue(math.isclose(results.solver.best_feasible_objective, -6.5, abs_tol=1e-6))
+        self.assertTrue(math.isclose(mpr.U.x.values[0], 2, abs_tol=1e-6))
+        self.assertTrue(math.isclose(mpr.U.LL.x.values[0], -3, abs_tol=1e-6))
+
+    def test_PCCG_bard511(self):
+        mpr = examples.bard511.create()
+        mpr.check()
+
+        opt = Solver('pao.mpr.PCCG')
+        results = opt.solve(mpr, mip_solver=self.solver)
+
+        self.assertEqual(results.solver.termination_condition, pao.common.TerminationCondition.optimal)
+        self.assertTrue(math.isclose(mpr.U.x.values[0], 4, abs_tol=1e-4))
+        self.assertTrue(math.isclose(mpr.U.LL.x.values[0], 4, abs_tol=1e-4))
+
+    def test_PCCG_toyexample2(self):
+        mpr = examples.toyexample2.create()
+        mpr.check()
+
+        opt = Solver('pao.mpr.PCCG')
+        opt.solve(mpr, mip_solver=self.solver)
+
+        self.assertEqual(mpr.U.x.values[0], 8)
+        self.assertEqual(mpr.U.LL.x.values[0], 6)
+
+    def test_PCCG_toyexample3(self):
+        mpr = examples.toyexample3.create()
+        mpr.check()
+
+        opt = Solver('pao.mpr.PCCG')
+        opt.solve(mpr, mip_solver=self.solver)
+
+        self.assertTrue(math.isclose(mpr.U.x.values[0], 3, abs_tol=1e-4))
+        self.assertTrue(math.isclose(mpr.U.LL.x.values[0], 0.5, abs_tol=1e-4))
+        self.assertEqual(mpr.U.x.values[1], 8)
+        self.assertEqual(mpr.U.LL.x.values[1], 0)
+
+
+class _SleepSolver(LinearMultilevelSolverBase):
+
+    def __init__(self, **kwds):
+        super().__init__(name='pao.mpr.test.Sleep')
+
+    def solve(self, model, **options):
+        time.sleep(60)
+
+
+class _ZeroSolver(LinearMultilevelSolverBase):
+
+    def __init__(self, **kwds):
+        super().__init__(name='pao.mpr.test.Zero')
+
+    def solve(self, model, **options):
+        for L in model.levels():
+            L.x.values = [0]*len(L.x)
+        results = pao.common.Results()
+        results.solver.termination_condition = pao.common.TerminationCondition.optimal
+        results.solver.best_feasible_objective = 0
+        return results
+
+
+class Test_bilevel_Portfolio(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        Solver.register(_SleepSolver, name='pao.mpr.test.Sleep', doc='A test solver that never terminates')
+        Solver.register(_ZeroSolver, name='pao.mpr.test.Zero', doc='A test solver that returns zero values')
+
+    @classmethod
+    def tearDownClass(cls):
+        Solver.unregister('pao.mpr.test.Sleep')
+        Solver.unregister('pao.mpr.test.Zero')
+
+    def test_skipped(self):
+        mpr = examples.toyexample1.create()
+        mpr.check()
+
+        # REG cannot solve problems with integer upper-level variables
+        opt = Solver('pao.mpr.Portfolio', solvers=['pao.mpr.REG'])
+        try:
+            opt.solve(mpr)
+            self.fail("Expected an assertion error")
+        except AssertionError:
+            pass
+
+    def test_terminate(self):
+        mpr = examples.bard511.create()
+        mpr.check()
+
+        opt = Solver('pao.mpr.Portfolio', solvers=['pao.mpr.test.Sleep', 'pao.mpr.test.Zero', 'pao.mpr.REG'])
+        results = opt.solve(mpr)
+
+        self.assertEqual(results.solver.winner, 'pao.mpr.test.Zero')
+        self.assertEqual(results.solver.termination_condition, pao.common.TerminationCondition.optimal)
+        self.assertTrue(results.solver.wallclock_time < 60)
+        self.assertEqual(results.solver.portfolio['pao.mpr.test.Zero'].status, 'winner')
+        self.assertEqual(results.solver.portfolio['pao.mpr.test.Sleep'].status, 'terminated')
+        self.assertEqual(mpr.U.x.values[0], 0)
+        self.assertEqual(mpr.U.LL.x.values[0], 0)
+
+    @unittest.skipIf('glpk' not in solvers, "GLPK solver is not available")
+    def test_bard511(self):
+        mpr = examples.bard511.create()
+        mpr.check()
+
+        opt = Solver('pao.mpr.Portfolio', solvers=['pao.mpr.FA', 'pao.mpr.test.Sleep'])
+        results = opt.solve(mpr)
+
+        self.assertEqual(results.solver.winner, 'pao.mpr.FA')
+        self.assertTrue(math.isclose(mpr.U.x.values[0], 4))
+        self.assertTrue(math.isclose(mpr.U.LL.x.values[0], 4))
+
+    def test_time_limit(self):
+        mpr = examples.bard511.create()
+        mpr.check()
+
+        opt = Solver('pao.mpr.Portfolio', solvers=['pao.mpr.test.Sleep'])
+        results = opt.solve(mpr, time_limit=1)
+
+        self.assertEqual(results.solver.termination_condition, pao.common.TerminationCondition.maxTimeLimit)
+        self.assertTrue(results.solver.wallclock_time < 60)
+        self.assertEqual(results.solver.portfolio['pao.mpr.test.Sleep'].status, 'terminated')
+
+
+class Test_time_limit(unittest.TestCase):
+
+    def test_FA(self):
+        mpr = examples.bard511.create()
+        opt = Solver('pao.mpr.FA')
+        results = opt.solve(mpr, time_limit=0)
+        self.assertEqual(results.solver.termination_condition, pao.common.TerminationCondition.maxTimeLimit)
+
+    def test_REG(self):
+        mpr = examples.bard511.create()
+        opt = Solver('pao.mpr.REG')
+        results = opt.solve(mpr, time_limit=0)
+        self.assertEqual(results.solver.termination_condition, pao.common.TerminationCondition.maxTimeLimit)
+
+    def test_PCCG(self):
+        mpr = examples.bard511.create()
+        opt = Solver('pao.mpr.PCCG')
+        results = opt.solve(mpr, time_limit=0)
+        self.assertEqual(results.solver.termination_condition, pao.common.TerminationCondition.maxTimeLimit)
+        self.assertEqual(results.solver.best_feasible_objective, None)
+        self.assertEqual(results.solver.iterations, [])
+        self.assertEqual(mpr.U.x.values[0], None)
+
+
 #class Test_bilevel_ld(unittest.TestCase):
 class XTest_bilevel_ld(object):
 
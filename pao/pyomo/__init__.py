@@ -18,6 +18,6 @@ Pyomo models that represent multilevel problems.
 from pao.pyomo.components import SubModel
 #from pao.pyomo.components import *
 #from pao.pyomo.util import *
-from .convert import convert_pyomo2LinearMultilevelProblem
+from .convert import convert_pyomo2LinearMultilevelProblem, ConversionSession
 from . import examples
 from pao.common.solver import Solver
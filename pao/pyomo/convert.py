@@ -1,11 +1,13 @@
-import copy
+import array
 import itertools
 import numpy as np
-from scipy.sparse import dok_matrix
+from scipy.sparse import dok_matrix, coo_matrix, csr_matrix
 
-import pyomo.environ as pe
+from pyomo.core import Block, Objective, Constraint, VarList, NonNegativeReals, maximize, value
 from pyomo.repn import generate_standard_repn
 from pyomo.core.base import SortComponents, is_fixed
+from pyomo.core.expr.numvalue import native_numeric_types
+from pyomo.core.expr.visitor import identify_variables
 
 from pao.mpr import LinearMultilevelProblem, QuadraticMultilevelProblem
 from .components import SubModel
@@ -15,7 +17,7 @@ def _bound_equals(exp, num):
     if exp is None:
         return False
     if is_fixed(exp):
-        return pe.value(exp) == num
+        return value(exp) == num
     return False                        # pragma: no cover
                                         # WEH - will we ever reach this point?  What if the LB is a mutable parameter?
 
@@ -31,13 +33,23 @@ class Node(object):
 
     global_list = []
 
-    def __init__(self, node):
+    def __init__(self, node, template=False):
         self.nid = len(Node.global_list)
         Node.global_list.append(self)
         self.node = node
         self.children = []
         self.orepn = []
-        self.crepn = []
+        self.crepn = ConstraintRows(template)
+        self.template = template
+        #
+        # The values in the level that depend on mutable parameters.
+        # These are only collected for templates.
+        #
+        self.d_param = None     # objective constant
+        self.c_params = []      # (nid, column, expr)
+        self.P_params = []      # (nid1, nid2, (row, column), expr)
+        self.A_params = []      # (nid, positions in A.data, exprs, signs)
+        self.Q_params = []      # (nid1, nid2, constraint, (row, column), sign, expr)
         self.fixedvars = set()
         self.unfixedvars = set()    # unfixed variables used in expressions
         self.xR = {}
@@ -100,34 +112,36 @@ class Node(object):
         Initialize the level object...
         """
         level.x._resize(nxR=len(self.xR), nxZ=len(self.xZ), nxB=len(self.xB))
+        self.update_level_bounds(level, var)
+        #
+        # xB
+        #
+        for i in self.xB:
+            level.x.lower_bounds[i+level.x.nxR+level.x.nxZ] = 0
+            level.x.upper_bounds[i+level.x.nxR+level.x.nxZ] = 1
+
+    def update_level_bounds(self, level, var):
+        """
+        Set the bounds of the real and integer variables in the level object
+        """
         #
         # xR
         #
         for i in self.xR:
             vid = self.xR[i]
             val = var[vid].lb
-            if val is not None:
-                level.x.lower_bounds[i] = val
+            level.x.lower_bounds[i] = np.NINF if val is None else val
             val = var[vid].ub
-            if val is not None:
-                level.x.upper_bounds[i] = val
+            level.x.upper_bounds[i] = np.PINF if val is None else val
         #
         # xZ
         #
         for i in self.xZ:
             vid = self.xZ[i]
             val = var[vid].lb
-            if val is not None:
-                level.x.lower_bounds[i+level.x.nxR] = val
+            level.x.lower_bounds[i+level.x.nxR] = np.NINF if val is None else val
             val = var[vid].ub
-            if val is not None:
-                level.x.upper_bounds[i+level.x.nxR] = val
-        #
-        # xB
-        #
-        for i in self.xB:
-            level.x.lower_bounds[i+level.x.nxR+level.x.nxZ] = 0
-            level.x.upper_bounds[i+level.x.nxR+level.x.nxZ] = 1
+            level.x.upper_bounds[i+level.x.nxR] = np.PINF if val is None else val
 
     def initialize_level(self, level, inequalities, var, vidmap, levelmap):
         #
@@ -139,12 +153,14 @@ class Node(object):
             #
             # minimize
             #
-            if self.orepn[0][1] == pe.maximize:
+            if self.orepn[0][1] == maximize:
                 level.minimize = False
             #
             # d
             #
-            level.d = pe.value(repn.constant)
+            level.d = value(repn.constant)
+            if self.template and repn.constant.__class__ not in native_numeric_types:
+                self.d_param = repn.constant
             #
             # c
             #
@@ -157,10 +173,17 @@ class Node(object):
                 vid = id(repn.linear_vars[i])
                 t, nid, j = vidmap[vid]
                 L = levelmap[nid]
-                c[nid][j+offset(t,L.x)] = pe.value(val)
+                c[nid][j+offset(t,L.x)] = value(val)
+                if self.template and val.__class__ not in native_numeric_types:
+                    self.c_params.append( (nid, j+offset(t,L.x), val) )
 
-            # Add a non-null objective vector
+            # Add a non-null objective vector.  Templates include the
+            # vectors with parametric coefficients, even if they are zero.
+            cparams = set(nid for nid,_,_ in self.c_params)
             for j in levelmap:
+                if j in cparams:
+                    level.c[j] = c[j]
+                    continue
                 for v in c[j]:
                     if v != 0:
                         level.c[j] = c[j]
@@ -176,210 +199,339 @@ class Node(object):
                 L1 = levelmap[nid1]
                 L2 = levelmap[nid2]
                 if nid1 <= nid2:
-                    if P.get((nid1,nid2),None) is None:
-                        P[nid1,nid2] = {}
-                    P[nid1,nid2][j1+offset(t1,L1.x), j2+offset(t2,L2.x)] = pe.value(val)
+                    key = (nid1, nid2, (j1+offset(t1,L1.x), j2+offset(t2,L2.x)))
                 else:
-                    if P.get((nid2,nid1),None) is None:
-                        P[nid2,nid1] = {}
-                    P[nid2,nid1][j2+offset(t2,L2.x), j1+offset(t1,L1.x)] = pe.value(val)
+                    key = (nid2, nid1, (j2+offset(t2,L2.x), j1+offset(t1,L1.x)))
+                if P.get(key[:2],None) is None:
+                    P[key[:2]] = {}
+                P[key[:2]][key[2]] = value(val)
+                if self.template and val.__class__ not in native_numeric_types:
+                    self.P_params.append( key+(val,) )
             for n1,n2 in P:
                 level.P[n1,n2] = (len(levelmap[n1].x),len(levelmap[n2].x)), P[n1,n2]
         #
         # Constraints
         #
         if len(self.crepn) > 0:
+            rows = self.crepn
+            nrows = len(rows)
             #
             # A
             #
-            A = {}
-            for i in levelmap:
-                A[i] = {}
-            nrows = len(self.crepn)
-
-            for k in range(len(self.crepn)):
-                repn = self.crepn[k][0]
-                for i,c  in enumerate(repn.linear_coefs):
-                    vid = id(repn.linear_vars[i])
-                    t, nid, j = vidmap[vid]
-                    L = levelmap[nid]
-                    c_ = pe.value(c)
-                    if c_ != 0:
-                        A[nid][k,j+offset(t,L.x)] = c_
-
-            for j in levelmap:
-                if len(A[j]) > 0:
-                    L = levelmap[j]
-                    mat = dok_matrix((nrows, L.x.num))
-                    for key, val in A[j].items():
-                        mat[key] = val
-                    level.A[L.id] = mat
+            # Map the variable ids to levels and columns.  This is done for
+            # the unique ids, and then expanded to the nonzeros.
+            #
+            row = np.frombuffer(rows.row, dtype=np.int64)
+            vids, inverse = np.unique(np.frombuffer(rows.vid, dtype=np.int64), return_inverse=True)
+            vnid = np.empty(vids.size, dtype=np.int64)
+            vcol = np.empty(vids.size, dtype=np.int64)
+            for k,vid in enumerate(vids.tolist()):
+                t, nid, j = vidmap[vid]
+                vnid[k] = nid
+                vcol[k] = j+offset(t,levelmap[nid].x)
+            nid = vnid[inverse]
+            col = vcol[inverse]
+            # Negated rows are flagged with a sign, rather than copying their coefficients
+            sign = np.frombuffer(rows.sign, dtype=np.int8)[row]
+            data = np.frombuffer(rows.coef, dtype=np.float64) * sign
+            nonzero = data != 0
+
+            if self.template:
+                #
+                # Templates store A in CSR format, and they include the
+                # parametric coefficients even if they are zero.  The
+                # position of each parametric coefficient in A.data is
+                # recorded, so its value can be updated.
+                #
+                k = np.array([k for k,_ in rows.coef_params], dtype=np.int64)
+                nonzero[k] = True
+                position = np.full(data.size, -1, dtype=np.int64)
+                for j in levelmap:
+                    mask = np.flatnonzero(nonzero & (nid == j))
+                    if mask.size > 0:
+                        L = levelmap[j]
+                        # Rows do not contain duplicate variables, so sorting the nonzeros defines the CSR format
+                        order = np.lexsort((col[mask], row[mask]))
+                        indptr = np.concatenate(([0], np.cumsum(np.bincount(row[mask], minlength=nrows))))
+                        level.A[L.id] = csr_matrix((data[mask][order], col[mask][order], indptr), shape=(nrows, L.x.num))
+                        position[mask[order]] = np.arange(mask.size)
+                for j in levelmap:
+                    params = np.flatnonzero(nid[k] == j)
+                    if params.size > 0:
+                        self.A_params.append( (j, position[k[params]], [rows.coef_params[i][1] for i in params], sign[k[params]]) )
+            else:
+                for j in levelmap:
+                    mask = nonzero & (nid == j)
+                    if np.any(mask):
+                        L = levelmap[j]
+                        level.A[L.id] = coo_matrix((data[mask], (row[mask], col[mask])), shape=(nrows, L.x.num)).todok()
             #
             # Q
             #
             Q = {}
-            for k in range(len(self.crepn)):
-                repn = self.crepn[k][0]
-                for i,val in enumerate(repn.quadratic_coefs):
-                    v1,v2 = repn.quadratic_vars[i]
-                    t1, nid1, j1 = vidmap[id(v1)]
-                    t2, nid2, j2 = vidmap[id(v2)]
-                    L1 = levelmap[nid1]
-                    L2 = levelmap[nid2]
-                    if nid1 <= nid2:
-                        if Q.get((nid1,nid2),None) is None:
-                            Q[nid1,nid2] = {}
-                        Q[nid1,nid2][k, j1+offset(t1,L1.x), j2+offset(t2,L2.x)] = pe.value(val)
-                    else:
-                        if Q.get((nid2,nid1),None) is None:
-                            Q[nid2,nid1] = {}
-                        Q[nid2,nid1][k, j2+offset(t2,L2.x), j1+offset(t1,L1.x)] = pe.value(val)
+            for k, v1, v2, val, param in rows.quadratic:
+                t1, nid1, j1 = vidmap[v1]
+                t2, nid2, j2 = vidmap[v2]
+                L1 = levelmap[nid1]
+                L2 = levelmap[nid2]
+                if nid1 <= nid2:
+                    key = (nid1, nid2, k, (j1+offset(t1,L1.x), j2+offset(t2,L2.x)))
+                else:
+                    key = (nid2, nid1, k, (j2+offset(t2,L2.x), j1+offset(t1,L1.x)))
+                if Q.get(key[:2],None) is None:
+                    Q[key[:2]] = {}
+                Q[key[:2]][(k,)+key[3]] = val
+                if param is not None:
+                    self.Q_params.append( key+param )
             for n1,n2 in Q:
-                level.Q[n1,n2] = (len(self.crepn), len(levelmap[n1].x),len(levelmap[n2].x)), Q[n1,n2]
+                level.Q[n1,n2] = (nrows, len(levelmap[n1].x),len(levelmap[n2].x)), Q[n1,n2]
             #
             # b
             #
-            b = []
-            for k in range(len(self.crepn)):
-                repn = self.crepn[k][0]
-                b.append(self.crepn[k][1] - repn.constant)
-            level.b = b
+            level.b = np.frombuffer(rows.rhs, dtype=np.float64)
+            if inequalities is None:
+                level.bl = np.frombuffer(rows.lhs, dtype=np.float64)
 
+    def update_level(self, level, var):
+        """
+        Update the values in the level object that depend on mutable
+        parameters.  The level must have been initialized from a template.
+        """
+        self.update_level_bounds(level, var)
+        if self.d_param is not None:
+            level.d = value(self.d_param)
+        for nid, j, expr in self.c_params:
+            level.c[nid][j] = value(expr)
+        for nid1, nid2, key, expr in self.P_params:
+            level.P[nid1,nid2][key] = value(expr)
+        for nid, position, exprs, sign in self.A_params:
+            level.A[nid].data[position] = sign * np.fromiter((value(expr) for expr in exprs), dtype=np.float64, count=len(exprs))
+        for nid1, nid2, k, key, sign, expr in self.Q_params:
+            level.Q[nid1,nid2][k][key] = sign*value(expr)
+        for k, sign, bound, constant in self.crepn.rhs_params:
+            level.b[k] = sign*(value(bound) - value(constant))
+        for k, bound, constant in self.crepn.lhs_params:
+            level.bl[k] = value(bound) - value(constant)
+
+
+class ConstraintRows(object):
+    """
+    The coefficients of the constraints in a submodel, stored in COO format.
+
+    Each constraint generates one or two rows, and each row has a sign
+    that is applied to its coefficients.  This avoids copying the
+    coefficients of rows that are negated.  The coefficients are stored
+    in typed arrays, so the expressions used to generate them can be
+    released immediately.
 
-def negate_repn(repn):
-    trepn = copy.copy(repn)
-    trepn.constant *= -1
-    trepn.linear_coefs = list(-1*repn.linear_coefs[i] for i in range(len(repn.linear_coefs)))
-    trepn.linear_vars = list(repn.linear_vars)
-    trepn.quadratic_coefs = list(-1*repn.quadratic_coefs[i] for i in range(len(repn.quadratic_coefs)))
-    trepn.quadratic_vars = list(repn.quadratic_vars)
-    return trepn
+    If template is True, then the coefficients and right-hand-sides that
+    are expressions of mutable parameters are also recorded.
+    """
+
+    def __init__(self, template=False):
+        self.row = array.array('q')     # row index of each nonzero
+        self.vid = array.array('q')     # variable id of each nonzero
+        self.coef = array.array('d')    # coefficient of each nonzero
+        self.sign = array.array('b')    # the sign of each row
+        self.rhs = array.array('d')     # right-hand side of each row
+        self.lhs = array.array('d')     # lower bound of each row (only for rows with lower bounds)
+        self.quadratic = []             # (row, vid1, vid2, coef, param) tuples
+        self.template = template
+        self.coef_params = []           # (nonzero, expr) tuples
+        self.rhs_params = []            # (row, sign, bound, constant) tuples
+        self.lhs_params = []            # (row, bound, constant) tuples
+
+    def __len__(self):
+        return len(self.rhs)
+
+    def add(self, vids, coefs, repn, sign, bound, slack=None):
+        """
+        Add a row with the linear terms (vids, coefs) and the quadratic
+        terms in repn:
 
+            sign * (body - repn.constant) <= sign * bound
 
-def collect_multilevel_tree(block, var, vidmap={}, sortOrder=SortComponents.unsorted, fixed=set(), inequalities=None):
+        If slack is not None, then this is the id of a slack variable with
+        coefficient 1 that is added to the row.
+        """
+        k = len(self.rhs)
+        n = len(vids)
+        self.row.extend(itertools.repeat(k, n))
+        self.vid.extend(vids)
+        if self.template:
+            nz = len(self.coef)
+            for i,val in enumerate(coefs):
+                if val.__class__ not in native_numeric_types:
+                    self.coef_params.append( (nz+i, val) )
+                    val = value(val)
+                self.coef.append(val)
+        else:
+            self.coef.extend(coefs)
+        if slack is not None:
+            # The sign is applied to all coefficients in the row
+            self.row.append(k)
+            self.vid.append(slack)
+            self.coef.append(sign)
+        self.sign.append(sign)
+        constant = repn.constant
+        if bound is None:
+            self.rhs.append(np.PINF)
+        else:
+            if self.template and (bound.__class__ not in native_numeric_types or constant.__class__ not in native_numeric_types):
+                self.rhs_params.append( (k, sign, bound, constant) )
+            self.rhs.append(sign*(value(bound) - value(constant)))
+        for (v1,v2),val in zip(repn.quadratic_vars, repn.quadratic_coefs):
+            param = None
+            if self.template and val.__class__ not in native_numeric_types:
+                param = (sign, val)
+            self.quadratic.append( (k, id(v1), id(v2), sign*value(val), param) )
+
+    def add_range(self, vids, coefs, repn, lower, upper):
+        """
+        Add a row with the linear terms (vids, coefs) and the quadratic
+        terms in repn:
+
+            lower - repn.constant <= body - repn.constant <= upper - repn.constant
+
+        The lower and upper bounds may be None.
+        """
+        k = len(self.rhs)
+        self.add(vids, coefs, repn, 1, upper)
+        constant = repn.constant
+        if lower is None:
+            self.lhs.append(np.NINF)
+        else:
+            if self.template and (lower.__class__ not in native_numeric_types or constant.__class__ not in native_numeric_types):
+                self.lhs_params.append( (k, lower, constant) )
+            self.lhs.append(value(lower) - value(constant))
+
+
+def collect_multilevel_tree(block, var, vidmap={}, sortOrder=SortComponents.unsorted, fixed=set(), inequalities=False, template=False):
     """
     Traverse the model and generate a tree of the SubModel components
+
+    If template is True, then the expressions of mutable parameters are
+    not evaluated, and the tree records the values that depend on them.
     """
     #
     # Roof of the current subtree, defined by the block
     #
-    curr = Node(block)
+    curr = Node(block, template)
     #
     # Recurse, collecting Submodel components
     #
     fixedvars = fixed | curr.fixedvars
     curr.children = \
-        [collect_multilevel_tree(submodel, var, vidmap, fixed=fixedvars, inequalities=inequalities) 
+        [collect_multilevel_tree(submodel, var, vidmap, fixed=fixedvars, inequalities=inequalities, template=template) 
          for submodel in block.component_objects(SubModel, active=True, descend_into=True, sort=sortOrder)]
     #
+    # Collect the variables used by the children
+    #
+    childvars = set()
+    for child in curr.children:
+        childvars |= child.unfixedvars
+    #
+    # Add ids for variables in this block that have not been specified 
+    # as fixed and which are not used in submodels.  Variables are
+    # added in the order that they are found in objectives and constraints.
+    #
+    knownvars = curr.fixedvars | childvars
+    newvars = []
+
+    def collect_vars(repn):
+        vids = []
+        for v in repn.linear_vars:
+            i = id(v)
+            vids.append(i)
+            if i not in knownvars:
+                curr.unfixedvars.add(i)
+                var[i] = v
+                newvars.append(i)
+                knownvars.add(i)
+        for vpair in repn.quadratic_vars:
+            for v in vpair:
+                i = id(v)
+                if i not in knownvars:
+                    curr.unfixedvars.add(i)
+                    var[i] = v
+                    newvars.append(i)
+                    knownvars.add(i)
+        return vids
+    #
     # Collect objectives and constraints in the current submodel.
     # Note that we do not recurse into SubModel blocks.
     #
     # Objectives
     #
-    for odata in block.component_data_objects(pe.Objective, active=True, sort=sortOrder, descend_into=True):
-        repn = generate_standard_repn(odata.expr)
+    for odata in block.component_data_objects(Objective, active=True, sort=sortOrder, descend_into=True):
+        repn = generate_standard_repn(odata.expr, compute_values=not template)
         degree = repn.polynomial_degree()
         assert (degree is not None), "Objective '%s' has a body that is not linear or quadratic" % odata.name
         if degree == 0:
             continue # trivial, so skip
+        collect_vars(repn)
         curr.orepn.append( (repn, odata.sense) )
         if degree == 2:
             curr.linear = False
     #
     # Constraints
     #
+    # The coefficients of each constraint are added to curr.crepn, and
+    # the repn object is discarded.
+    #
     # If we call conversion twice, then we delete the variables from the previous conversion
     #
     block.del_component('zzz_PAO_SlackVariables')
     block.del_component('zzz_PAO_SlackVariables_index')
-    block.zzz_PAO_SlackVariables = pe.VarList(domain=pe.NonNegativeReals)
-    for cdata in block.component_data_objects(pe.Constraint, active=True, sort=sortOrder, descend_into=True):
+    block.zzz_PAO_SlackVariables = VarList(domain=NonNegativeReals)
+    rows = curr.crepn
+    for cdata in block.component_data_objects(Constraint, active=True, sort=sortOrder, descend_into=True):
         if (not cdata.has_lb()) and (not cdata.has_ub()):
             assert not cdata.equality, "Constraint '%s' is an equality with an infinite right-hand-side" % cdata.name
             # non-binding, so skip
             continue                            # pragma: no cover
-        repn = generate_standard_repn(cdata.body)
+        repn = generate_standard_repn(cdata.body, compute_values=not template)
         degree = repn.polynomial_degree()
         assert (degree is not None), "Constraint '%s' has a body that is not linear or quadratic " % cdata.name
         if degree == 0:
             if cdata.equality:
-                assert pe.value(cdata.body) == pe.value(cdata.lower), "Constraint '%s' is constant but it is not satisfied (equality)" % cdata.name
+                assert value(cdata.body) == value(cdata.lower), "Constraint '%s' is constant but it is not satisfied (equality)" % cdata.name
             else:
                 if not cdata.lower is None:
-                    assert pe.value(cdata.body) >= pe.value(cdata.lower), "Constraint '%s' is constant but it is not satisfied (lower-bound)" % cdata.name
+                    assert value(cdata.body) >= value(cdata.lower), "Constraint '%s' is constant but it is not satisfied (lower-bound)" % cdata.name
                 if not cdata.upper is None:
-                    assert pe.value(cdata.body) <= pe.value(cdata.upper), "Constraint '%s' is constant but it is not satisfied (upper-bound)" % cdata.name
+                    assert value(cdata.body) <= value(cdata.upper), "Constraint '%s' is constant but it is not satisfied (upper-bound)" % cdata.name
             # trivial, so skip
             continue                            # pragma: no cover
-        else:
-            if degree == 2:
-                curr.linear = False
+        if degree == 2:
+            curr.linear = False
+        if cdata.lower is None and cdata.upper is None:             #pragma: no cover
+            # unbounded constraint
+            continue
+        vids = collect_vars(repn)
+        coefs = repn.linear_coefs
+        if inequalities is None:
+            rows.add_range(vids, coefs, repn, cdata.lower, cdata.upper)
+        elif cdata.equality:
+            rows.add(vids, coefs, repn, 1, cdata.lower)
             if inequalities:
-                if cdata.equality:
-                    val = pe.value(cdata.lower)
-                    curr.crepn.append( (repn, val) )
-                    curr.crepn.append( (negate_repn(repn), -val) )
-                else:
-                    if cdata.lower is None and cdata.upper is None:             #pragma: no cover
-                        # unbounded constraint
-                        continue
-                    if cdata.lower is not None:
-                        curr.crepn.append( (negate_repn(repn), -pe.value(cdata.lower)) )
-                    if cdata.upper is not None:
-                        curr.crepn.append( (repn, pe.value(cdata.upper)) )
-            else:
-                if cdata.equality:
-                    curr.crepn.append( (repn, pe.value(cdata.lower)) )
-                else:
-                    if cdata.lower is None and cdata.upper is None:             #pragma: no cover
-                        # unbounded constraint
-                        continue
-                    if cdata.lower is not None:
-                        trepn = negate_repn(repn)
-                        trepn.linear_coefs.append(1)
-                        trepn.linear_vars.append(block.zzz_PAO_SlackVariables.add())
-                        curr.crepn.append( (trepn, -pe.value(cdata.lower)) )
-                    if cdata.upper is not None:
-                        repn.linear_coefs = list(repn.linear_coefs)
-                        repn.linear_vars = list(repn.linear_vars)
-                        repn.linear_coefs.append(1)
-                        repn.linear_vars.append(block.zzz_PAO_SlackVariables.add())
-                        curr.crepn.append( (repn, pe.value(cdata.upper)) )
-    #
-    # Collect the variables used by the children
-    #
-    childvars = set()
-    for child in curr.children:
-        childvars |= child.unfixedvars
-    #
-    # Add ids for variables in this block that have not been specified 
-    # as fixed and which are not used in submodels
-    #
-    knownvars = curr.fixedvars | childvars
-    newvars = []
-    for repn in itertools.chain(curr.orepn, curr.crepn):
-        for v in repn[0].linear_vars:
-            i = id(v)
-            if i not in knownvars:
+                rows.add(vids, coefs, repn, -1, cdata.lower)
+        elif inequalities:
+            if cdata.lower is not None:
+                rows.add(vids, coefs, repn, -1, cdata.lower)
+            if cdata.upper is not None:
+                rows.add(vids, coefs, repn, 1, cdata.upper)
+        else:
+            for sign, bound in ((-1, cdata.lower), (1, cdata.upper)):
+                if bound is None:
+                    continue
+                slack = block.zzz_PAO_SlackVariables.add()
+                i = id(slack)
                 curr.unfixedvars.add(i)
-                var[i] = v
+                var[i] = slack
                 newvars.append(i)
                 knownvars.add(i)
-        if True:                                   # pragma: no cover
-            for v,w in repn[0].quadratic_vars:
-                i = id(v)
-                if i not in knownvars:
-                    curr.unfixedvars.add(i)
-                    var[i] = v
-                    newvars.append(i)
-                    knownvars.add(i)
-                i = id(w)
-                if i not in knownvars:
-                    curr.unfixedvars.add(i)
-                    var[i] = w
-                    newvars.append(i)
-                    knownvars.add(i)
+                rows.add(vids, coefs, repn, sign, bound, slack=i)
     #
     # Categorize the new variables that were found
     #
@@ -434,8 +586,10 @@ def convert_pyomo2LinearMultilevelProblem(model, *, determinism=1, inequalities=
 
     inequalities: bool
         If True, then the LinearMultilevelProblem object represents all
-        constraints as less-than-or-equal inequalities.  Otherwise,
+        constraints as less-than-or-equal inequalities.  If False,
         the LinearMultilevelProblem represents all constraints as equalities.
+        If None, then each constraint is represented with a single row
+        with lower and upper bounds.
 
     Returns
     -------
@@ -464,8 +618,10 @@ def convert_pyomo2QuadraticMultilevelProblem(model, *, determinism=1, inequaliti
 
     inequalities: bool
         If True, then the QuadraticMultilevelProblem object represents all
-        constraints as less-than-or-equal inequalities.  Otherwise,
+        constraints as less-than-or-equal inequalities.  If False,
         the QuadraticMultilevelProblem represents all constraints as equalities.
+        If None, then each constraint is represented with a single row
+        with lower and upper bounds.
 
     Returns
     -------
@@ -499,14 +655,25 @@ def convert_pyomo2MultilevelProblem(model, *, determinism=1, inequalities=True,
         whether the model is linear or quadratic.
     inequalities: bool, Default: True
         If True, then the multilevel problem object represents all
-        constraints as less-than-or-equal inequalities.  Otherwise,
+        constraints as less-than-or-equal inequalities.  If False,
         the multilevel problem represents all constraints as equalities.
+        If None, then each constraint is represented with a single row
+        with lower and upper bounds (see the **bl** and **b** level data).
 
     Returns
     -------
     LinearMultilevelProblem or QuadraticMultilevelProblem
         This object corresponds to the problem in **model**.
     """
+    M, soln_manager, _ = _convert_pyomo2MultilevelProblem(model, determinism=determinism, inequalities=inequalities, linear=linear)
+    return M, soln_manager
+
+
+def _convert_pyomo2MultilevelProblem(model, *, determinism=1, inequalities=True, linear=None, template=False):
+    """
+    Convert the model and return the multilevel problem, the solution
+    manager and the map from level ids to tree nodes.
+    """
     #
     # Cleanup global memory
     #
@@ -524,7 +691,7 @@ def convert_pyomo2MultilevelProblem(model, *, determinism=1, inequalities=True,
     #
     var = {}
     vidmap = {}
-    tree = collect_multilevel_tree(model, var, vidmap, sortOrder=sortOrder, inequalities=inequalities)
+    tree = collect_multilevel_tree(model, var, vidmap, sortOrder=sortOrder, inequalities=inequalities, template=template)
     #
     # We must have a least one SubModel
     #
@@ -557,8 +724,138 @@ def convert_pyomo2MultilevelProblem(model, *, determinism=1, inequalities=True,
     #
     Node.global_list = []
 
-    return M, PyomoSubmodel_SolutionManager_LBP(var, vidmap, id(model))
-    
+    return M, PyomoSubmodel_SolutionManager_LBP(var, vidmap, id(model)), treemap
+
+
+class ConversionSession(object):
+    """
+    Convert a Pyomo model to a multilevel problem, and update the
+    multilevel problem when the model is converted again.
+
+    The first conversion records a template of the problem structure:
+    the map from variables to levels, the rows generated by each
+    constraint, and the coefficients that are expressions of mutable
+    parameters or fixed variables.  If the structure of the model has
+    not changed when :meth:`convert` is called again, then these
+    expressions are re-evaluated and their values are written into the
+    existing multilevel problem.  Otherwise, the model is converted from
+    scratch.
+
+    The constraint matrices are stored in CSR format, and they include
+    the parametric coefficients even if their values are zero.
+
+    Args
+    ----
+    model
+        A Pyomo model object.
+    determinism: int, Default: 1
+        Indicates whether the traversal of **model** is ordered.
+    inequalities: bool, Default: True
+        If True, then the multilevel problem object represents all
+        constraints as less-than-or-equal inequalities.  If False,
+        the multilevel problem represents all constraints as equalities.
+        If None, then each constraint is represented with a single row
+        with lower and upper bounds (see the **bl** and **b** level data).
+    linear: bool
+        A flag that indicates whether the expected model representation
+        is linear (True) or quadratic (False).
+    """
+
+    def __init__(self, model, *, determinism=1, inequalities=True, linear=None):
+        self.model = model
+        self.determinism = determinism
+        self.inequalities = inequalities
+        self.linear = linear
+        self.problem = None
+        self.solution_manager = None
+        self.treemap = None
+        self.structure = None
+        self.variables = None
+        self._expressions = None
+        self._variables = None
+        self.num_conversions = 0        # conversions from scratch
+        self.num_updates = 0            # updates of the multilevel problem
+
+    def convert(self):
+        """
+        Convert the model, or update the multilevel problem generated by
+        the last conversion.
+
+        Returns
+        -------
+        tuple
+            The multilevel problem and the solution manager that copies
+            solutions into the model.
+        """
+        if self.problem is not None and self._structure()[0] == self.structure and \
+           self._variable_status(self._variables) == self.variables:
+            var = self.solution_manager.var
+            for L in self.problem.levels():
+                self.treemap[L.id].update_level(L, var)
+            self.num_updates += 1
+        else:
+            self.problem, self.solution_manager, self.treemap = \
+                _convert_pyomo2MultilevelProblem(self.model, determinism=self.determinism, inequalities=self.inequalities, linear=self.linear, template=True)
+            # The expressions are stored to ensure that their ids are not reused
+            self.structure, self._expressions = self._structure()
+            self._variables = self._collect_variables(self._expressions)
+            self.variables = self._variable_status(self._variables)
+            self.num_conversions += 1
+        return self.problem, self.solution_manager
+
+    def _structure(self):
+        """
+        A signature of the model structure.  This includes the active
+        constraints and objectives, the expressions that define them, and
+        the fixed variables declared in SubModel components.  The
+        expressions are not traversed.
+
+        Returns the signature and the expressions whose ids it contains.
+        """
+        model = self.model
+        structure = []
+        expressions = []
+        blocks = (Block, SubModel)
+        for submodel in model.component_data_objects(SubModel, active=True, descend_into=blocks):
+            structure.append( (id(submodel), tuple(id(v) for v in getattr(submodel, '_fixed', []))) )
+        for odata in model.component_data_objects(Objective, active=True, descend_into=blocks):
+            expressions.append(odata.expr)
+            structure.append( (id(odata), id(odata.expr), odata.sense) )
+        for cdata in model.component_data_objects(Constraint, active=True, descend_into=blocks):
+            expressions.append(cdata.body)
+            structure.append( (id(cdata), id(cdata.body), cdata.equality, cdata.has_lb(), cdata.has_ub()) )
+        return structure, expressions
+
+    def _collect_variables(self, expressions):
+        """
+        The variables in the expressions and in the multilevel problem.
+
+        Variables that are fixed when the model is converted are
+        constants in the template, so they are collected from the
+        expressions.  The expressions are only traversed when the model
+        is converted from scratch, since the signature changes if an
+        expression is replaced.
+        """
+        variables = {}
+        for expr in expressions:
+            for v in identify_variables(expr, include_fixed=True):
+                variables.setdefault(id(v), v)
+        for v in self.solution_manager.var.values():
+            variables.setdefault(id(v), v)
+        return list(variables.values())
+
+    def _variable_status(self, variables):
+        """
+        The fixed status and domain category of the variables.  An
+        integer variable with bounds [0,1] is a binary variable, so
+        changes of these bounds change the status.
+        """
+        status = []
+        for v in variables:
+            binary = v.is_binary() or (v.is_integer() and _bound_equals(v.lb, 0) and _bound_equals(v.ub, 1))
+            status.append( (v.fixed, binary, v.is_integer()) )
+        return status
+
 
 convert_pyomo2lmp = convert_pyomo2LinearMultilevelProblem
 convert_pyomo2qmp = convert_pyomo2QuadraticMultilevelProblem
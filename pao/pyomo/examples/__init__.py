@@ -1,13 +1,25 @@
 # pao.pyomo.examples
+#
+# Examples are imported when they are first accessed.
+#
+import importlib
 
-from . import bard511
-from . import barguel
-from . import besancon27
-from . import getachew_ex1
-from . import getachew_ex2
-from . import pineda
-from . import sip_example1
-from . import toyexample1
-from . import toyexample2
-from . import toyexample3
-from . import anadalingam
+_examples = ['bard511',
+             'barguel',
+             'besancon27',
+             'getachew_ex1',
+             'getachew_ex2',
+             'pineda',
+             'sip_example1',
+             'toyexample1',
+             'toyexample2',
+             'toyexample3',
+             'anadalingam']
+
+def __getattr__(name):
+    if name in _examples:
+        return importlib.import_module('.'+name, __name__)
+    raise AttributeError("module '%s' has no attribute '%s'" % (__name__, name))
+
+def __dir__():
+    return sorted(set(globals()) | set(_examples))
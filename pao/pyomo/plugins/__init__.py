@@ -18,7 +18,11 @@ This package defines plugins in pao.pyomo
 
 def load():
     """
-    Import the plugins defined in pao.pyomo
+    Declare the plugins defined in pao.pyomo
+
+    The solver modules are imported when a solver is first created.
     """
-    import pao.pyomo.solvers.mpr_solvers
+    from pao.common.solver import Solver
+    for name in ('pao.pyomo.FA', 'pao.pyomo.MIBS', 'pao.pyomo.REG', 'pao.pyomo.PCCG'):
+        Solver.declare(name, 'pao.pyomo.solvers.mpr_solvers')
 
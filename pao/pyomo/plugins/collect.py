@@ -28,8 +28,9 @@ from pyomo.core import (Var,
                         Reals,
                         Block,
                         Model,
-                        ConcreteModel)
-from scipy.sparse import coo_matrix
+                        ConcreteModel,
+                        value)
+from scipy.sparse import coo_matrix, csr_matrix
 from ..components import SubModel
 from numpy import zeros, array
 from collections import OrderedDict
@@ -45,23 +46,14 @@ def collect_global_vars(model):
 
     all_vars = dict()
     for v in model.component_objects(Var, descend_into=False, sort=True):
-        if v.is_indexed():
-            for vardata in v.values():
-                all_vars[id(vardata)] = vardata
-                if v.is_continuous():
-                    c_var_ids.add(id(vardata))
-                if v.is_binary():
-                    b_var_ids.add(id(vardata))
-                if v.is_integer():
-                    i_var_ids.add(id(vardata))
-        else:
-            all_vars[id(v)] = v
-            if v.is_continuous():
-                c_var_ids.add(id(v))
-            if v.is_binary():
-                b_var_ids.add(id(v))
-            if v.is_integer():
-                i_var_ids.add(id(v))
+        for vardata in (v.values() if v.is_indexed() else [v]):
+            all_vars[id(vardata)] = vardata
+            if vardata.is_continuous():
+                c_var_ids.add(id(vardata))
+            if vardata.is_binary():
+                b_var_ids.add(id(vardata))
+            if vardata.is_integer():
+                i_var_ids.add(id(vardata))
 
     return all_vars, c_var_ids, b_var_ids, i_var_ids
 
@@ -82,69 +74,55 @@ def collect_fixed_vars(block):
     return fixed_var_ids
 
 
-def collect_bilevel_objective_vector_representation(block, all_vars, c_var_ids, b_var_ids, i_var_ids, fixed_var_ids,
-                                                    standard_form=True):
+def _bilinear_terms(repn, var_index, fixed_var_ids):
+    """
+    Generate the bilinear terms in a standard repn as tuples
+    (var column, fixed column, coef).  Each term is generated for both
+    variables, since the bilinear term appears in the coefficients of
+    both.
+    """
+    for (var1, var2), coef in zip(repn.quadratic_vars, repn.quadratic_coefs):
+        if not (id(var1) in fixed_var_ids or id(var2) in fixed_var_ids):
+            raise RuntimeError(
+                "Error in matrix representation of bilevel Submodel block.  Bilinear expressions using"
+                " variables in the same bilevel upper- or lower-level.")
+        j1 = var_index.get(id(var1))
+        j2 = var_index.get(id(var2))
+        if j1 is None or j2 is None:
+            continue
+        yield j1, j2, coef
+        yield j2, j1, coef
+
+
+def collect_bilevel_objective_vector_representation(block, var_index, fixed_var_ids, standard_form=True):
     """
-    Collects the terms for the objective
-    for the given local variable scope, per variable type (c:continuous,
-    b:binary, i:integer). Nested Blocks (or SubModels) are not considered
-    within local scope.
+    Collects the terms for the objective of the given block. Nested
+    Blocks (or SubModels) are not considered within local scope.
 
     Arguments:
         block: A Pyomo Model, Block, or SubModel that will be processed to
                 collect the objective terms.
-        all_vars: An iterable, sorted object with Variable and VarData values.
-        c_var_ids: Unique id for vars that are continuous and not fixed on this block.
-        b_var_ids: Unique id for vars that are binary and not fixed on this block.
-        i_var_ids: Unique id for vars that are integer and not fixed on this block.
+        var_index: A dictionary that maps the id of each variable to its column.
         fixed_var_ids: Unique id for vars that are fixed on this block.
         standard_form: Whether to put the model into stanndard form representation (max for subproblem; min for model).
 
     Returns: Tuple with the following values:
-    C^{c}:         The C coefficient scalar associate to continuous vars
-    C_q^{c}:       The C coefficient vector associate to continuous vars in bilinear terms
-    C^{b}:         The C coefficient scalar associate to binary vars
-    C_q^{b}:       The C coefficient vector associate to binary vars in bilinear terms
-    C^{i}:         The C coefficient scalar associate to integer vars
-    C_q^{i}:       The C coefficient vector associate to integer vars in bilinear terms
-    C^{f}:         The C coefficient scalar associate to fixed vars
-    C_q^{f}:       The C coefficient vector associate to fixed vars in bilinear terms
-    C_constant:    The C coefficient vector associate to constant terms
+    C:             A dense array with the linear coefficients of the variables
+    C_q:           A CSR matrix where row j contains the coefficients of the
+                   bilinear terms with variable j
+    C_constant:    The constant term
     """
-
-    # number of variables
-    _c = len(all_vars)
-
-    # C coefficient for linear terms, continuous var
-    C_c = {k: 0. for k in c_var_ids}
-
-    # C coefficients for bilinear terms, for the continuous var
-    C_c_q = {k: zeros(_c) for k in c_var_ids}
-
-    # C coefficient for linear terms, binary var
-    C_b = {k: 0. for k in b_var_ids}
-
-    # C coefficients for bilinear terms, for the binary var
-    C_b_q = {k: zeros(_c) for k in b_var_ids}
-
-    # C coefficient for linear terms, integer var
-    C_i = {k: 0. for k in i_var_ids}
-
-    # C coefficients for bilinear terms, for the integer var
-    C_i_q = {k: zeros(_c) for k in i_var_ids}
-
-    # C coefficient for linear terms, fixed var in submodel
-    C_f = {k: 0. for k in fixed_var_ids}
-
-    # C coefficients for bilinear terms, fixed var in submodel
-    C_f_q = {k: zeros(_c) for k in fixed_var_ids}
-
+    nvars = len(var_index)
+    C = zeros(nvars)
+    rows = []
+    cols = []
+    vals = []
     C_constant = 0.
 
     nobj = 0
     for odata in block.component_objects(Objective, active=True):
         for ndx in odata:
-            o_terms = generate_standard_repn(odata[ndx].expr, compute_values=False)
+            o_terms = generate_standard_repn(odata[ndx].expr, compute_values=True)
             C_constant = o_terms.constant
             _sign = 1.
             if odata[ndx].sense == minimize: # swith to a maximize lower-level
@@ -154,119 +132,57 @@ def collect_bilevel_objective_vector_representation(block, all_vars, c_var_ids,
                 if standard_form and id(block) == id(block.root_block()):
                     _sign = -1.
             for var, coef in zip(o_terms.linear_vars, o_terms.linear_coefs):
-                _vid = id(var)
-                if _vid in c_var_ids:
-                    C_c[_vid] = _sign * coef
-                if _vid in b_var_ids:
-                    C_b[_vid] = _sign * coef
-                if _vid in i_var_ids:
-                    C_i[_vid] = _sign * coef
-                if _vid in fixed_var_ids:
-                    C_f[_vid] = _sign * coef
-
-            for (var1, var2), coef in zip(o_terms.quadratic_vars, o_terms.quadratic_coefs):
-                for (var, fixed) in [(var1, var2), (var2, var1)]:
-                    _vid = id(var)
-                    _col = list(all_vars.keys()).index(id(fixed)) if (id(fixed) in fixed_var_ids or id(var) in fixed_var_ids) else None
-                    if not _col is None:
-                        if _vid in c_var_ids:
-                            C_c_q[_vid][_col] = _sign * coef
-                        if _vid in b_var_ids:
-                            C_b_q[_vid][_col] = _sign * coef
-                        if _vid in i_var_ids:
-                            C_i_q[_vid][_col] = _sign * coef
-                        if _vid in fixed_var_ids:
-                            C_f_q[_vid][_col] = _sign * coef
-                    else:
-                        raise RuntimeError(
-                            "Error in matrix representation of bilevel Submodel block.  Bilinear expressions using"
-                            "variables in the same bilevel upper- or lower-level.")
+                _col = var_index.get(id(var))
+                if not _col is None:
+                    C[_col] = _sign * coef
+            for _row, _col, coef in _bilinear_terms(o_terms, var_index, fixed_var_ids):
+                rows.append(_row)
+                cols.append(_col)
+                vals.append(_sign * coef)
             nobj += 1
     if nobj == 0:
         raise RuntimeError("Error in vector representation of bilevel Submodel block.  No objective expression.")
     if nobj > 1:
         raise RuntimeError("Error in vector representation of bilevel Submodel block.  Multiple objective expressions.")
 
-    return C_c, C_c_q, C_b, C_b_q, C_i, C_i_q, C_f, C_f_q, C_constant
+    C_q = coo_matrix((vals, (rows, cols)), shape=(nvars, nvars)).tocsr()
+    return C, C_q, C_constant
 
-def collect_bilevel_constraint_matrix_representation(block, all_vars, c_var_ids, b_var_ids, i_var_ids, fixed_var_ids,
-                                                     standard_form=True):
+
+def collect_bilevel_constraint_matrix_representation(block, var_index, fixed_var_ids, standard_form=True):
     """
-    Collects the terms for each ==, >= and <= constraints
-    for the given local variable scope, per variable type (c:continuous,
-    b:binary, i:integer). Nested Blocks (or SubModels) are not considered
-    within local scope.
-
-    TODO: The way the coo_matrix is constructed (by casting a numpy matrix)
-    TODO: may be resource intensive. If that is the case, we will want to update the code
-    TODO: as follows:
-    # Constructing a coo_matrix using ijv format
-    row  = np.array([r1, ...., rN])
-    col  = np.array([c1, ...., cN])
-    data = np.array([d1, ...., dN])
-    _r = len(cons_sense_rhs)
-    _c = len(all_vars)
-    coo_matrix((data, (row, col)), shape=(_r, _c))
+    Collects the terms for each ==, >= and <= constraints of the given
+    block.  Nested Blocks are considered within local scope, but
+    SubModels are not.
+
+    The coefficients are collected in COO format, and they are returned
+    in CSR matrices.  The rows are ordered by constraint, and constraints
+    with lower and upper bounds generate two rows.
 
     Arguments:
         block: A Pyomo Model, Block, or SubModel that will be processed to
                 collect terms for Ax <= b, Ax >= b, and Ax == b.
-        all_vars: An iterable, sorted object with Variable and VarData values.
-        c_var_ids: Unique id for vars that are continuous and not fixed on this block.
-        b_var_ids: Unique id for vars that are binary and not fixed on this block.
-        i_var_ids: Unique id for vars that are integer and not fixed on this block.
+        var_index: A dictionary that maps the id of each variable to its column.
         fixed_var_ids: Unique id for vars that are fixed on this block.
         standard_form: Whether to put the model into stanndard form representation (<=, ==).
 
     Returns: Tuple with the following values:
-    A^{c}:         The A coefficient vector associate to continuous vars
-    A_q^{c}:       The A coefficient matrix associate to continuous vars in bilinear terms
-    A^{b}:         The A coefficient vector associate to binary vars
-    A_q^{b}:       The A coefficient matrix associate to binary vars in bilinear terms
-    A^{i}:         The A coefficient vector associate to integer vars
-    A_q^{i}:       The A coefficient matrix associate to integer vars in bilinear terms
-    A^{f}:         The A coefficient vector associate to fixed vars
-    A_q^{f}:       The A coefficient matrix associate to fixed vars in bilinear terms
-    cons_sense_rhs: Unique id for constraints on the block.
+    A:             A CSR matrix with the linear coefficients
+    A_q:           A dictionary that maps the column j of a variable to a CSR
+                   matrix with the coefficients of its bilinear terms.  The
+                   coefficient of the term with variables j and k in row i is in
+                   row i and column k.  Only variables that appear in bilinear
+                   terms are included.
+    cons_sense_rhs: An ordered dictionary that maps (constraint id, sense) to the rhs
     """
-
-    # number of constraints
-    _r = 0
-    for data in block.component_map(Constraint, active=True).itervalues():
-        _r += len(data)
-        if data.has_lb() and data.has_ub():
-            _r += len(data)
-
-    # number of variables
-    _c = len(all_vars)
-
-    # A coefficients for linear terms, continuous var
-    A_c = {k: zeros(_r) for k in c_var_ids}
-
-    # A coefficients for bilinear terms, for the continuous var
-    A_c_q = {k: zeros((_r, _c)) for k in c_var_ids}
-
-    # A coefficients for linear terms, binary var
-    A_b = {k: zeros(_r) for k in b_var_ids}
-
-    # A coefficients for bilinear terms, for the binary var
-    A_b_q = {k: zeros((_r, _c)) for k in b_var_ids}
-
-    # A coefficients for linear terms, integer var
-    A_i = {k: zeros(_r) for k in i_var_ids}
-
-    # A coefficients for bilinear terms, for the integer var
-    A_i_q = {k: zeros((_r, _c)) for k in i_var_ids}
-
-    # A coefficients for linear terms, fixed var in submodel
-    A_f = {k: zeros(_r) for k in fixed_var_ids}
-
-    # A coefficients for bilinear terms, fixed var in submodel
-    A_f_q = {k: zeros((_r, _c)) for k in fixed_var_ids}
+    nvars = len(var_index)
+    rows = []
+    cols = []
+    vals = []
+    q_terms = {}
 
     cons_sense_rhs = OrderedDict()
     for c in block.component_objects(Constraint, active=True, descend_into=True):
-        sense = list()
         for ndx in c:
             con = c[ndx]
             _cid = id(con)
@@ -276,67 +192,61 @@ def collect_bilevel_constraint_matrix_representation(block, all_vars, c_var_ids,
             upper_terms = generate_standard_repn(con.upper, compute_values=False) \
                 if not con.upper is None else None
             body_terms = generate_standard_repn(con.body, compute_values=True)
+            sense = list()
             if con.equality:
                 sense.append('e')
-                cons_sense_rhs[id(con), 'e'] = lower_terms.constant - body_terms.constant
+                cons_sense_rhs[_cid, 'e'] = lower_terms.constant - body_terms.constant
             else:
                 if not (lower_terms is None):
                     if standard_form:
                         sense.append('g->l')
-                        cons_sense_rhs[id(con), 'g->l'] = -(lower_terms.constant - body_terms.constant)
+                        cons_sense_rhs[_cid, 'g->l'] = -(lower_terms.constant - body_terms.constant)
                     else:
                         sense.append('g')
-                        cons_sense_rhs[id(con), 'g'] = lower_terms.constant - body_terms.constant
+                        cons_sense_rhs[_cid, 'g'] = lower_terms.constant - body_terms.constant
                 if not (upper_terms is None):
                     sense.append('l')
-                    cons_sense_rhs[id(con), 'l'] = upper_terms.constant - body_terms.constant
+                    cons_sense_rhs[_cid, 'l'] = upper_terms.constant - body_terms.constant
+            if len(sense) == 0:
+                continue
+
+            linear = [(var_index[id(var)], coef) for var, coef in zip(body_terms.linear_vars, body_terms.linear_coefs)
+                      if id(var) in var_index]
+            bilinear = list(_bilinear_terms(body_terms, var_index, fixed_var_ids))
+            _row = len(cons_sense_rhs) - len(sense)
             for s in sense:
-                _sign = 1.
-                if s=='g->l':
-                    _sign = -1.
-                _row = list(cons_sense_rhs.keys()).index((_cid, s))
-
-                for var, coef in zip(body_terms.linear_vars, body_terms.linear_coefs):
-                    _vid = id(var)
-                    if _vid in c_var_ids:
-                        A_c[_vid][_row] = _sign*coef
-                    if _vid in b_var_ids:
-                        A_b[_vid][_row] = _sign*coef
-                    if _vid in i_var_ids:
-                        A_i[_vid][_row] = _sign*coef
-                    if _vid in fixed_var_ids:
-                        A_f[_vid][_row] = _sign*coef
-
-                for (var1, var2), coef in zip(body_terms.quadratic_vars, body_terms.quadratic_coefs):
-                    for (var, fixed) in [(var1, var2), (var2, var1)]:
-                        _vid = id(var)
-                        _col = list(all_vars.keys()).index(id(fixed)) if (id(fixed) in fixed_var_ids or id(var) in fixed_var_ids) else None
-                        if not _col is None:
-                            if _vid in c_var_ids:
-                                A_c_q[_vid][_row, _col] = _sign*coef
-                            if _vid in b_var_ids:
-                                A_b_q[_vid][_row, _col] = _sign*coef
-                            if _vid in i_var_ids:
-                                A_i_q[_vid][_row, _col] = _sign*coef
-                            if _vid in fixed_var_ids:
-                                A_f_q[_vid][_row, _col] = _sign*coef
-                        else:
-                            raise RuntimeError(
-                                "Error in matrix representation of bilevel Submodel block.  Bilinear expressions using"
-                                " variables in the same bilevel upper- or lower-level.")
-
-    A_c_q = {k: coo_matrix(v) for k, v in A_c_q.items()}
-    A_b_q = {k: coo_matrix(v) for k, v in A_b_q.items()}
-    A_i_q = {k: coo_matrix(v) for k, v in A_i_q.items()}
-    A_f_q = {k: coo_matrix(v) for k, v in A_f_q.items()}
-
-    return A_c, A_c_q, A_b, A_b_q, A_i, A_i_q, A_f, A_f_q, cons_sense_rhs
+                _sign = -1. if s == 'g->l' else 1.
+                for _col, coef in linear:
+                    rows.append(_row)
+                    cols.append(_col)
+                    vals.append(_sign*coef)
+                for _var, _col, coef in bilinear:
+                    q_rows, q_cols, q_vals = q_terms.setdefault(_var, ([], [], []))
+                    q_rows.append(_row)
+                    q_cols.append(_col)
+                    q_vals.append(_sign*coef)
+                _row += 1
+
+    nrows = len(cons_sense_rhs)
+    A = coo_matrix((vals, (rows, cols)), shape=(nrows, nvars)).tocsr()
+    A_q = {_var: coo_matrix((q_vals, (q_rows, q_cols)), shape=(nrows, nvars)).tocsr()
+           for _var, (q_rows, q_cols, q_vals) in q_terms.items()}
+
+    return A, A_q, cons_sense_rhs
 
 
 class BilevelMatrixRepn():
     """
     A class that creates an object which contains all the matrix expressions
     to the Pyomo model.
+
+    The coefficients of each block are collected once into scipy CSR
+    matrices and dense arrays.  The columns are the variables declared on
+    the model, in the order given by the var_index attribute, and the
+    rows of each block are given by its row_index attribute.  The
+    matrices() method returns the data for a block, and the
+    coef_matrices() and cost_vectors() methods return cached slices of
+    these matrices for a variable.
     """
 
     def __init__(self, model, **kwds):
@@ -357,188 +267,106 @@ class BilevelMatrixRepn():
         self._b_var_ids = b_var_ids
         self._i_var_ids = i_var_ids
 
+        # The column of each variable
+        self.var_index = {_vid: i for i, _vid in enumerate(all_vars)}
+
         # All fixed variables that exist on specified SubModel blocks (these do not exist on the Model block)
         self._fixed_var_ids = {block.name: collect_fixed_vars(block) for block in model.component_objects(SubModel)}
 
-        # A coefficients for linear terms, continuous var
-        self._A_c = {k: dict() for k in self._all_models}
-        # A coefficients for bilinear terms, for the continuous var
-        self._A_c_q = {k: dict() for k in self._all_models}
-        # A coefficients for linear terms, binary var
-        self._A_b = {k: dict() for k in self._all_models}
-        # A coefficients for bilinear terms, for the binary var
-        self._A_b_q = {k: dict() for k in self._all_models}
-        # A coefficients for linear terms, integer var
-        self._A_i = {k: dict() for k in self._all_models}
-        # A coefficients for bilinear terms, for the integer var
-        self._A_i_q = {k: dict() for k in self._all_models}
-        # A coefficients for linear terms, fixed var in SubModel
-        self._A_f = {k: dict() for k in self._all_models - {model.name}}
-        # A coefficients for bilinear terms, fixed var in SubModel
-        self._A_f_q = {k: dict() for k in self._all_models - {model.name}}
-        # All constraint ids, corresponding sense and rhs; includes two entries for constraint declarations LHS <= body <= RHS
-        # that are not equality constraints
-        self._cons_sense_rhs = {k: dict() for k in self._all_models}
-
-        # C coefficients for linear terms, continuous var
-        self._C_c = {k: dict() for k in self._all_models}
-        # C coefficients for bilinear terms, for the continuous var
-        self._C_c_q = {k: dict() for k in self._all_models}
-        # C coefficients for linear terms, binary var
-        self._C_b = {k: dict() for k in self._all_models}
-        # C coefficients for bilinear terms, for the binary var
-        self._C_b_q = {k: dict() for k in self._all_models}
-        # C coefficients for linear terms, integer var
-        self._C_i = {k: dict() for k in self._all_models}
-        # C coefficients for bilinear terms, for the integer var
-        self._C_i_q = {k: dict() for k in self._all_models}
-        # C coefficients for linear terms, fixed var in SubModel
-        self._C_f = {k: dict() for k in self._all_models - {model.name}}
-        # C coefficients for bilinear terms, fixed var in SubModel
-        self._C_f_q = {k: dict() for k in self._all_models - {model.name}}
-        # C coefficients for constant terms
-        self._C_constant = {k: dict() for k in self._all_models}
+        # The matrix data for each block
+        self._data = {}
+        # The row of each (constraint id, sense) for each block
+        self.row_index = {}
+        # Cached slices of the matrices
+        self._sense_cache = {}
+        self._coef_cache = {}
 
         self._preprocess()
 
-    def cost_vectors(self, block, var):
-        if id(block) != id(block.root_block()) and id(var) in self._fixed_var_ids[block.name]:
-            C = (self._C_f.get(block.name)).get(id(var))
-            C_q = (self._C_f_q.get(block.name)).get(id(var))
-        else:
-            if var.is_continuous():
-                C = (self._C_c.get(block.name)).get(id(var))
-                C_q = (self._C_c_q.get(block.name)).get(id(var))
-            if var.is_binary():
-                C = (self._C_b.get(block.name)).get(id(var))
-                C_q = (self._C_c_q.get(block.name)).get(id(var))
-            if var.is_integer():
-                C = (self._C_i.get(block.name)).get(id(var))
-                C_q = (self._C_i_q.get(block.name)).get(id(var))
+    def matrices(self, block):
+        """
+        Returns a Bunch with the data for the block:
+
+        A:          CSR matrix of linear constraint coefficients
+        A_q:        Dictionary that maps the column of a variable to a CSR
+                    matrix of its bilinear constraint coefficients
+        b:          The constraint right-hand-sides
+        sense:      The constraint senses ('e', 'l', 'g' or 'g->l')
+        C:          Dense array of linear objective coefficients
+        C_q:        CSR matrix of bilinear objective coefficients
+        C_constant: The objective constant
+        """
+        return self._data[block.name]
 
-        C_constant = self._C_constant.get(block.name)
+    def cost_vectors(self, block, var):
+        _col = self.var_index.get(id(var))
+        if _col is None:
+            return None, None, self._data[block.name].C_constant
+        data = self._data[block.name]
+        key = (block.name, _col)
+        C_q = self._coef_cache.get(key)
+        if C_q is None:
+            C_q = self._coef_cache[key] = data.C_q[_col].toarray().ravel()
 
-        return C, C_q, C_constant  # returns coo_matrix for selected rows
+        return data.C[_col], C_q, data.C_constant
 
     def coef_matrices(self, block, var, sense=None):
-        if id(block) != id(block.root_block()) and id(var) in self._fixed_var_ids[block.name]:
-            A = (self._A_f.get(block.name)).get(id(var))
-            A_q = (self._A_f_q.get(block.name)).get(id(var))
-        else:
-            if var.is_continuous():
-                A = (self._A_c.get(block.name)).get(id(var))
-                A_q = (self._A_c_q.get(block.name)).get(id(var))
-            if var.is_binary():
-                A = (self._A_b.get(block.name)).get(id(var))
-                A_q = (self._A_c_q.get(block.name)).get(id(var))
-            if var.is_integer():
-                A = (self._A_i.get(block.name)).get(id(var))
-                A_q = (self._A_i_q.get(block.name)).get(id(var))
-
         # return the full matrices if the sign on the constraint is not specified
-        cons_sense_rhs = self._cons_sense_rhs[block.name]
-        b = [rhs for (_cid, _sense), rhs in cons_sense_rhs.items()]
-        sign = [_sense if _sense != 'g->l' else 'l' for (_cid, _sense), rhs in cons_sense_rhs.items()]
         if sense is None or not sense in ['e', 'l', 'g','g->l']:
-            return A, A_q, sign, array(b)
-
-        # grouping 'l' (<=) and those 'g->l' transformed to (<=) together
-        if sense=='l':
-            sense = ['l','g->l']
+            sense = None
+        rows = self._select_rows(block, sense)
+        _col = self.var_index.get(id(var))
+        if _col is None:
+            return None, None, rows.sign, rows.b
+
+        key = (block.name, sense, _col)
+        ans = self._coef_cache.get(key)
+        if ans is None:
+            A_q = self._data[block.name].A_q.get(_col)
+            if A_q is None:
+                A_q = csr_matrix((rows.A.shape[0], len(self.var_index)))
+            elif not rows.indices is None:
+                A_q = A_q[rows.indices]
+            ans = self._coef_cache[key] = (rows.A[:, _col].toarray().ravel(), A_q)
+
+        return ans[0], ans[1], rows.sign, rows.b
+
+    def _select_rows(self, block, sense):
+        key = (block.name, sense)
+        rows = self._sense_cache.get(key)
+        if not rows is None:
+            return rows
+
+        data = self._data[block.name]
+        if sense is None:
+            indices = None
+        else:
+            # grouping 'l' (<=) and those 'g->l' transformed to (<=) together
+            senses = ['l','g->l'] if sense == 'l' else [sense]
+            indices = array([i for i, _sense in enumerate(data.sense) if _sense in senses], dtype=int)
+            if len(indices) == len(data.sense):
+                indices = None
+        if indices is None:
+            rows = Bunch(indices=None, A=data.A.tocsc(), b=data.b, sign=data.sign)
         else:
-            sense=[sense]
-
-        # return partial matrices if the sign on the constraint is specified
-        indices = list()
-        b = list()
-        sign = list()
-        for (_cid, _sense), rhs in cons_sense_rhs.items():
-            if _sense in sense:
-                idx = list(cons_sense_rhs.keys()).index((_cid, _sense))
-                indices.append(idx)
-                b.append(rhs)
-                if _sense == 'g->l':
-                    sign.append('l')
-                else:
-                    sign.append(_sense)
-
-        if len(indices) == 0:
-            return array(indices), coo_matrix((0, 0)), sign, array(b) # return empty coo_matrix for A, A_q
-
-        cons_sense_rhs = self._cons_sense_rhs[block.name]
-        if len(indices) == len(cons_sense_rhs):
-            return A, A_q, sign, array(b)  # return the full coo_matrix
-
-        return A[indices], A_q.todok()[indices, :].tocoo(), sign, array(b)  # returns coo_matrix for selected rows
+            rows = Bunch(indices=indices, A=data.A[indices].tocsc(), b=data.b[indices], sign=[data.sign[i] for i in indices])
+        self._sense_cache[key] = rows
+        return rows
 
     def _preprocess(self):
-        # Preprocess the main Model (upper-level)
-        A_c, A_c_q, A_b, A_b_q, A_i, A_i_q, A_f, A_f_q, cons_sense_rhs = \
-            collect_bilevel_constraint_matrix_representation(self._model, \
-                                                             self._all_vars, \
-                                                             self._c_var_ids, \
-                                                             self._b_var_ids, \
-                                                             self._i_var_ids, \
-                                                             [], \
-                                                             standard_form = self._standard_form)
-        self._A_c[self._model.name] = A_c
-        self._A_c_q[self._model.name] = A_c_q
-        self._A_b[self._model.name] = A_b
-        self._A_b_q[self._model.name] = A_b_q
-        self._A_i[self._model.name] = A_i
-        self._A_i_q[self._model.name] = A_i_q
-        self._cons_sense_rhs[self._model.name] = cons_sense_rhs
-
-        C_c, C_c_q, C_b, C_b_q, C_i, C_i_q, C_f, C_f_q, C_constant = \
-            collect_bilevel_objective_vector_representation(self._model, \
-                                                            self._all_vars, \
-                                                            self._c_var_ids, \
-                                                            self._b_var_ids, \
-                                                            self._i_var_ids, \
-                                                            [], \
-                                                            standard_form = self._standard_form)
-        self._C_c[self._model.name] = C_c
-        self._C_c_q[self._model.name] = C_c_q
-        self._C_b[self._model.name] = C_b
-        self._C_b_q[self._model.name] = C_b_q
-        self._C_i[self._model.name] = C_i
-        self._C_i_q[self._model.name] = C_i_q
-        self._C_constant[self._model.name] = C_constant
-
-        # Preprocess each SubModel (lower-level(s))
-        for block in self._model.component_objects(SubModel):
-            A_c, A_c_q, A_b, A_b_q, A_i, A_i_q, A_f, A_f_q, cons_sense_rhs = \
-                collect_bilevel_constraint_matrix_representation(block, \
-                                                                 self._all_vars, \
-                                                                 self._c_var_ids - self._fixed_var_ids[block.name], \
-                                                                 self._b_var_ids - self._fixed_var_ids[block.name], \
-                                                                 self._i_var_ids - self._fixed_var_ids[block.name], \
-                                                                 self._fixed_var_ids[block.name], \
+        # Preprocess the main Model (upper-level) and each SubModel (lower-level(s))
+        for block in [self._model] + list(self._model.component_objects(SubModel)):
+            fixed_var_ids = self._fixed_var_ids.get(block.name, set()) if not block is self._model else set()
+            A, A_q, cons_sense_rhs = \
+                collect_bilevel_constraint_matrix_representation(block, self.var_index, fixed_var_ids,
                                                                  standard_form = self._standard_form)
-            self._A_c[block.name] = A_c
-            self._A_c_q[block.name] = A_c_q
-            self._A_b[block.name] = A_b
-            self._A_b_q[block.name] = A_b_q
-            self._A_i[block.name] = A_i
-            self._A_i_q[block.name] = A_i_q
-            self._A_f[block.name] = A_f
-            self._A_f_q[block.name] = A_f_q
-            self._cons_sense_rhs[block.name] = cons_sense_rhs
-
-            C_c, C_c_q, C_b, C_b_q, C_i, C_i_q, C_f, C_f_q, C_constant = \
-                collect_bilevel_objective_vector_representation(block, \
-                                                                self._all_vars, \
-                                                                self._c_var_ids - self._fixed_var_ids[block.name], \
-                                                                self._b_var_ids - self._fixed_var_ids[block.name], \
-                                                                self._i_var_ids - self._fixed_var_ids[block.name], \
-                                                                self._fixed_var_ids[block.name], \
+            C, C_q, C_constant = \
+                collect_bilevel_objective_vector_representation(block, self.var_index, fixed_var_ids,
                                                                 standard_form = self._standard_form)
-            self._C_c[block.name] = C_c
-            self._C_c_q[block.name] = C_c_q
-            self._C_b[block.name] = C_b
-            self._C_b_q[block.name] = C_b_q
-            self._C_i[block.name] = C_i
-            self._C_i_q[block.name] = C_i_q
-            self._C_f[block.name] = C_f
-            self._C_f_q[block.name] = C_f_q
-            self._C_constant[block.name] = C_constant
+            sense = [_sense for (_cid, _sense) in cons_sense_rhs]
+            self.row_index[block.name] = {key: i for i, key in enumerate(cons_sense_rhs)}
+            self._data[block.name] = Bunch(A=A, A_q=A_q,
+                                           b=array([value(rhs) for rhs in cons_sense_rhs.values()], dtype=float),
+                                           sense=sense,
+                                           sign=[_sense if _sense != 'g->l' else 'l' for _sense in sense],
+                                           C=C, C_q=C_q, C_constant=C_constant)
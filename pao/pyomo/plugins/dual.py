@@ -12,14 +12,40 @@
 pao.pyomo.plugins.dual
 """
 
+import multiprocessing
 from pyomo.core import Objective, Block, Var, Set, Constraint
 from pyomo.core.base.block import _BlockData
 from pyomo.core import TransformationFactory
+from pao.duality.collect import (collect_fixed_modelvars,
+                                 collect_dual_matrix_representation,
+                                 encode_dual_matrix_representation,
+                                 decode_dual_matrix_representation)
+from ..components import SubModel
 from .transform import BaseBilevelTransformation
 import logging
 
 logger = logging.getLogger(__name__)
 
+#
+# The transformation that is executed by the worker processes.  This is
+# set before the workers are forked, so the workers can access the model.
+#
+_worker_transformation = None
+
+
+def _collect_dual_worker(name):
+    """
+    Collect the data for the dual of a SubModel.
+
+    This function is executed in a forked process, so the ids of the
+    model components are the same as in the parent process.
+    """
+    sub = _worker_transformation.submodel[name]
+    fixed_modelvars = collect_fixed_modelvars(sub, fixed=_worker_transformation.fixed_vardata[name])
+    repn = collect_dual_matrix_representation(sub, fixed_modelvars)
+    return encode_dual_matrix_representation(repn)
+
+
 @TransformationFactory.register('pao.pyomo.linear_dual', doc="Dualize a SubModel block")
 class LinearDualBilevelTransformation(BaseBilevelTransformation):
     """
@@ -30,28 +56,79 @@ class LinearDualBilevelTransformation(BaseBilevelTransformation):
     The use_dual_objective can be used to simplify the final problem 
     representation sligthly, in the case where there are no constraints in the 
     upper-level problem.
+
+    The naming option is passed to create_linear_dual_from().  If this is
+    'indexed', then the dual blocks contain indexed dual variables and
+    constraints, which are much faster to generate for large SubModels.
+
+    The processes option specifies the number of worker processes that
+    are used to collect the dual data of the SubModels when naming is
+    'indexed'.  The Pyomo components are created in the parent process.
+    Worker processes are created with the 'fork' start method, so the
+    SubModels are dualized serially if this is not supported.
     """
 
+    def _collect_in_parallel(self, model, processes):
+        """
+        Collect the dual data of the SubModels in a process pool.  This
+        returns a dictionary that maps SubModel names to the dual data.
+        SubModels are omitted if their data cannot be collected by a
+        worker process.
+        """
+        global _worker_transformation
+        names = model._transformation_data['pao.pyomo.linear_dual'].submodel
+        if processes is None or processes <= 1 or len(names) <= 1 or \
+           not 'fork' in multiprocessing.get_all_start_methods():
+            return {}
+        _worker_transformation = self
+        try:
+            ctx = multiprocessing.get_context('fork')
+            with ctx.Pool(min(processes, len(names))) as pool:
+                encoded = pool.map(_collect_dual_worker, names)
+        finally:
+            _worker_transformation = None
+        #
+        # Map the component ids back to the model components
+        #
+        components = {id(var):var for var in model.component_data_objects(Var, descend_into=(Block, SubModel))}
+        repn = {}
+        for name, data in zip(names, encoded):
+            if data is None:
+                continue
+            for con in self.submodel[name].component_data_objects(Constraint, active=True, descend_into=(Block, SubModel)):
+                components[id(con)] = con
+            repn[name] = decode_dual_matrix_representation(data, components)
+        return repn
+
     def _apply_to(self, model, **kwds):
         submodel_name = kwds.pop('submodel', None)
         use_dual_objective = kwds.pop('use_dual_objective', False)
         subproblem_objective_weights = kwds.pop('subproblem_objective_weights', None)
+        naming = kwds.pop('naming', 'names')
+        processes = kwds.pop('processes', None)
+        assert (processes is None or naming == 'indexed'), "The processes option can only be used with indexed naming"
         #
         # Process options
         #
         self._preprocess('pao.pyomo.linear_dual', model)
         self._fix_all()
+        repn = self._collect_in_parallel(model, processes)
 
         _dual_obj = 0.
         _dual_sense = None
         _primal_obj = 0.
-        for key, sub in self.submodel.items():
+        #
+        # The submodel dictionary is shared by all transformations, so
+        # only the SubModels in this model are dualized.
+        #
+        for key in model._transformation_data['pao.pyomo.linear_dual'].submodel:
+            sub = self.submodel[key]
             _parent = sub.parent_block()
             #
             # Generate the dual block
             #
             transform = TransformationFactory('pao.duality.linear_dual')
-            dual = transform.create_using(sub, fixed=self._fixed_vardata[sub.name])
+            dual = transform.create_using(sub, fixed=self._fixed_vardata[sub.name], naming=naming, repn=repn.get(key))
             #
             # Figure out which objective is being used
             #
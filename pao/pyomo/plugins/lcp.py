@@ -13,12 +13,13 @@ pao.pyomo.plugins.lcp
 """
 
 import six
+import numpy as np
 
 from pyomo.core import Block, VarList, ConstraintList, Objective,\
                        Var, Constraint, maximize, ComponentUID, Set,\
-                       TransformationFactory
+                       TransformationFactory, quicksum
 from pyomo.repn import generate_standard_repn
-from pyomo.mpec import ComplementarityList, complements
+from pyomo.mpec import ComplementarityList, Complementarity, complements
 from .transform import BaseBilevelTransformation
 import logging
 
@@ -272,6 +273,165 @@ quadratic terms where both variables are in the lower level.")
     return block
 
 
+def _bilinear_term(var, coef, fixed_vars):
+    """
+    Return the lower-level variable and the coefficient for a bilinear
+    term with an upper-level variable, or None if both variables are fixed.
+    """
+    if id(var[0]) in fixed_vars:
+        if id(var[1]) in fixed_vars:
+            return None
+        return var[1], coef * var[0]
+    elif id(var[1]) in fixed_vars:
+        return var[0], coef * var[1]
+    raise RuntimeError("Cannot apply this transformation to a problem with \
+quadratic terms where both variables are in the lower level.")
+
+
+def create_submodel_kkt_block_indexed(instance, submodel, fixed_upper_vars):
+    """
+    Add optimality conditions for the submodel using indexed components
+
+    This generates the same optimality conditions as
+    create_submodel_kkt_block().  The linear system of the submodel is
+    collected in one pass into sparse arrays, and the dual variables (u
+    and v), the stationarity conditions (c1) and the complementarity
+    conditions (c2 and c3) are declared as indexed components.  Thus,
+    the cost of this function is linear in the number of nonzeros in the
+    submodel.
+    """
+    fixed_vars = {id(v) for v in fixed_upper_vars}
+    #
+    # The lower-level variables, and a map from id(var) to their column
+    #
+    lvars = []
+    column = {}
+
+    def add_var(var):
+        j = column.get(id(var))
+        if j is None:
+            j = column[id(var)] = len(lvars)
+            lvars.append(var)
+        return j
+    #
+    # Collect submodel objective terms
+    #
+    d2 = {}
+    for odata in submodel.component_data_objects(Objective, active=True):
+        d_sense = -1 if odata.sense == maximize else 1
+        o_terms = generate_standard_repn(odata.expr, compute_values=False)
+        for var, coef in zip(o_terms.linear_vars, o_terms.linear_coefs):
+            if id(var) in fixed_vars:
+                continue
+            d2[add_var(var)] = d_sense * coef
+        for var, coef in zip(o_terms.quadratic_vars, o_terms.quadratic_coefs):
+            term = _bilinear_term(var, coef, fixed_vars)
+            if term is None:
+                continue
+            j = add_var(term[0])
+            d2[j] = d2.get(j, 0) + d_sense * term[1]
+        #
+        # Stop after the first objective
+        #
+        break
+    #
+    # Collect the variable bounds.  Each bound has a dual variable v[k].
+    #
+    vbounds = []
+    vlower = {}
+    vupper = {}
+    for vcomponent in instance.component_objects(Var, active=True):
+        for vardata in vcomponent.values():
+            if id(vardata) in fixed_vars:
+                continue
+            lb, ub = vardata.bounds
+            if lb is None and ub is None:
+                continue
+            j = add_var(vardata)
+            if not lb is None:
+                vlower[j] = len(vbounds)
+                vbounds.append( (vardata, lb, True) )
+            if not ub is None:
+                vupper[j] = len(vbounds)
+                vbounds.append( (vardata, ub, False) )
+    #
+    # Collect the constraint coefficients in COO format.  Each equality
+    # and each inequality bound has a dual variable u[k].  The
+    # coefficients are negated for greater-than inequalities.
+    #
+    cduals = []
+    rows = []
+    cols = []
+    coefs = []
+    for cdata in submodel.component_data_objects(Constraint, active=True):
+        duals = []
+        if cdata.equality:
+            duals.append( (len(cduals), 1) )
+            cduals.append( (cdata, None) )
+        else:
+            if not cdata.lower is None:
+                duals.append( (len(cduals), -1) )
+                cduals.append( (cdata, True) )
+            if not cdata.upper is None:
+                duals.append( (len(cduals), 1) )
+                cduals.append( (cdata, False) )
+        c_terms = generate_standard_repn(cdata.body, compute_values=False)
+        terms = [(var, coef) for var, coef in zip(c_terms.linear_vars, c_terms.linear_coefs) if not id(var) in fixed_vars]
+        for var, coef in zip(c_terms.quadratic_vars, c_terms.quadratic_coefs):
+            term = _bilinear_term(var, coef, fixed_vars)
+            if not term is None:
+                terms.append(term)
+        for var, coef in terms:
+            j = add_var(var)
+            for k, sign in duals:
+                rows.append(k)
+                cols.append(j)
+                coefs.append(coef if sign > 0 else -coef)
+    #
+    # Sort the coefficients by column
+    #
+    nvars = len(lvars)
+    cols = np.array(cols, dtype=np.int64)
+    order = np.argsort(cols, kind='stable')
+    indptr = np.searchsorted(cols[order], np.arange(nvars+1))
+    #
+    # Create the block
+    #
+    block = Block(concrete=True)
+    block.u = Var(range(len(cduals)))   # Note: Dual variables associated to constraints in primal problem
+    block.v = Var(range(len(vbounds)))  # Note: Dual variables associated to bounds in primal problem
+
+    def c1_rule(b, j):
+        terms = [coefs[p] * b.u[rows[p]] for p in order[indptr[j]:indptr[j+1]]]
+        if j in vlower:
+            terms.append(- b.v[vlower[j]])     # dual for variable lower bound
+        if j in vupper:
+            terms.append(b.v[vupper[j]])       # dual for variable upper bound
+        if len(terms) == 0:
+            # TODO: Annotate the model as unbounded
+            raise IOError("Unbounded variable without side constraints")
+        return d2.get(j, 0) + quicksum(terms, linear=False) == 0
+    block.c1 = Constraint(range(nvars), rule=c1_rule)
+
+    inequalities = [k for k, (cdata, lower) in enumerate(cduals) if not lower is None]
+
+    def c2_rule(b, i):
+        k = inequalities[i]
+        cdata, lower = cduals[k]
+        if lower:
+            return complements(- cdata.body <= - cdata.lower, b.u[k] >= 0)
+        return complements(cdata.body <= cdata.upper, b.u[k] >= 0)
+    block.c2 = Complementarity(range(len(inequalities)), rule=c2_rule)
+
+    def c3_rule(b, k):
+        vardata, bound, lower = vbounds[k]
+        if lower:
+            return complements(vardata >= bound, b.v[k] >= 0)
+        return complements(vardata <= bound, b.v[k] >= 0)
+    block.c3 = Complementarity(range(len(vbounds)), rule=c3_rule)
+    return block
+
+
 @TransformationFactory.register('pao.pyomo.linear_mpec',
                                 doc="Generate a linear MPEC from the optimality conditions \
 of the submodel")
@@ -280,11 +440,16 @@ class LinearComplementarityBilevelTransformation(BaseBilevelTransformation):
     This transformation creates a block using a SubModel object,
     which contains constraints describing the optimality conditions for that
     submodel.
+
+    If the 'indexed' option is True, then the block is created with
+    indexed components that are generated from a sparse representation
+    of the submodel.  This is much faster for large submodels.
     """
 
     def _apply_to(self, model, **kwds):
         deterministic = kwds.pop('deterministic', False)
         submodel_name = kwds.pop('submodel', None)
+        indexed = kwds.pop('indexed', False)
 
         #
         # Process options
@@ -296,9 +461,12 @@ class LinearComplementarityBilevelTransformation(BaseBilevelTransformation):
             #
             # Create a block with optimality conditions
             #
-            setattr(model, key +'_kkt',
-                    create_submodel_kkt_block(model, sub, deterministic,
-                                              self.fixed_vardata[key]))
+            if indexed:
+                block = create_submodel_kkt_block_indexed(model, sub, self.fixed_vardata[key])
+            else:
+                block = create_submodel_kkt_block(model, sub, deterministic,
+                                                  self.fixed_vardata[key])
+            setattr(model, key +'_kkt', block)
             model._transformation_data['pao.pyomo.linear_mpec'].submodel_cuid =\
                 ComponentUID(sub)
             model._transformation_data['pao.pyomo.linear_mpec'].block_cuid =\
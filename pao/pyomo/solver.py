@@ -1,7 +1,7 @@
 import time
 from pyomo.common.config import ConfigBlock, ConfigValue
 
-from .convert import convert_pyomo2MultilevelProblem
+from .convert import convert_pyomo2MultilevelProblem, ConversionSession
 import pao.common
 import pao.mpr
 
@@ -28,10 +28,26 @@ class PyomoSubmodelSolverBase_LBP(PyomoSubmodelSolverBase):
         default=None,
         description="The name of the big-M value used to linearize bilinear terms.  If this is not specified, then the solver will throw an error if bilinear terms exist in the model."
         ))
+    config.declare('time_limit', ConfigValue(
+        default=None,
+        domain=float,
+        description="Solver time limit (in seconds).  This includes the time needed to convert the Pyomo model.  (default is None)"
+        ))
+    config.declare('profile_memory', ConfigValue(
+        default=False,
+        domain=bool,
+        description="If True, then the peak memory allocated in each phase of the solver is recorded.  This slows down the solver significantly.  (default is False)"
+        ))
+    config.declare('incremental', ConfigValue(
+        default=False,
+        domain=bool,
+        description="If True, then the conversion of a Pyomo model is reused when the same model is solved again, and only the values that depend on mutable parameters and fixed variables are updated.  The model is converted again if its structure has changed.  (default is False)"
+        ))
 
     def __init__(self, name, lmp_solver):
         super().__init__(name)
         self.lmp_solver = lmp_solver
+        self._session = None
 
     def solve(self, model, **options):
         #
@@ -41,40 +57,57 @@ class PyomoSubmodelSolverBase_LBP(PyomoSubmodelSolverBase):
         solver_options = {k:self.config[k] for k in self.config}
         solver_options['load_solutions'] = True
         linearize_bigm = solver_options.pop('linearize_bigm')
+        incremental = solver_options.pop('incremental')
         #
         # Start the clock
         #
         start_time = time.time()
-        #
-        # Convert the Pyomo model to a LBP
-        #
-        # For now, this always generates a multilevel problem with inequalities.
-        # This facilitates the linearization of bilinear terms.
-        #
-        try:
-            mp, soln_manager = convert_pyomo2MultilevelProblem(model, inequalities=True)
-        except RuntimeError as err:
-            print("Cannot convert Pyomo model to a multilevel problem") 
-            raise
-        if linearize_bigm:
-            lmp, soln = pao.mpr.linearize_bilinear_terms(mp, linearize_bigm)
-        else:
-            lmp = mp
-        #
-        results = PyomoSubmodelResults(solution_manager=soln_manager)
-        with pao.common.Solver(self.lmp_solver) as opt:
-            lmp_results = opt.solve(lmp, **solver_options)
-
-            self._initialize_results(results, lmp_results, model, lmp, options)
-            results.solver.rc = getattr(opt, '_rc', None)
+        with pao.common.PhaseTimer(memory=solver_options['profile_memory']) as timer:
+            #
+            # Convert the Pyomo model to a LBP
+            #
+            # Each constraint generates a single row with lower and upper
+            # bounds, which are expanded by the LBP solver.  Bilinear terms
+            # are linearized in a multilevel problem with inequalities.
+            #
+            inequalities = True if linearize_bigm else None
+            try:
+                with timer.phase('convert_pyomo2MultilevelProblem'):
+                    if incremental:
+                        if self._session is None or self._session.model is not model or self._session.inequalities != inequalities:
+                            self._session = ConversionSession(model, inequalities=inequalities)
+                        mp, soln_manager = self._session.convert()
+                    else:
+                        mp, soln_manager = convert_pyomo2MultilevelProblem(model, inequalities=inequalities)
+            except RuntimeError as err:
+                print("Cannot convert Pyomo model to a multilevel problem") 
+                raise
             if linearize_bigm:
-                soln.copy(From=lmp, To=mp)
-                results.copy(From=mp, To=model)
+                with timer.phase('linearize_bilinear_terms'):
+                    lmp, soln = pao.mpr.linearize_bilinear_terms(mp, linearize_bigm)
             else:
-                results.copy(From=lmp, To=model)
+                lmp = mp
+            #
+            if solver_options['time_limit'] is not None:
+                solver_options['time_limit'] = max(0, solver_options['time_limit'] - (time.time() - start_time))
+            #
+            results = PyomoSubmodelResults(solution_manager=soln_manager)
+            with pao.common.Solver(self.lmp_solver) as opt:
+                with timer.phase('solve'):
+                    lmp_results = opt.solve(lmp, **solver_options)
+
+                self._initialize_results(results, lmp_results, model, lmp, options)
+                results.solver.rc = getattr(opt, '_rc', None)
+                with timer.phase('copy_solution'):
+                    if linearize_bigm:
+                        soln.copy(From=lmp, To=mp)
+                        results.copy(From=mp, To=model)
+                    else:
+                        results.copy(From=lmp, To=model)
             
-        results.solver.wallclock_time = time.time() - start_time
-        return results
+            results.solver.phases = timer.summary()
+            results.solver.wallclock_time = time.time() - start_time
+            return results
 
     def _initialize_results(self, results, lmp_results, instance, lmp, options):
         #
@@ -87,6 +120,8 @@ class PyomoSubmodelSolverBase_LBP(PyomoSubmodelSolverBase):
         solv.termination_condition = lmp_results.solver.termination_condition
         solv.solver_time = lmp_results.solver.time
         solv.best_feasible_objective = lmp_results.solver.best_feasible_objective
+        solv.best_objective_bound = lmp_results.solver.best_objective_bound
+        solv.lmp_phases = lmp_results.solver.get('phases', None)
         #
         # PROBLEM
         #
@@ -1,7 +1,8 @@
 import numpy as np
 import pyutilib.th as unittest
 import pyomo.environ as pe
-from pao.pyomo.convert import collect_multilevel_tree, convert_pyomo2LinearMultilevelProblem, convert_pyomo2MultilevelProblem
+import pao.pyomo.convert
+from pao.pyomo.convert import collect_multilevel_tree, convert_pyomo2LinearMultilevelProblem, convert_pyomo2MultilevelProblem, ConversionSession
 from pao.pyomo import SubModel
 from pao.mpr import LinearMultilevelProblem, QuadraticMultilevelProblem
 
@@ -541,5 +542,134 @@ class TestMultilevelTree(unittest.TestCase):
         self.assertEqual(L.Q[U,L][1].toarray().tolist(),
 [[0.0, 0.0, 0.0], [0.0, 0.0, 0.0], [0.0, 0.0, -11.0]])
 
+    def test_initialize_8(self):
+        # Range and equality constraints with constants and repeated variables
+        M = pe.ConcreteModel()
+        M.x = pe.Var(bounds=(0,None))
+        M.y = pe.Var([1,2], bounds=(0,None))
+        M.o = pe.Objective(expr=M.x + M.y[1])
+        M.c1 = pe.Constraint(expr=pe.inequality(1, M.x + 2*M.y[1] + 3, 5))
+        M.c2 = pe.Constraint(expr=M.x - M.y[2] + M.x == 4)
+
+        M.s = SubModel(fixed=M.x)
+        M.s.o = pe.Objective(expr=M.y[2])
+        M.s.c = pe.Constraint(expr=M.y[1] + M.y[2] >= 1)
+
+        lmp,_ = convert_pyomo2MultilevelProblem(M, inequalities=True)
+        U = lmp.U
+        L = lmp.U.LL
+
+        self.assertEqual(U.A[U].toarray().tolist(), [[-1.0], [1.0], [2.0], [-2.0]])
+        self.assertEqual(U.A[L].toarray().tolist(), [[0.0, -2.0], [0.0, 2.0], [-1.0, 0.0], [1.0, 0.0]])
+        self.assertEqual(list(U.b), [2.0, 2.0, 4.0, -4.0])
+        self.assertEqual(L.A[L].toarray().tolist(), [[-1.0, -1.0]])
+        self.assertEqual(list(L.b), [-1.0])
+
+    def test_session(self):
+        # Update the coefficients, bounds and right-hand-sides that depend on mutable parameters
+        M = pe.ConcreteModel()
+        M.p = pe.Param(mutable=True, initialize=2)
+        M.q = pe.Param(mutable=True, initialize=0)
+        M.x = pe.Var(bounds=(0,M.p))
+        M.y = pe.Var([1,2], bounds=(0,None))
+        M.o = pe.Objective(expr=M.p*M.x + M.y[1] + M.q)
+        M.c = pe.Constraint(expr=M.x + M.q*M.y[1] + M.y[2] <= 3*M.p)
+
+        M.s = SubModel(fixed=M.x)
+        M.s.o = pe.Objective(expr=M.y[2])
+        M.s.c = pe.Constraint(expr=M.y[1] - M.p*M.y[2] >= M.q)
+
+        session = ConversionSession(M)
+        lmp,_ = session.convert()
+        U = lmp.U
+        L = lmp.U.LL[0]
+        # The parametric coefficient is stored, even though it is zero
+        self.assertEqual(U.A[L].nnz, 2)
+        self.assertEqual(U.A[L].toarray().tolist(), [[1, 0]])
+        self.assertEqual(list(U.b), [6])
+        self.assertEqual(list(L.A[L].toarray()[0]), [2, -1])
+
+        M.p = 3
+        M.q = 1
+        lmp_,_ = session.convert()
+        self.assertIs(lmp_, lmp)
+        self.assertEqual((session.num_conversions, session.num_updates), (1, 1))
+        self.assertEqual(list(U.c[U]), [3])
+        self.assertEqual(U.d, 1)
+        self.assertEqual(list(U.x.upper_bounds), [3])
+        self.assertEqual(U.A[L].toarray().tolist(), [[1, 1]])
+        self.assertEqual(list(U.b), [9])
+        self.assertEqual(list(L.A[L].toarray()[0]), [3, -1])
+        self.assertEqual(list(L.b), [-1])
+
+        # Structural changes generate a new problem
+        M.s.c.deactivate()
+        lmp_,_ = session.convert()
+        self.assertIsNot(lmp_, lmp)
+        self.assertEqual(session.num_conversions, 2)
+        self.assertEqual(lmp_.U.LL[0].A[lmp_.U.LL[0]], None)
+
+    def test_session_traversal(self):
+        # Expressions are only traversed when the model is converted from scratch
+        M = pe.ConcreteModel()
+        M.p = pe.Param(mutable=True, initialize=2)
+        M.x = pe.Var(bounds=(0,None))
+        M.y = pe.Var(bounds=(0,None))
+        M.o = pe.Objective(expr=M.x + M.y)
+        M.c = pe.Constraint(expr=M.x + M.p*M.y <= 4)
+        M.s = SubModel(fixed=M.x)
+        M.s.o = pe.Objective(expr=M.y)
+        M.s.c = pe.Constraint(expr=M.y >= M.p)
+
+        calls = []
+        identify_variables = pao.pyomo.convert.identify_variables
+        def counter(expr, **kwds):
+            calls.append(expr)
+            return identify_variables(expr, **kwds)
+        try:
+            pao.pyomo.convert.identify_variables = counter
+            session = ConversionSession(M)
+            session.convert()
+            self.assertEqual(len(calls), 4)
+            M.p = 3
+            session.convert()
+            self.assertEqual(session.num_updates, 1)
+            self.assertEqual(len(calls), 4)
+        finally:
+            pao.pyomo.convert.identify_variables = identify_variables
+
+    def test_row_bounds(self):
+        # Each constraint generates one row with lower and upper bounds
+        M = pe.ConcreteModel()
+        M.p = pe.Param(mutable=True, initialize=1)
+        M.x = pe.Var(bounds=(0,None))
+        M.y = pe.Var([1,2], bounds=(0,None))
+        M.o = pe.Objective(expr=M.x + M.y[1])
+        M.c1 = pe.Constraint(expr=pe.inequality(M.p, M.x + 2*M.y[1] + 3, 5))
+        M.c2 = pe.Constraint(expr=M.x - M.y[2] == 4)
+
+        M.s = SubModel(fixed=M.x)
+        M.s.o = pe.Objective(expr=M.y[2])
+        M.s.c = pe.Constraint(expr=M.y[1] + M.y[2] >= M.p)
+
+        session = ConversionSession(M, inequalities=None)
+        lmp,_ = session.convert()
+        U = lmp.U
+        L = lmp.U.LL
+
+        self.assertEqual(U.A[U].toarray().tolist(), [[1.0], [1.0]])
+        self.assertEqual(U.A[L].toarray().tolist(), [[0.0, 2.0], [-1.0, 0.0]])
+        self.assertEqual(list(U.bl), [-2.0, 4.0])
+        self.assertEqual(list(U.b), [2.0, 4.0])
+        self.assertEqual(L.A[L].toarray().tolist(), [[1.0, 1.0]])
+        self.assertEqual(list(L.bl), [1.0])
+        self.assertEqual(list(L.b), [np.PINF])
+
+        M.p = 2
+        session.convert()
+        self.assertEqual(session.num_updates, 1)
+        self.assertEqual(list(U.bl), [-1.0, 4.0])
+        self.assertEqual(list(L.bl), [2.0])
+
 if __name__ == "__main__":
     unittest.main()
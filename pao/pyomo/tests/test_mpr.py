@@ -1,5 +1,6 @@
 import math
 import pyutilib.th as unittest
+import pyomo.environ as pe
 from pao.pyomo import *
 from pao.pyomo import examples
 import pyomo.opt
@@ -40,6 +41,74 @@ class Test_solver(unittest.TestCase):
         self.assertTrue(math.isclose(M.x.value, 4))
         self.assertTrue(math.isclose(M.y.value, 4))
 
+    def test_incremental(self):
+        M = examples.bard511.create()
+        M.p = pe.Param(mutable=True, initialize=12)
+        M.L.c3.set_value(2*M.x + M.y <= M.p)
+
+        opt = Solver('pao.pyomo.FA', mip_solver='scipy-highs', incremental=True)
+        opt.solve(M)
+        self.assertTrue(math.isclose(M.x.value, 4))
+        self.assertTrue(math.isclose(M.y.value, 4))
+
+        # The multilevel problem is updated with the new parameter value
+        M.p = 10
+        results = opt.solve(M)
+        self.assertEqual(opt._session.num_conversions, 1)
+        self.assertEqual(opt._session.num_updates, 1)
+        x, y = M.x.value, M.y.value
+        opt.solve(M, incremental=False)
+        self.assertTrue(math.isclose(M.x.value, x))
+        self.assertTrue(math.isclose(M.y.value, y))
+        self.assertTrue(2*x + y <= 10 + 1e-6)
+
+        # The model is converted again after its structure changes
+        M.L.c4.deactivate()
+        opt.solve(M, incremental=True)
+        self.assertEqual(opt._session.num_conversions, 2)
+
+    def test_incremental_unfix(self):
+        # A variable that is fixed in the first conversion is a constant
+        # in the template, so the model is converted again when it is
+        # unfixed
+        M = examples.bard511.create()
+        M.w = pe.Var(bounds=(0,1))
+        M.w.fix(0)
+        M.L.c3.set_value(2*M.x + M.y - 4*M.w <= 12)
+
+        opt = Solver('pao.pyomo.FA', mip_solver='scipy-highs', incremental=True)
+        opt.solve(M)
+        self.assertEqual([len(L.x) for L in opt._session.problem.levels()], [1, 1])
+
+        M.w.unfix()
+        opt.solve(M)
+        self.assertEqual(opt._session.num_conversions, 2)
+        self.assertEqual([len(L.x) for L in opt._session.problem.levels()], [1, 2])
+        session = ConversionSession(M)
+        mp, soln_manager = session.convert()
+        self.assertEqual([len(L.x) for L in mp.levels()], [1, 2])
+
+    def test_incremental_binary(self):
+        # An integer variable with bounds [0,1] is a binary variable
+        M = examples.bard511.create()
+        M.z = pe.Var(within=pe.Integers, bounds=(0,2))
+        M.L.c3.set_value(2*M.x + M.y + M.z <= 12)
+
+        session = ConversionSession(M)
+        mp, soln_manager = session.convert()
+        self.assertEqual((mp.U.LL[0].x.nxZ, mp.U.LL[0].x.nxB), (1, 0))
+
+        M.z.setub(1)
+        mp, soln_manager = session.convert()
+        self.assertEqual(session.num_conversions, 2)
+        self.assertEqual((mp.U.LL[0].x.nxZ, mp.U.LL[0].x.nxB), (0, 1))
+
+    def test_incremental_default(self):
+        M = examples.bard511.create()
+        opt = Solver('pao.pyomo.FA', mip_solver='scipy-highs')
+        opt.solve(M)
+        self.assertIsNone(opt._session)
+
 
 class Test_pyomo_FA(unittest.TestCase):
 
@@ -0,0 +1,189 @@
+import pyutilib.th as unittest
+import pyomo.environ as pe
+from pao.pyomo import *
+import pao.pyomo.plugins.lcp
+import pao.pyomo.plugins.dual
+import pao.duality.plugins
+from pao.pyomo.plugins.collect import BilevelMatrixRepn
+
+
+def create_bilevel():
+    M = pe.ConcreteModel()
+    M.x = pe.Var(bounds=(0,None))
+    M.y = pe.Var([1,2], bounds=(0,None))
+    M.y[2].setub(4)
+    M.o = pe.Objective(expr=-M.x - 10*M.y[1])
+    M.L = SubModel(fixed=M.x)
+    M.L.o = pe.Objective(expr=-M.y[1] + M.x*M.y[2], sense=pe.maximize)
+    M.L.c1 = pe.Constraint(expr= -25*M.x + 20*M.y[1] <= 30)
+    M.L.c2 = pe.Constraint(expr= M.x + 2*M.y[1] + M.x*M.y[2] <= 10)
+    M.L.c3 = pe.Constraint(expr= 2*M.x - M.y[1] == 15)
+    M.L.c4 = pe.Constraint(expr= (2, 2*M.x + 10*M.y[1] - M.y[2], 15))
+    return M
+
+
+class Test_linear_mpec(unittest.TestCase):
+
+    def test_indexed(self):
+        # The indexed block has the same optimality conditions
+        M1 = create_bilevel()
+        pe.TransformationFactory('pao.pyomo.linear_mpec').apply_to(M1, deterministic=True)
+        M2 = create_bilevel()
+        pe.TransformationFactory('pao.pyomo.linear_mpec').apply_to(M2, indexed=True)
+        B1 = M1.L_kkt
+        B2 = M2.L_kkt
+
+        self.assertEqual(len(B1.u), 5)
+        self.assertEqual(len(B1.v), 3)
+        for name in ('u', 'v', 'c1', 'c2', 'c3'):
+            self.assertEqual(len(getattr(B2, name)), len(getattr(B1, name)))
+        self.assertEqual(list(B2.u.keys()), list(range(5)))
+        #
+        # The dual variables are created in the same order, so the
+        # stationarity conditions have the same values
+        #
+        for M in (M1, M2):
+            M.x.value = 2
+            M.y[1].value = 1
+            M.y[2].value = 3
+        for k, (u1, u2) in enumerate(zip(B1.u.values(), B2.u.values())):
+            u1.value = u2.value = k+1
+        for k, (v1, v2) in enumerate(zip(B1.v.values(), B2.v.values())):
+            v1.value = v2.value = 10*(k+1)
+        for c1, c2 in zip(B1.c1.values(), B2.c1.values()):
+            self.assertAlmostEqual(pe.value(c1.body), pe.value(c2.body))
+        for c1, c2 in zip(list(B1.c2.values())+list(B1.c3.values()), list(B2.c2.values())+list(B2.c3.values())):
+            self.assertEqual(str(c1._args[0]), str(c2._args[0]))
+
+    def test_unbounded(self):
+        M = pe.ConcreteModel()
+        M.x = pe.Var(bounds=(0,None))
+        M.y = pe.Var()
+        M.o = pe.Objective(expr=M.x)
+        M.L = SubModel(fixed=M.x)
+        M.L.o = pe.Objective(expr=M.y)
+        with self.assertRaises(IOError):
+            pe.TransformationFactory('pao.pyomo.linear_mpec').apply_to(M, indexed=True)
+
+
+class Test_matrix_repn(unittest.TestCase):
+
+    def _create(self):
+        M = pe.ConcreteModel()
+        M.x = pe.Var([0,1], bounds=(0,4))
+        M.y = pe.Var([0,1,2], bounds=(0,None))
+        M.o = pe.Objective(expr=M.x[0] - 2*M.y[1], sense=pe.maximize)
+        M.c = pe.Constraint(expr=M.x[0] + M.x[1] <= 5)
+        M.L = SubModel(fixed=M.x)
+        M.L.o = pe.Objective(expr=M.y[0] + M.x[1]*M.y[2] + 7)
+        M.L.c1 = pe.Constraint(expr=M.y[0] + 2*M.x[0]*M.y[1] - M.x[1] >= 1)
+        M.L.c2 = pe.Constraint(expr=(0, M.y[2] - M.y[0] + M.x[0]*M.y[0], 3))
+        M.L.c3 = pe.Constraint(expr=M.y[1] == 2)
+        return M
+
+    def test_matrices(self):
+        M = self._create()
+        repn = BilevelMatrixRepn(M)
+        self.assertEqual([repn.var_index[id(v)] for v in (M.x[0], M.x[1], M.y[0], M.y[1], M.y[2])], [0,1,2,3,4])
+        self.assertEqual(repn.row_index['L'][id(M.L.c2), 'l'], 2)
+
+        data = repn.matrices(M)
+        self.assertEqual(data.A.todense().tolist(), [[1,1,0,0,0]])
+        self.assertEqual(list(data.C), [-1,0,0,2,0])
+
+        data = repn.matrices(M.L)
+        self.assertEqual(data.sense, ['g->l', 'g->l', 'l', 'e'])
+        self.assertEqual(list(data.b), [-1, 0, 3, 2])
+        self.assertEqual(data.A.todense().tolist(), [[0,1,-1,0,0], [0,0,1,0,-1], [0,0,-1,0,1], [0,0,0,1,0]])
+        # Standard form of the lower-level is a maximization
+        self.assertEqual(list(data.C), [0,0,-1,0,0])
+        self.assertEqual(data.C_q.todense().tolist()[1], [0,0,0,0,-1])
+        self.assertEqual(data.C_q.todense().tolist()[4], [0,-1,0,0,0])
+        self.assertEqual(data.C_constant, 7)
+        # Bilinear terms are only stored for the variables that appear in them
+        self.assertEqual(sorted(data.A_q.keys()), [0, 2, 3])
+        self.assertEqual(repn.matrices(M).A_q, {})
+
+    def test_coef_matrices(self):
+        M = self._create()
+        repn = BilevelMatrixRepn(M)
+
+        A, A_q, sign, b = repn.coef_matrices(M.L, M.y[0])
+        self.assertEqual(list(A), [-1, 1, -1, 0])
+        self.assertEqual(A_q.todense().tolist(), [[0]*5, [-1,0,0,0,0], [1,0,0,0,0], [0]*5])
+        self.assertEqual(sign, ['l', 'l', 'l', 'e'])
+        self.assertEqual(list(b), [-1, 0, 3, 2])
+        # The slices are cached
+        self.assertIs(repn.coef_matrices(M.L, M.y[0])[1], A_q)
+
+        A, A_q, sign, b = repn.coef_matrices(M.L, M.x[0], sense='l')
+        self.assertEqual(list(A), [0, 0, 0])
+        self.assertEqual(A_q.todense().tolist(), [[0,0,0,-2,0], [0,0,-1,0,0], [0,0,1,0,0]])
+        self.assertEqual(sign, ['l', 'l', 'l'])
+
+        A, A_q, sign, b = repn.coef_matrices(M.L, M.y[1], sense='e')
+        self.assertEqual(list(A), [1])
+        self.assertEqual(list(b), [2])
+
+        C, C_q, C_constant = repn.cost_vectors(M.L, M.x[1])
+        self.assertEqual(C, 0)
+        self.assertEqual(list(C_q), [0,0,0,0,-1])
+        self.assertEqual(C_constant, 7)
+
+
+class Test_linear_dual(unittest.TestCase):
+
+    def _create(self, nsub=3):
+        M = pe.ConcreteModel()
+        M.x = pe.Var([0,1], bounds=(0,1))
+        M.p = pe.Param(initialize=2, mutable=True)
+        M.o = pe.Objective(expr=M.x[0] + M.x[1])
+        M.S = pe.Block(range(nsub))
+        for s in range(nsub):
+            B = M.S[s]
+            B.sub = SubModel(fixed=M.x)
+            B.sub.y = pe.Var([0,1,2], within=pe.NonNegativeReals)
+            B.sub.o = pe.Objective(expr=(s+1)*B.sub.y[0] - B.sub.y[2], sense=pe.maximize)
+            B.sub.c1 = pe.Constraint(expr=B.sub.y[0] + 2*B.sub.y[1] <= 3 - M.x[0])
+            B.sub.c2 = pe.Constraint(expr=(1, B.sub.y[0] - B.sub.y[2] + (s+2)*M.x[1]*B.sub.y[1], 4))
+        return M
+
+    def _values(self, M):
+        # Constraint and objective values at fixed variable values
+        for k, var in enumerate(M.component_data_objects(pe.Var, descend_into=(pe.Block, SubModel))):
+            var.set_value(k+1, skip_validation=True)
+        return [(c.name, pe.value(c.body), pe.value(c.lower), pe.value(c.upper)) for c in M.component_data_objects(pe.Constraint, active=True, descend_into=True)] + \
+               [(o.name, pe.value(o.expr)) for o in M.component_data_objects(pe.Objective, active=True, descend_into=True)]
+
+    def test_processes(self):
+        # Dual data collected in worker processes gives the same dual blocks
+        M1 = self._create()
+        pe.TransformationFactory('pao.pyomo.linear_dual').apply_to(M1, naming='indexed')
+        M2 = self._create()
+        xfrm = pe.TransformationFactory('pao.pyomo.linear_dual')
+        xfrm.apply_to(M2, naming='indexed', processes=2)
+        self.assertEqual(len(M2.S[2].sub_dual.v), 3)
+        self.assertEqual(self._values(M1), self._values(M2))
+        self.assertEqual(M2.S[0].sub_dual.name_map.dual_variables()[0], 'c1')
+
+    def test_fallback(self):
+        # Coefficients with mutable parameters are collected serially
+        M1, M2 = self._create(), self._create()
+        for M in (M1, M2):
+            M.S[1].sub.c1.set_value(M.S[1].sub.y[0] + M.p*M.S[1].sub.y[1] <= 3)
+        pe.TransformationFactory('pao.pyomo.linear_dual').apply_to(M1, naming='indexed')
+        pe.TransformationFactory('pao.pyomo.linear_dual').apply_to(M2, naming='indexed', processes=2)
+        self.assertEqual(self._values(M1), self._values(M2))
+        # The dual constraint for y[1] depends on the parameter
+        body = pe.value(M2.S[1].sub_dual.c[2].body)
+        M2.p = 3
+        self.assertNotEqual(pe.value(M2.S[1].sub_dual.c[2].body), body)
+
+    def test_errors(self):
+        M = self._create()
+        with self.assertRaises(AssertionError):
+            pe.TransformationFactory('pao.pyomo.linear_dual').apply_to(M, processes=2)
+
+
+if __name__ == "__main__":
+    unittest.main()